@@ -1,7 +1,9 @@
 """
 Daily alerts job — run via Heroku Scheduler: python alerts_job.py
 
-Sends email summaries to operation admins covering:
+Refreshes the stored sampling schedule status, expires idle resumable scan
+upload sessions (and their partial files), then sends email summaries to
+operation admins covering:
   - Medical surveillance overdue / due within 30 days
   - Sampling schedules overdue / due within 30 days
 """
@@ -10,17 +12,61 @@ from datetime import date, timedelta
 from app import create_app, db
 from app.models import Operation, User
 from app.schedules.models import MedicalRecord, SamplingSchedule
+from app.schedules.status import refresh_statuses
+from app.scans.sessions import expire_sessions
 from app.email import send_alert_email
+from app.telemetry import metrics
 
 WARN_DAYS = 30
 
 
+def due_items(operation_id, today, warn_date):
+    """Overdue and due-soon medical records and sampling schedules for one operation."""
+    medical_overdue = (
+        MedicalRecord.query
+        .filter_by(operation_id=operation_id)
+        .filter(MedicalRecord.next_due.isnot(None))
+        .filter(MedicalRecord.next_due < today)
+        .all()
+    )
+    medical_due_soon = (
+        MedicalRecord.query
+        .filter_by(operation_id=operation_id)
+        .filter(MedicalRecord.next_due.isnot(None))
+        .filter(MedicalRecord.next_due >= today)
+        .filter(MedicalRecord.next_due <= warn_date)
+        .all()
+    )
+    sampling_overdue = (
+        SamplingSchedule.query
+        .filter_by(operation_id=operation_id)
+        .filter(SamplingSchedule.next_sample_due.isnot(None))
+        .filter(SamplingSchedule.next_sample_due < today)
+        .all()
+    )
+    sampling_due_soon = (
+        SamplingSchedule.query
+        .filter_by(operation_id=operation_id)
+        .filter(SamplingSchedule.next_sample_due.isnot(None))
+        .filter(SamplingSchedule.next_sample_due >= today)
+        .filter(SamplingSchedule.next_sample_due <= warn_date)
+        .all()
+    )
+    return medical_overdue, medical_due_soon, sampling_overdue, sampling_due_soon
+
+
 def run():
     app = create_app()
-    with app.app_context():
+    with app.app_context(), metrics.alerts_job_timer():
         today     = date.today()
         warn_date = today + timedelta(days=WARN_DAYS)
 
+        refreshed = refresh_statuses(today)
+        print(f"Schedule status refreshed — {refreshed['changed']} changed.")
+
+        expired = expire_sessions()
+        print(f"Upload sessions expired — {expired} removed.")
+
         operations = Operation.query.filter_by(status='active').all()
         sent = skipped = 0
 
@@ -31,36 +77,8 @@ def run():
                 skipped += 1
                 continue
 
-            medical_overdue = (
-                MedicalRecord.query
-                .filter_by(operation_id=op.id)
-                .filter(MedicalRecord.next_due.isnot(None))
-                .filter(MedicalRecord.next_due < today)
-                .all()
-            )
-            medical_due_soon = (
-                MedicalRecord.query
-                .filter_by(operation_id=op.id)
-                .filter(MedicalRecord.next_due.isnot(None))
-                .filter(MedicalRecord.next_due >= today)
-                .filter(MedicalRecord.next_due <= warn_date)
-                .all()
-            )
-            sampling_overdue = (
-                SamplingSchedule.query
-                .filter_by(operation_id=op.id)
-                .filter(SamplingSchedule.next_sample_due.isnot(None))
-                .filter(SamplingSchedule.next_sample_due < today)
-                .all()
-            )
-            sampling_due_soon = (
-                SamplingSchedule.query
-                .filter_by(operation_id=op.id)
-                .filter(SamplingSchedule.next_sample_due.isnot(None))
-                .filter(SamplingSchedule.next_sample_due >= today)
-                .filter(SamplingSchedule.next_sample_due <= warn_date)
-                .all()
-            )
+            medical_overdue, medical_due_soon, sampling_overdue, sampling_due_soon = \
+                due_items(op.id, today, warn_date)
 
             if not any([medical_overdue, medical_due_soon, sampling_overdue, sampling_due_soon]):
                 print(f"  {op.operation_name}: nothing to report, skipping")
@@ -91,4 +109,7 @@ def run():
 
 
 if __name__ == '__main__':
-    run()
+    try:
+        run()
+    finally:
+        metrics.push_job_metrics('ohms_alerts_job')
@@ -1,5 +1,5 @@
 import os
-from flask import Flask, jsonify, send_from_directory, make_response
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
@@ -17,8 +17,14 @@ def _migrate_field_sheet(db):
         ('field_sheet', 'result_mn_twa',    'FLOAT'),
         ('field_sheet', 'result_si_twa',    'FLOAT'),
         ('field_sheet', 'result_pnoc_twa',  'FLOAT'),
+        ('field_sheet', 'scan_sha256',               'VARCHAR(64)'),
+        ('field_sheet', 'scan_has_preview',          'BOOLEAN DEFAULT FALSE'),
+        ('field_sheet', 'scan_thumb_url_external',   'TEXT'),
+        ('field_sheet', 'scan_preview_url_external', 'TEXT'),
         ('lab_result',  'shift_duration',    'FLOAT'),
         ('lab_result',  'sampling_duration', 'INTEGER'),
+        ('scan_upload', 'sha256',            'VARCHAR(64)'),
+        ('exposure_reading', 'exceedance_ratio', 'FLOAT'),
     ]
     for table, col, col_type in migrations:
         try:
@@ -29,6 +35,50 @@ def _migrate_field_sheet(db):
         except Exception:
             db.session.rollback()
 
+    # Backfill the stored OEL ratio (new readings get it from the model validator).
+    try:
+        db.session.execute(text(
+            'UPDATE exposure_reading SET exceedance_ratio = measured_value / oel_value '
+            'WHERE exceedance_ratio IS NULL AND oel_value > 0'
+        ))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+    # Indexes on existing tables (create_all only indexes new tables).
+    # Tenant-scoped lists filter on operation_id and sort on the second column;
+    # tests/test_query_plans.py fails if one of these stops being used.
+    indexes = [
+        ('ix_field_sheet_scan_sha256', 'field_sheet', 'scan_sha256'),
+        ('ix_user_operation_id',       '"user"',      'operation_id'),
+        ('ix_stressor_operation_id',   'stressor',    'operation_id'),
+        ('ix_employee_operation_id_name',            'employee',         'operation_id, name'),
+        ('ix_heg_operation_id_heg_number',           'heg',              'operation_id, heg_number'),
+        ('ix_exposure_reading_operation_id_date',    'exposure_reading', 'operation_id, date'),
+        ('ix_medical_record_operation_id_next_due',  'medical_record',   'operation_id, next_due'),
+        ('ix_field_sheet_operation_id_created_at',   'field_sheet',      'operation_id, created_at'),
+        ('ix_lab_result_operation_id_sampling_date', 'lab_result',       'operation_id, sampling_date'),
+        ('ix_sampling_schedule_operation_id_next_sample_due', 'sampling_schedule', 'operation_id, next_sample_due'),
+        ('ix_sampling_schedule_next_sample_due',              'sampling_schedule', 'next_sample_due'),
+        ('ix_sampling_schedule_operation_id_status',          'sampling_schedule', 'operation_id, status'),
+        ('ix_exposure_reading_operation_id_stressor_id_ratio', 'exposure_reading',
+         'operation_id, stressor_id, exceedance_ratio'),
+        ('ix_exposure_reading_stressor_id_ratio',              'exposure_reading',  'stressor_id, exceedance_ratio'),
+        ('ix_employee_exposure_employee_id',                   'employee_exposure', 'employee_id'),
+    ]
+    # Fails (and is skipped) while duplicate rows remain; generation still checks first.
+    unique_indexes = [
+        ('uq_sampling_schedule_heg_stressor_occupation', 'sampling_schedule',
+         "heg_id, stressor_id, COALESCE(occupation, '')"),
+    ]
+    for kind, entries in (('INDEX', indexes), ('UNIQUE INDEX', unique_indexes)):
+        for name, table, cols in entries:
+            try:
+                db.session.execute(text(f'CREATE {kind} IF NOT EXISTS {name} ON {table} ({cols})'))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+
 db = SQLAlchemy()
 login_manager = LoginManager()
 bcrypt = Bcrypt()
@@ -36,12 +86,19 @@ csrf = CSRFProtect()
 
 
 def create_app():
-    static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
     app = Flask(__name__)
 
     from config import Config
     app.config.from_object(Config)
 
+    # ISO 8601 dates in JSON; orjson when installed
+    from app import json_provider
+    json_provider.init_app(app)
+
+    # Query counts / DB time per request, Server-Timing header, query budgets
+    from app import telemetry
+    telemetry.init_app(app)
+
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -88,21 +145,25 @@ def create_app():
     from app.models import Operation, User  # noqa
     from app.schedules.models import ExposureReading, EmployeeExposure, MedicalRecord, FieldSheet, LabResult  # noqa
     from app.employees.models import Employee  # noqa
+    from app.scans.models import ScanUpload  # noqa
+
+    # Data-versioned response cache (registers the data_version table)
+    from app import cache
+    cache.init_app(app)
+
+    from app.scans.worker import scans_cli
+    app.cli.add_command(scans_cli)
+    from app.schedules.status import schedules_cli
+    from app.schedules.generate import generate_command
+    schedules_cli.add_command(generate_command)
+    app.cli.add_command(schedules_cli)
+
+    # Built React app (static/) — manifest of assets, served by main.index
+    from app import assets
+    assets.init_app(app)
 
     with app.app_context():
         db.create_all()
         _migrate_field_sheet(db)
 
-    @app.route('/', defaults={'path': ''})
-    @app.route('/<path:path>')
-    def serve_react(path):
-        file_path = os.path.join(static_dir, path)
-        if path and os.path.isfile(file_path):
-            return send_from_directory(static_dir, path)
-        resp = make_response(send_from_directory(static_dir, 'index.html'))
-        resp.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        resp.headers['Pragma'] = 'no-cache'
-        resp.headers['Expires'] = '0'
-        return resp
-
     return app
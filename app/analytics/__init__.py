@@ -0,0 +1,13 @@
+"""
+Exposure analytics — statistics computed over a tenant's measurements.
+
+  samples     loads exposure readings / lab results as columnar NumPy arrays,
+              keyed by HEG and stressor
+  lognormal   geometric mean, GSD, 95th percentile and 95% UCL of the mean
+              for every group in one vectorised pass
+  en689       EN 689 preliminary and statistical compliance tests per group,
+              recomputing only groups whose samples changed
+
+Served by GET /api/analytics/heg-statistics and /api/analytics/en689
+(app/api/analytics.py).
+"""
@@ -0,0 +1,139 @@
+"""
+EN 689:2018 compliance tests for every HEG × agent in one vectorised pass.
+
+  preliminary test (Annex D), 3–5 samples
+      compliant       every result below 0.10 / 0.15 / 0.20 × OEL (n = 3 / 4 / 5)
+      non-compliant   any result above the OEL
+      inconclusive    otherwise — sample further (at least 6) for the statistical test
+  statistical test (Annex F), 6 or more samples
+      U_R = (ln OEL − ln GM) / ln GSD
+      compliant when U_R ≥ U_T, the 70 % confidence limit for the 95th
+      percentile; non-compliant otherwise
+
+Fewer than 3 samples is 'insufficient'; an agent without a numeric OEL is
+'no-oel'. Non-detects are substituted as in lognormal.py before testing.
+U_T is tabulated for n = 6 … 30; larger groups use the n = 30 value, which
+is slightly conservative.
+
+evaluate() keeps the per-group results of its previous run together with a
+fingerprint of each group's samples and OEL, and only recomputes the groups
+whose fingerprint changed.
+"""
+
+import numpy as np
+
+from app.analytics.lognormal import factorize, group_statistics, substitute_non_detects, _column
+
+PRELIMINARY_LIMITS = {3: 0.10, 4: 0.15, 5: 0.20}       # fraction of the OEL, by number of samples
+
+# U_T (70 % confidence, 95th percentile) for n = 6 … 30
+_UT = np.array([np.nan] * 6 + [
+    2.187, 2.120, 2.072, 2.035, 2.005, 1.981, 1.961, 1.944, 1.929, 1.917,
+    1.905, 1.895, 1.886, 1.878, 1.870, 1.863, 1.857, 1.851, 1.846, 1.841,
+    1.836, 1.832, 1.828, 1.824, 1.820])
+
+VERDICTS = ('compliant', 'non-compliant', 'inconclusive', 'insufficient', 'no-oel')
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def u_t(n):
+    """U_T for each sample count; NaN below 6."""
+    n = np.asarray(n, dtype=np.int64)
+    return np.where(n < 6, np.nan, _UT[np.clip(n, 0, 30)])
+
+
+def _hash(*columns):
+    """A well-mixed uint64 per element of the (integer or float) columns."""
+    h = np.zeros(len(columns[0]), dtype=np.uint64)
+    for column in columns:
+        c = np.asarray(column)
+        bits = c.astype(np.float64).view(np.uint64) if c.dtype.kind == 'f' else c.astype(np.int64).view(np.uint64)
+        h = (h ^ bits) * _MIX
+        h ^= h >> np.uint64(31)
+    return h
+
+
+def fingerprints(group, sample_id, value, n_groups):
+    """Order-independent fingerprint of each group's (sample id, value) multiset."""
+    fp = np.zeros(n_groups, dtype=np.uint64)
+    np.add.at(fp, group, _hash(sample_id, value))      # uint64 sums wrap around
+    return fp
+
+
+def compliance(group, value, oel, n_groups, nd='sqrt2'):
+    """
+    EN 689 tests per group. `group` holds each sample's group index, `oel` the
+    limit of each group (NaN if none). Returns a dict of arrays of length n_groups.
+    """
+    stats = group_statistics(group, value, n_groups, nd)
+    x = substitute_non_detects(group, value, n_groups, nd)
+    usable = np.isfinite(x) & (x > 0)
+    max_x = np.full(n_groups, np.nan)
+    np.fmax.at(max_x, group[usable], x[usable])
+
+    n = stats['n']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max_ratio = max_x / oel
+        u_r = (np.log(oel) - np.log(stats['gm'])) / np.log(stats['gsd'])
+    limit = np.array([PRELIMINARY_LIMITS.get(k, np.nan) for k in range(6)])[np.clip(n, 0, 5)]
+    threshold = u_t(n)
+    no_oel = ~(oel > 0)
+
+    verdict = np.select(
+        [no_oel, n < 3,
+         (n < 6) & (max_ratio < limit), (n < 6) & (max_ratio > 1), n < 6,
+         u_r >= threshold],
+        ['no-oel', 'insufficient',
+         'compliant', 'non-compliant', 'inconclusive',
+         'compliant'],
+        'non-compliant').astype(object)
+    test = np.select([no_oel | (n < 3), n < 6], [None, 'preliminary'], 'statistical').astype(object)
+    statistical = test == 'statistical'
+    return {
+        'samples':    stats['samples'],
+        'nonDetects': stats['nonDetects'],
+        'n':          n,
+        'gm':         stats['gm'],
+        'gsd':        stats['gsd'],
+        'maxRatio':   np.where(no_oel, np.nan, max_ratio),
+        'uR':         np.where(statistical, u_r, np.nan),
+        'uT':         np.where(statistical, threshold, np.nan),
+        'test':       test,
+        'verdict':    verdict,
+    }
+
+
+def evaluate(samples, oels, nd='sqrt2', previous=None):
+    """
+    EN 689 result per operation × HEG × stressor for a samples.Samples batch.
+    `oels` maps stressor id → OEL. `previous` is the memo returned by the last
+    call for the same scope; groups whose samples and OEL are unchanged are
+    taken from it. Returns (rows ordered by operation, HEG, stressor;
+    number of groups recomputed; memo for the next call).
+    """
+    previous = previous or {}
+    (ops, hegs, stressor_ids), group = factorize(samples.operation_id, samples.heg, samples.stressor_id)
+    oel = np.array([oels.get(sid) for sid in stressor_ids.tolist()], dtype=np.float64)
+    fp = fingerprints(group, samples.sample_id, samples.value, len(ops)) ^ _hash(oel)
+    keys = list(zip(ops.tolist(), hegs.tolist(), stressor_ids.tolist()))
+
+    changed = np.array([previous.get(k, (None,))[0] != f for k, f in zip(keys, fp.tolist())], dtype=bool)
+    index = np.flatnonzero(changed)
+    remap = np.full(len(ops), -1)
+    remap[index] = np.arange(index.size)
+    selected = changed[group]
+    results = compliance(remap[group[selected]], samples.value[selected], oel[index], index.size, nd)
+    columns = {name: _column(values) for name, values in results.items()}
+    fresh = {
+        keys[i]: {name: column[j] for name, column in columns.items()}
+        for j, i in enumerate(index.tolist())
+    }
+
+    memo, rows = {}, []
+    for k, f in zip(keys, fp.tolist()):
+        result = fresh[k] if k in fresh else previous[k][1]
+        memo[k] = (f, result)
+        op, heg, sid = k
+        rows.append({'operationId': op if op >= 0 else None, 'heg': heg, 'stressorId': sid, **result})
+    return rows, index.size, memo
@@ -0,0 +1,138 @@
+"""
+Measurement loaders: one query per source, returned as a Samples batch of
+parallel NumPy arrays — one element per (sample, HEG, stressor).
+
+  readings      ExposureReading, attributed to the HEG of every employee it
+                is linked to (Employee.heg_number; 'HEG-01: Drill Assistant'
+                counts as HEG-01). A reading shared by two employees of one
+                HEG counts once for that HEG.
+  lab-results   LabResult, one sample per reported agent (Mn, Si, PNOC TWA),
+                attributed to the HEG that lists its occupation and to the
+                operation's stressor named after the agent. Samples that fail
+                the 80 % run-time validity rule are left out, as in the DMPR.
+
+Non-detects: a value <= 0 is a non-detect; a negative value -x means "< x",
+i.e. a non-detect with detection limit x (see lognormal.py).
+Samples that cannot be attributed to a HEG and stressor are counted in
+`unassigned` and dropped.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from app import db
+from app.employees.models import Employee
+from app.schedules.models import HEG, EmployeeExposure, ExposureReading, LabResult, Stressor
+
+SOURCES = ('readings', 'lab-results')
+
+# LabResult column → stressor name prefix (case-insensitive)
+LAB_AGENTS = (
+    ('result_mn_twa',   'manganese'),
+    ('result_si_twa',   'silica'),
+    ('result_pnoc_twa', 'pnoc'),
+)
+MIN_VALIDITY_PCT = 80
+
+Samples = namedtuple('Samples', 'sample_id operation_id heg stressor_id date value unassigned')
+
+
+def heg_key(heg_number):
+    """HEG number an employee's heg_number refers to ('HEG-01: Drill Assistant' → 'HEG-01')."""
+    return (heg_number or '').split(':')[0].strip() or None
+
+
+def _batch(rows, unassigned):
+    sample_id, operation_id, heg, stressor_id, day, value = zip(*rows) if rows else ((),) * 6
+    return Samples(
+        sample_id=np.array(sample_id, dtype=np.int64),
+        operation_id=np.array([-1 if o is None else o for o in operation_id], dtype=np.int64),
+        heg=np.array(heg, dtype=object),
+        stressor_id=np.array(stressor_id, dtype=np.int64),
+        date=np.array([d if d is not None else 'NaT' for d in day], dtype='datetime64[D]'),
+        value=np.array(value, dtype=np.float64),
+        unassigned=unassigned,
+    )
+
+
+def reading_samples(operation_id=None):
+    """Exposure readings per HEG of the linked employees (operation_id None = all)."""
+    q = (
+        db.session.query(ExposureReading.id, ExposureReading.operation_id, Employee.heg_number,
+                         ExposureReading.stressor_id, ExposureReading.date, ExposureReading.measured_value)
+        .join(EmployeeExposure, EmployeeExposure.reading_id == ExposureReading.id)
+        .join(Employee, Employee.id == EmployeeExposure.employee_id)
+    )
+    if operation_id is not None:
+        q = q.filter(ExposureReading.operation_id == operation_id)
+
+    rows, seen, unassigned = [], set(), set()
+    for rid, op, heg_number, sid, day, value in q:
+        heg = heg_key(heg_number)
+        if heg is None:
+            unassigned.add(rid)
+        elif (rid, heg) not in seen:
+            seen.add((rid, heg))
+            rows.append((rid, op, heg, sid, day, value))
+    assigned = {r[0] for r in rows}
+    return _batch(rows, len(unassigned - assigned))
+
+
+def _lab_maps(operation_id):
+    """{(op, occupation): heg_number} and {(op, agent column): stressor id} for the operation(s)."""
+    hegs = db.session.query(HEG.operation_id, HEG.heg_number, HEG.occupations).order_by(HEG.heg_number)
+    stressors = db.session.query(Stressor.operation_id, Stressor.id, Stressor.name).order_by(Stressor.id)
+    if operation_id is not None:
+        hegs = hegs.filter(HEG.operation_id == operation_id)
+        stressors = stressors.filter(Stressor.operation_id == operation_id)
+
+    occupation_heg = {}
+    for op, heg_number, occupations in hegs:
+        for occupation in occupations or []:
+            if isinstance(occupation, str):
+                occupation_heg.setdefault((op, occupation.strip().lower()), heg_number)
+    agent_stressor = {}
+    for op, sid, name in stressors:
+        for column, prefix in LAB_AGENTS:
+            if (name or '').strip().lower().startswith(prefix):
+                agent_stressor.setdefault((op, column), sid)
+    return occupation_heg, agent_stressor
+
+
+def lab_samples(operation_id=None, date_from=None, date_to=None):
+    """
+    Lab result TWAs, one sample per agent, per HEG listing the occupation
+    (operation_id None = all), optionally sampled within date_from … date_to.
+    """
+    columns = [getattr(LabResult, column) for column, _prefix in LAB_AGENTS]
+    q = db.session.query(LabResult.id, LabResult.operation_id, LabResult.occupation, LabResult.sampling_date,
+                         LabResult.shift_duration, LabResult.sampling_duration, *columns)
+    if operation_id is not None:
+        q = q.filter(LabResult.operation_id == operation_id)
+    if date_from is not None:
+        q = q.filter(LabResult.sampling_date >= date_from)
+    if date_to is not None:
+        q = q.filter(LabResult.sampling_date <= date_to)
+    occupation_heg, agent_stressor = _lab_maps(operation_id)
+
+    rows, unassigned = [], 0
+    for rid, op, occupation, day, shift, run_minutes, *values in q:
+        if shift and run_minutes is not None and run_minutes / (shift * 60) * 100 < MIN_VALIDITY_PCT:
+            continue
+        heg = occupation_heg.get((op, (occupation or '').strip().lower()))
+        for (column, _prefix), value in zip(LAB_AGENTS, values):
+            if value is None:
+                continue
+            sid = agent_stressor.get((op, column))
+            if heg is None or sid is None:
+                unassigned += 1
+            else:
+                rows.append((rid, op, heg, sid, day, value))
+    return _batch(rows, unassigned)
+
+
+def load_samples(source, operation_id=None):
+    if source == 'lab-results':
+        return lab_samples(operation_id)
+    return reading_samples(operation_id)
@@ -7,3 +7,6 @@ from app.api import auth          # noqa: E402, F401
 from app.api import field_sheets  # noqa: E402, F401
 from app.api import operations    # noqa: E402, F401
 from app.api import lab_results   # noqa: E402, F401
+from app.api import dashboard     # noqa: E402, F401
+from app.api import analytics     # noqa: E402, F401
+from app.api import compression   # noqa: E402, F401
@@ -0,0 +1,112 @@
+"""
+Exposure analytics endpoints  —  /api/analytics/*
+Lognormal statistics and EN 689 compliance per HEG × stressor; see app/analytics.
+"""
+
+from collections import Counter
+from datetime import datetime
+
+from flask import request, jsonify
+from flask_login import login_required, current_user
+from app.api import api_bp
+from app import cache
+from app.analytics import en689
+from app.analytics.lognormal import ND_METHODS, heg_statistics
+from app.analytics.samples import SOURCES, lab_samples, load_samples
+from app.schedules.models import Stressor
+
+TABLES = ('exposure_reading', 'employee_exposure', 'employee', 'lab_result', 'heg', 'stressor')
+EN689_TABLES = ('lab_result', 'heg', 'stressor')
+
+
+def _op_id():
+    if current_user.role == 'super_admin':
+        return None
+    return current_user.operation_id
+
+
+def _parse_date(s):
+    if not s:
+        return None
+    try:
+        return datetime.strptime(s, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _stressors(ids):
+    return {s.id: s for s in Stressor.query.filter(Stressor.id.in_(ids))} if ids else {}
+
+
+@api_bp.route('/analytics/heg-statistics', methods=['GET'])
+@login_required
+def heg_statistics_endpoint():
+    """
+    GM, GSD, P95 and the 95 % UCL of the mean per HEG × stressor.
+    ?source=readings (default) | lab-results   ?nd=sqrt2 (default) | half
+    """
+    source = request.args.get('source', 'readings')
+    nd = request.args.get('nd', 'sqrt2')
+    if source not in SOURCES:
+        return jsonify({'error': f"source must be one of: {', '.join(SOURCES)}"}), 400
+    if nd not in ND_METHODS:
+        return jsonify({'error': f"nd must be one of: {', '.join(ND_METHODS)}"}), 400
+    op = _op_id()
+
+    def build():
+        samples = load_samples(source, op)
+        groups = heg_statistics(samples, nd)
+        stressors = _stressors({g['stressorId'] for g in groups})
+        for g in groups:
+            s = stressors.get(g['stressorId'])
+            g['stressor'] = s.name if s else None
+            g['oel'] = s.oel_value if s else None
+            g['unit'] = (s.oel_unit or '') if s else ''
+        return {'source': source, 'nd': nd, 'samples': int(samples.value.size),
+                'unassigned': samples.unassigned, 'groups': groups}
+
+    return cache.json_response(f"api.heg_statistics:{op or 'all'}:{source}:{nd}", TABLES, build)
+
+
+@api_bp.route('/analytics/en689', methods=['GET'])
+@login_required
+def en689_compliance():
+    """
+    EN 689 preliminary / statistical test per HEG × agent over the lab results.
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (sampling date window, e.g. a quarter)
+    ?nd=sqrt2 (default) | half
+    """
+    nd = request.args.get('nd', 'sqrt2')
+    if nd not in ND_METHODS:
+        return jsonify({'error': f"nd must be one of: {', '.join(ND_METHODS)}"}), 400
+    window = {}
+    for arg in ('from', 'to'):
+        if request.args.get(arg):
+            window[arg] = _parse_date(request.args[arg])
+            if window[arg] is None:
+                return jsonify({'error': f'{arg} must be a date (YYYY-MM-DD)'}), 400
+    op = _op_id()
+    bounds = tuple(window[arg].isoformat() if window.get(arg) else None for arg in ('from', 'to'))
+
+    def build():
+        samples = lab_samples(op, window.get('from'), window.get('to'))
+        stressors = _stressors(set(samples.stressor_id.tolist()))
+        oels = {sid: s.oel_value for sid, s in stressors.items()}
+        # Per-group results of the last run for this tenant and window: unchanged groups are reused
+        memo_key = f"en689-groups:{op or 'all'}:{nd}:{bounds[0] or ''}:{bounds[1] or ''}"
+        groups, recomputed, memo = en689.evaluate(samples, oels, nd, cache.recall(memo_key))
+        cache.keep(memo_key, memo)
+        for g in groups:
+            s = stressors.get(g['stressorId'])
+            g['stressor'] = s.name if s else None
+            g['oel'] = s.oel_value if s else None
+            g['unit'] = (s.oel_unit or '') if s else ''
+        verdicts = Counter(g['verdict'] for g in groups)
+        return {'from': bounds[0], 'to': bounds[1], 'nd': nd,
+                'samples': int(samples.value.size), 'unassigned': samples.unassigned,
+                'recomputed': recomputed,
+                'summary': {v: verdicts.get(v, 0) for v in en689.VERDICTS},
+                'groups': groups}
+
+    key = f"api.en689:{op or 'all'}:{nd}:{bounds[0] or ''}:{bounds[1] or ''}"
+    return cache.json_response(key, EN689_TABLES, build)
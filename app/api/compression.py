@@ -0,0 +1,167 @@
+"""
+Response compression for the JSON API  —  after_request on api_bp
+
+Responses are brotli or gzip encoded according to Accept-Encoding (highest
+q-value wins, brotli on a tie). Skipped when the body is under
+API_COMPRESSION_MIN_SIZE bytes, already encoded, a partial (206) or
+pass-through file response, or not a text/JSON type. Streamed responses are
+compressed chunk by chunk and flushed after each one so clients still
+receive data as it is produced.
+
+Levels are set by API_GZIP_LEVEL and API_BROTLI_QUALITY. CPU time spent
+compressing and bytes saved are tallied per endpoint:
+
+  GET /api/_debug/compression   super admin only
+"""
+
+import gzip
+import threading
+import time
+import zlib
+
+from flask import current_app, jsonify, request
+from flask_login import login_required, current_user
+from app.api import api_bp
+
+try:
+    import brotli
+except ImportError:   # optional — gzip only
+    brotli = None
+
+
+_COMPRESSIBLE = ('text/', 'application/javascript', 'application/xml')
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(endpoint, encoding, size_in, size_out, cpu):
+    with _stats_lock:
+        s = _stats.setdefault(endpoint, {
+            'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0, 'encodings': {},
+        })
+        s['responses']   += 1
+        s['bytes_in']    += size_in
+        s['bytes_out']   += size_out
+        s['cpu_seconds'] += cpu
+        s['encodings'][encoding] = s['encodings'].get(encoding, 0) + 1
+
+
+def stats():
+    """Per-endpoint compression totals, biggest savings first."""
+    with _stats_lock:
+        rows = [dict(s, endpoint=ep, encodings=dict(s['encodings'])) for ep, s in _stats.items()]
+    for row in rows:
+        saved = row['bytes_in'] - row['bytes_out']
+        row['bytes_saved']   = saved
+        row['ratio']         = round(row['bytes_out'] / row['bytes_in'], 3) if row['bytes_in'] else None
+        row['cpu_ms_per_mb_saved'] = round(row['cpu_seconds'] * 1000 / (saved / 1e6), 2) if saved > 0 else None
+        row['cpu_seconds']   = round(row['cpu_seconds'], 4)
+    return sorted(rows, key=lambda r: r['bytes_saved'], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _negotiate():
+    accepted = request.accept_encodings
+    offers = [enc for enc in ('br', 'gzip') if enc != 'br' or brotli]
+    best = max(offers, key=lambda enc: accepted[enc], default=None)   # max() keeps br on a tie
+    return best if best and accepted[best] else None
+
+
+def _compressor(encoding):
+    """(compress(chunk), flush(final)) for one response."""
+    cfg = current_app.config
+    if encoding == 'br':
+        c = brotli.Compressor(quality=cfg.get('API_BROTLI_QUALITY', 4))
+        return c.process, lambda final: c.finish() if final else c.flush()
+    c = zlib.compressobj(cfg.get('API_GZIP_LEVEL', 6), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return c.compress, lambda final: c.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _compressible(resp):
+    if not current_app.config.get('API_COMPRESSION', True):
+        return False
+    if resp.status_code < 200 or resp.status_code in (204, 206, 304):
+        return False
+    if resp.direct_passthrough or 'Content-Encoding' in resp.headers or 'Content-Range' in resp.headers:
+        return False
+    mimetype = resp.mimetype or ''
+    return mimetype.startswith(_COMPRESSIBLE) or mimetype.endswith('json')   # json, x-ndjson, problem+json
+
+
+def _stream(chunks, encoding, endpoint, compressor):
+    # Runs after the request context is gone — everything it needs is passed in
+    compress, flush = compressor
+    size_in = size_out = 0
+    cpu = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            started = time.thread_time()
+            out = compress(chunk) + flush(False)
+            cpu += time.thread_time() - started
+            size_in += len(chunk)
+            size_out += len(out)
+            yield out
+        started = time.thread_time()
+        out = flush(True)
+        cpu += time.thread_time() - started
+        size_out += len(out)
+        yield out
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        _record(endpoint, encoding, size_in, size_out, cpu)
+
+
+@api_bp.after_request
+def compress_response(resp):
+    if not _compressible(resp):
+        return resp
+    encoding = _negotiate()
+    resp.vary.add('Accept-Encoding')
+    if encoding is None:
+        return resp
+    endpoint = request.endpoint or request.path
+
+    # The encoded body gets its own ETag; revalidate against it here, since
+    # the view's make_conditional only saw the identity ETag
+    etag, weak = resp.get_etag()
+    if etag:
+        resp.set_etag(f'{etag}-{encoding}', weak=weak)
+        resp.make_conditional(request)
+        if resp.status_code == 304:
+            return resp
+
+    if resp.is_streamed:
+        resp.response = _stream(resp.response, encoding, endpoint, _compressor(encoding))
+        resp.headers.pop('Content-Length', None)
+    else:
+        body = resp.get_data()
+        if len(body) < current_app.config.get('API_COMPRESSION_MIN_SIZE', 1024):
+            return resp
+        started = time.thread_time()
+        if encoding == 'br':
+            data = brotli.compress(body, quality=current_app.config.get('API_BROTLI_QUALITY', 4))
+        else:
+            data = gzip.compress(body, compresslevel=current_app.config.get('API_GZIP_LEVEL', 6), mtime=0)
+        _record(endpoint, encoding, len(body), len(data), time.thread_time() - started)
+        resp.set_data(data)
+
+    resp.headers['Content-Encoding'] = encoding
+    return resp
+
+
+@api_bp.route('/_debug/compression', methods=['GET'])
+@login_required
+def compression_stats():
+    if current_user.role != 'super_admin':
+        return jsonify({'error': 'Super Admin access required'}), 403
+    return jsonify(stats())
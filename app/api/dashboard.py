@@ -0,0 +1,83 @@
+"""
+Dashboard summary  —  GET /api/dashboard
+Tenant KPIs for the React landing page, counted in the database instead of
+the browser:
+
+  medical       surveillance tests overdue / due within DUE_SOON_DAYS
+  sampling      sampling schedules overdue / due within DUE_SOON_DAYS
+  exceedances   exposure readings above their OEL, per stressor
+  employees     active employees
+  hegs          HEGs
+
+Four aggregate queries on a miss; the document is cached per tenant and day
+(app/cache.py), rebuilt as soon as one of the tables changes and at the
+latest after DASHBOARD_CACHE_TTL seconds.
+"""
+
+from datetime import date, timedelta
+from flask import current_app
+from flask_login import login_required, current_user
+from sqlalchemy import case, func, select
+from app.api import api_bp
+from app import db, cache
+from app.employees.models import Employee
+from app.schedules.models import (
+    DUE_SOON_DAYS, HEG, ExposureReading, MedicalRecord, SamplingSchedule,
+)
+
+TABLES = ('medical_record', 'sampling_schedule', 'exposure_reading', 'stressor', 'employee', 'heg')
+
+
+def _op_id():
+    if current_user.role == 'super_admin':
+        return None
+    return current_user.operation_id
+
+
+def _scoped(stmt, model, op):
+    if op is not None:
+        return stmt.where(model.operation_id == op)
+    return stmt
+
+
+def _due_counts(column, model, op, today):
+    """(overdue, due soon) for a next-due date column."""
+    soon = today + timedelta(days=DUE_SOON_DAYS)
+    stmt = select(
+        func.count(case((column < today, 1))),
+        func.count(case((column.between(today, soon), 1))),
+    )
+    overdue, due_soon = db.session.execute(_scoped(stmt.select_from(model), model, op)).one()
+    return {'overdue': overdue, 'dueSoon': due_soon}
+
+
+def _exceedances(op):
+    rows = [r for r in ExposureReading.exceedance_counts(op) if r['exceedances']]
+    return {'total': sum(r['exceedances'] for r in rows), 'byStressor': rows}
+
+
+def _headcounts(op):
+    employees = _scoped(select(func.count()).select_from(Employee), Employee, op) \
+        .where(Employee.is_active.isnot(False))
+    hegs = _scoped(select(func.count()).select_from(HEG), HEG, op)
+    return db.session.execute(select(employees.scalar_subquery(), hegs.scalar_subquery())).one()
+
+
+def summary(op, today):
+    active_employees, hegs = _headcounts(op)
+    return {
+        'asOf':        today.isoformat(),
+        'medical':     _due_counts(MedicalRecord.next_due, MedicalRecord, op, today),
+        'sampling':    _due_counts(SamplingSchedule.next_sample_due, SamplingSchedule, op, today),
+        'exceedances': _exceedances(op),
+        'employees':   {'active': active_employees},
+        'hegs':        hegs,
+    }
+
+
+@api_bp.route('/dashboard', methods=['GET'])
+@login_required
+def dashboard():
+    op, today = _op_id(), date.today()
+    return cache.json_response(f"api.dashboard:{op or 'all'}:{today}", TABLES, lambda: summary(op, today),
+                               ttl=current_app.config.get('DASHBOARD_CACHE_TTL'))
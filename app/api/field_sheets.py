@@ -1,22 +1,24 @@
 """
 Field Sheet endpoints  —  /api/field-sheets/*
 
-Scan files are stored in Cloudinary (persistent across Heroku dyno restarts).
-Falls back to local disk when CLOUDINARY_URL is not set (local dev without addon).
+Scan files go through the pipeline in app/scans: the upload (single-shot or
+resumable in chunks) is spooled to local disk and a background worker pushes
+it to the content-addressed storage backend — Cloudinary (persistent across
+Heroku dyno restarts) or local disk when CLOUDINARY_URL is not set (local dev
+without addon, tests).
 All queries are scoped to the current user's operation.
 """
 
-import os
 from datetime import datetime
-from flask import request, jsonify, redirect
+from flask import request, jsonify, redirect, current_app
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+from sqlalchemy import inspect
 from app.api import api_bp
 from app import db
 from app.schedules.models import FieldSheet
+from app.scans.models import ScanUpload, ScanUploadSession
+from app.scans.storage import get_storage, sheet_scan_key, PREVIEW_VARIANTS
+from app.scans import serving, sessions, worker
 
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'tif', 'tiff'}
@@ -49,59 +51,74 @@ def _owns(sheet):
     return None
 
 
-def _apply(sheet, data):
-    """Apply JSON fields onto a FieldSheet instance."""
-    for key in (
-        'mine_site', 'heg', 'sampling_quarter', 'survey_number',
-        'employee_name', 'coy_number', 'job_title', 'company_name',
-        'shift_sampled', 'purpose',
-        'wind_speed',
-        'noise_sources', 'noise_control_types', 'noise_demarcated', 'noise_hpd_provided',
-        'noise_dbadge_serial', 'noise_method', 'noise_pre_cal', 'noise_post_cal',
-        'noise_time_on', 'noise_time_off',
-        'air_contaminant', 'air_control_types', 'air_personal_sample', 'air_area_sample',
-        'air_pump_serial', 'air_filter_number', 'air_method',
-        'air_time_on', 'air_time_off',
-        'wearer_signature', 'sampled_by', 'sampled_designation', 'verified_by',
-        'activity_area', 'occupation_group', 'sampling_type',
-    ):
-        if key in data:
-            setattr(sheet, key, data[key] or None)
-
-    for key in (
-        'weather_wet', 'weather_dry', 'weather_hot', 'weather_warm', 'weather_cold',
-        'indoor_ac', 'indoor_lev', 'cabin_ac',
-        'brief_1', 'brief_2', 'brief_3', 'brief_4', 'brief_5', 'brief_6',
-    ):
-        if key in data:
-            setattr(sheet, key, bool(data[key]))
-
-    for key in ('noise_run_time', 'air_run_time'):
-        if key in data and data[key] not in (None, ''):
-            try:
-                setattr(sheet, key, int(data[key]))
-            except (ValueError, TypeError):
-                pass
-
-    for key in ('noise_laeq', 'air_pre_cal_flow', 'air_post_cal_flow',
-                'result_mn_twa', 'result_si_twa', 'result_pnoc_twa'):
-        if key in data and data[key] not in (None, ''):
-            try:
-                setattr(sheet, key, float(data[key]))
-            except (ValueError, TypeError):
-                pass
-        elif key in data and data[key] in (None, ''):
-            setattr(sheet, key, None)
-
-    for key in ('sampling_date', 'noise_cal_date', 'air_cal_date', 'sampled_date'):
-        if key in data:
-            setattr(sheet, key, _parse_date(data[key]))
-
-
-def _cloudinary_public_id(sheet_id, filename):
-    """Stable Cloudinary public_id for a field sheet scan."""
-    name = secure_filename(filename).rsplit('.', 1)[0]
-    return f"ohms/field_sheets/{sheet_id}/{name}"
+_SKIP = object()   # coercer result meaning "leave the column as it is"
+
+
+def _text(v):
+    return v or None
+
+
+def _int(v):
+    if v in (None, ''):
+        return _SKIP
+    try:
+        return int(v)
+    except (ValueError, TypeError):
+        return _SKIP
+
+
+def _float(v):
+    if v in (None, ''):
+        return None
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return _SKIP
+
+
+# Writable FieldSheet columns and how a JSON value is coerced onto each.
+_FIELDS = {}
+_FIELDS.update(dict.fromkeys((
+    'mine_site', 'heg', 'sampling_quarter', 'survey_number',
+    'employee_name', 'coy_number', 'job_title', 'company_name',
+    'shift_sampled', 'purpose',
+    'wind_speed',
+    'noise_sources', 'noise_control_types', 'noise_demarcated', 'noise_hpd_provided',
+    'noise_dbadge_serial', 'noise_method', 'noise_pre_cal', 'noise_post_cal',
+    'noise_time_on', 'noise_time_off',
+    'air_contaminant', 'air_control_types', 'air_personal_sample', 'air_area_sample',
+    'air_pump_serial', 'air_filter_number', 'air_method',
+    'air_time_on', 'air_time_off',
+    'wearer_signature', 'sampled_by', 'sampled_designation', 'verified_by',
+    'activity_area', 'occupation_group', 'sampling_type',
+), _text))
+_FIELDS.update(dict.fromkeys((
+    'weather_wet', 'weather_dry', 'weather_hot', 'weather_warm', 'weather_cold',
+    'indoor_ac', 'indoor_lev', 'cabin_ac',
+    'brief_1', 'brief_2', 'brief_3', 'brief_4', 'brief_5', 'brief_6',
+), bool))
+_FIELDS.update(dict.fromkeys(('noise_run_time', 'air_run_time'), _int))
+_FIELDS.update(dict.fromkeys((
+    'noise_laeq', 'air_pre_cal_flow', 'air_post_cal_flow',
+    'result_mn_twa', 'result_si_twa', 'result_pnoc_twa',
+), _float))
+_FIELDS.update(dict.fromkeys(('sampling_date', 'noise_cal_date', 'air_cal_date', 'sampled_date'), _parse_date))
+
+
+def _apply(sheet, data, merge=False):
+    """
+    Apply JSON fields onto a FieldSheet instance. Only keys present in `data`
+    are touched. With merge=True (RFC 7396) a null clears the column, where a
+    full PUT leaves null integer fields unchanged.
+    """
+    for key in data.keys() & _FIELDS.keys():
+        value = data[key]
+        if merge and value is None:
+            value = False if _FIELDS[key] is bool else None
+        else:
+            value = _FIELDS[key](value)
+        if value is not _SKIP:
+            setattr(sheet, key, value)
 
 
 @api_bp.route('/field-sheets', methods=['GET'])
@@ -149,6 +166,39 @@ def update_field_sheet(sid):
     return jsonify(sheet.to_dict())
 
 
+@api_bp.route('/field-sheets/<int:sid>', methods=['PATCH'])
+@login_required
+def patch_field_sheet(sid):
+    """
+    JSON merge-patch (RFC 7396) for autosave. Only the columns that actually
+    change are written; the response is 204 when nothing changed, otherwise
+    just the changed keys (plus `status` when it flips).
+    """
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    patch = request.get_json(silent=True)
+    if not isinstance(patch, dict):
+        return jsonify({'error': 'Body must be a JSON merge-patch object'}), 400
+    nested = sorted(k for k, v in patch.items() if k in _FIELDS and isinstance(v, (dict, list)))
+    if nested:
+        return jsonify({'error': f'Expected scalar values for: {", ".join(nested)}'}), 400
+
+    status = sheet.status
+    _apply(sheet, patch, merge=True)
+    state = inspect(sheet)
+    changed = [key for key in patch.keys() & _FIELDS.keys() if state.attrs[key].history.has_changes()]
+    if not changed:
+        return '', 204
+
+    if sheet.status != status:
+        changed.append('status')
+    body = sheet.to_dict()   # built before commit so it doesn't reload the row
+    db.session.commit()
+    return jsonify({key: body[key] for key in sorted(changed)})
+
+
 @api_bp.route('/field-sheets/<int:sid>', methods=['DELETE'])
 @login_required
 def delete_field_sheet(sid):
@@ -156,15 +206,16 @@ def delete_field_sheet(sid):
     err = _owns(sheet)
     if err:
         return err
-    if sheet.scan_filename:
-        try:
-            public_id = _cloudinary_public_id(sheet.id, sheet.scan_filename)
-            cloudinary.api.delete_resources([public_id], resource_type='raw')
-            cloudinary.api.delete_resources([public_id], resource_type='image')
-        except Exception:
-            pass
+    scan = worker.ScanRef.of(sheet)
+    for upload in ScanUpload.query.filter_by(field_sheet_id=sheet.id).all():
+        worker.discard_spool(upload)
+        db.session.delete(upload)
+    for session in ScanUploadSession.query.filter_by(field_sheet_id=sheet.id).all():
+        sessions.discard(session)
     db.session.delete(sheet)
     db.session.commit()
+    if scan:
+        worker.release_scan(get_storage(), scan)
     return jsonify({'deleted': sid})
 
 
@@ -183,30 +234,125 @@ def upload_scan(sid):
     if not _allowed(f.filename):
         return jsonify({'error': 'File type not allowed. Use PDF, PNG, JPG, or TIFF.'}), 400
 
-    ext = f.filename.rsplit('.', 1)[1].lower()
-    resource_type = 'raw' if ext == 'pdf' else 'image'
-    public_id = _cloudinary_public_id(sid, f.filename)
-
-    if sheet.scan_filename:
-        old_id = _cloudinary_public_id(sid, sheet.scan_filename)
-        old_ext = sheet.scan_filename.rsplit('.', 1)[-1].lower()
-        old_rt = 'raw' if old_ext == 'pdf' else 'image'
-        try:
-            cloudinary.api.delete_resources([old_id], resource_type=old_rt)
-        except Exception:
-            pass
-
-    result = cloudinary.uploader.upload(
-        f,
-        public_id=public_id,
-        resource_type=resource_type,
-        overwrite=True,
+    path, size, digest = worker.spool(f, current_app.config['SCAN_SPOOL_DIR'])
+    upload = ScanUpload(
+        field_sheet_id = sheet.id,
+        filename       = f.filename,
+        size           = size,
+        sha256         = digest,
+        spool_path     = path,
+        operation_id   = sheet.operation_id,
     )
-
-    sheet.scan_filename = f.filename
-    sheet.scan_url_external = result.get('secure_url')
+    db.session.add(upload)
     db.session.commit()
-    return jsonify(sheet.to_dict())
+    return _accepted(sheet, upload)
+
+
+def _accepted(sheet, upload):
+    """Queue the upload; answer 202 with the sheet and a status URL."""
+    worker.enqueue(upload.id)
+    db.session.refresh(sheet)
+    db.session.refresh(upload)
+    result = sheet.to_dict()
+    result['scan_upload'] = upload.to_dict()
+    resp = jsonify(result)
+    resp.status_code = 202
+    resp.headers['Location'] = upload.status_url
+    return resp
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/uploads/<int:uid>', methods=['GET'])
+@login_required
+def scan_upload_status(sid, uid):
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    upload = ScanUpload.query.filter_by(id=uid, field_sheet_id=sid).first_or_404()
+    return jsonify(upload.to_dict())
+
+
+# ── Resumable (chunked) scan uploads — see app/scans/sessions.py ─────────────
+
+def _session_or_404(sid, token):
+    return ScanUploadSession.query.filter_by(token=token, field_sheet_id=sid).first_or_404()
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/sessions', methods=['POST'])
+@login_required
+def open_scan_session(sid):
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    data = request.get_json(silent=True) or {}
+    filename = (data.get('filename') or '').strip()
+    if not filename or not _allowed(filename):
+        return jsonify({'error': 'File type not allowed. Use PDF, PNG, JPG, or TIFF.'}), 400
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size is required'}), 400
+    sha256 = (data.get('sha256') or '').lower() or None
+
+    # Identical bytes already stored for some sheet — metadata-only link.
+    if sha256 and worker.link_existing(sheet, sha256, filename):
+        result = sheet.to_dict()
+        result['linked'] = True
+        return jsonify(result)
+
+    try:
+        session = sessions.open_session(sheet, filename, size, sha256)
+    except sessions.ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+    result = session.to_dict()
+    result['chunk_size'] = current_app.config['SCAN_CHUNK_SIZE']
+    return jsonify(result), 201
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/sessions/<token>', methods=['GET'])
+@login_required
+def scan_session_status(sid, token):
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    return jsonify(_session_or_404(sid, token).to_dict())
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/sessions/<token>', methods=['PUT'])
+@login_required
+def upload_scan_chunk(sid, token):
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    session = ScanUploadSession.query.filter_by(token=token, field_sheet_id=sid) \
+        .with_for_update().first_or_404()
+    try:
+        first, last = sessions.parse_content_range(request.headers.get('Content-Range'), session.size)
+        sessions.append_chunk(session, first, last, request.stream)
+        if session.received < session.size:
+            return jsonify(session.to_dict())
+        upload = sessions.complete(session)
+    except sessions.ChunkError as e:
+        db.session.rollback()
+        body = {'error': str(e)}
+        if e.status == 409:
+            body['offset'] = session.received
+        return jsonify(body), e.status
+    return _accepted(sheet, upload)
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/sessions/<token>', methods=['DELETE'])
+@login_required
+def abort_scan_session(sid, token):
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    sessions.discard(_session_or_404(sid, token))
+    return jsonify({'deleted': token})
 
 
 @api_bp.route('/field-sheets/dmpr-data', methods=['GET'])
@@ -269,6 +415,61 @@ def download_scan(sid):
     err = _owns(sheet)
     if err:
         return err
-    if not sheet.scan_filename or not sheet.scan_url_external:
+    if not sheet.scan_filename:
+        return jsonify({'error': 'No scan uploaded'}), 404
+    if sheet.scan_url_external:
+        return redirect(sheet.scan_url_external)
+    storage = get_storage()
+    key = sheet_scan_key(sheet)
+    if storage.name != 'local' or not storage.exists(key, sheet.scan_filename):
         return jsonify({'error': 'No scan uploaded'}), 404
-    return redirect(sheet.scan_url_external)
+    return _signed_redirect(sheet, key, sheet.scan_filename, sheet.scan_filename)
+
+
+@api_bp.route('/field-sheets/<int:sid>/scan/<variant>', methods=['GET'])
+@login_required
+def download_scan_preview(sid, variant):
+    """Thumbnail / first-page preview rendered by the upload worker."""
+    sheet = FieldSheet.query.get_or_404(sid)
+    err = _owns(sheet)
+    if err:
+        return err
+    if variant not in PREVIEW_VARIANTS or not sheet.scan_filename or not sheet.scan_has_preview:
+        return jsonify({'error': 'No preview available'}), 404
+    external = sheet.scan_thumb_url_external if variant == 'thumb' else sheet.scan_preview_url_external
+    if external:
+        return redirect(external)
+    storage = get_storage()
+    key = f'{sheet_scan_key(sheet)}.{variant}'
+    if storage.name != 'local' or not storage.exists(key, f'{variant}.webp'):
+        return jsonify({'error': 'No preview available'}), 404
+    name = sheet.scan_filename.rsplit('.', 1)[0]
+    return _signed_redirect(sheet, key, f'{variant}.webp', f'{name}-{variant}.webp')
+
+
+def _signed_redirect(sheet, key, filename, download_name):
+    """
+    Redirect to a signed /api/scan-files URL. The redirect may be cached for
+    one URL window only when requested through the versioned URL from
+    FieldSheet.to_dict (?v=<scan hash>); the bare URL outlives a re-upload.
+    """
+    resp = redirect(serving.signed_url(key, filename, download_name))
+    version = sheet.scan_sha256 and sheet.scan_sha256[:16]
+    if version and request.args.get('v') == version:
+        resp.headers['Cache-Control'] = f"private, max-age={current_app.config['SCAN_URL_TTL']}"
+    else:
+        resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+
+@api_bp.route('/scan-files/<token>', methods=['GET'])
+def serve_scan_file(token):
+    """Signed, time-limited scan URL — the signature stands in for the session check."""
+    target = serving.verify(token)
+    if target is None:
+        return jsonify({'error': 'Link expired or invalid'}), 403
+    key, filename, download_name = target
+    storage = get_storage()
+    if storage.name != 'local' or not storage.exists(key, filename):
+        return jsonify({'error': 'Not found'}), 404
+    return serving.send_stored(storage, key, filename, download_name)
@@ -8,7 +8,8 @@ Super Admin bypasses operation filters and can see all data.
 from datetime import date, datetime
 from flask import request, jsonify
 from flask_login import login_required, current_user
-from app import db
+from sqlalchemy.orm import contains_eager, selectinload
+from app import db, cache
 from app.api import api_bp
 from app.schedules.models import (
     Stressor, HEG, SamplingSchedule,
@@ -16,6 +17,8 @@ from app.schedules.models import (
     MedicalRecord,
 )
 from app.employees.models import Employee
+from app.schedules.forecast import forecast, MAX_MONTHS
+from app.schedules.generate import generate_schedules
 
 
 # ── helpers ──────────────────────────────────────────────────────────────────
@@ -249,6 +252,42 @@ def delete_employee(eid):
     return jsonify({'deleted': eid})
 
 
+@api_bp.route('/employees/<int:eid>/exposure-profile', methods=['GET'])
+@login_required
+def employee_exposure_profile(eid):
+    """Per-stressor exposure summary and raw series for one employee."""
+    emp = Employee.query.get_or_404(eid)
+    err = _owns(emp)
+    if err:
+        return err
+
+    def build():
+        stressors = {}
+        for sid, name, category, rid, day, value, oel, unit, ratio, location in EmployeeExposure.profile_rows(eid):
+            entry = stressors.get(sid)
+            if entry is None:
+                entry = stressors[sid] = {'stressorId': sid, 'stressor': name, 'category': category,
+                                          'unit': unit or '', 'series': []}
+            entry['series'].append({'readingId': rid, 'date': day, 'value': value, 'oel': oel,
+                                    'ratio': ratio, 'location': location})
+        for entry in stressors.values():
+            values = [p['value'] for p in entry['series']]
+            entry.update({
+                'samples':      len(values),
+                'max':          max(values),
+                'mean':         sum(values) / len(values),
+                'exceedances':  sum(1 for p in entry['series'] if (p['ratio'] or 0) > 1),
+                'lastMeasured': entry['series'][-1]['date'],
+            })
+        return {
+            'employee':  {'id': emp.id, 'name': emp.name, 'jobTitle': emp.job_title,
+                          'department': emp.department, 'heg': emp.heg_number or ''},
+            'stressors': list(stressors.values()),
+        }
+
+    return cache.json_response(f'api.employee_exposure_profile:{eid}', ('stressor', cache.scope('employee', eid)), build)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # HEG GROUPS  (dropdown list for the UI)
 # ══════════════════════════════════════════════════════════════════════════════
@@ -277,7 +316,13 @@ def _heg_dict(h):
 @login_required
 def list_hegs():
     hegs = _scoped(HEG.query, HEG).order_by(HEG.heg_number).all()
-    return jsonify([_heg_dict(h) for h in hegs])
+    rows = [_heg_dict(h) for h in hegs]
+    if 'stats' in request.args.get('include', '').split(','):
+        stats = HEG.overview_stats(_op_id())
+        empty = {'stressors': 0, 'schedules': 0, 'overdue': 0, 'due': 0}
+        for row in rows:
+            row['stats'] = stats.get(row['id'], empty)
+    return jsonify(rows)
 
 
 @api_bp.route('/hegs', methods=['POST'])
@@ -363,11 +408,25 @@ def list_departments():
 @api_bp.route('/exposure-readings', methods=['GET'])
 @login_required
 def list_exposure_readings():
-    q = ExposureReading.query
+    q = ExposureReading.query.options(selectinload(ExposureReading.employee_exposures))
+    hazard_id = request.args.get('hazardId')
+    if hazard_id:
+        if not hazard_id.isdigit():
+            return _err('hazardId must be an integer')
+        q = q.filter(ExposureReading.stressor_id == int(hazard_id))
+    if request.args.get('exceeds', '').lower() in ('1', 'true', 'yes'):
+        q = q.filter(ExposureReading.exceeds())
     readings = _scoped(q, ExposureReading).order_by(ExposureReading.date.desc()).all()
     return jsonify([r.to_api_dict() for r in readings])
 
 
+@api_bp.route('/exposure-readings/exceedances', methods=['GET'])
+@login_required
+def exposure_reading_exceedances():
+    """Per-stressor reading and OEL exceedance counts."""
+    return jsonify(ExposureReading.exceedance_counts(_op_id()))
+
+
 @api_bp.route('/exposure-readings', methods=['POST'])
 @login_required
 def create_exposure_reading():
@@ -536,11 +595,41 @@ def delete_medical_record(mid):
 @api_bp.route('/sampling-schedules', methods=['GET'])
 @login_required
 def list_sampling_schedules():
-    q = SamplingSchedule.query.join(HEG).join(Stressor)
+    q = SamplingSchedule.query.join(HEG).join(Stressor).options(
+        contains_eager(SamplingSchedule.heg), contains_eager(SamplingSchedule.stressor),
+    )
     schedules = _scoped(q, SamplingSchedule).order_by(SamplingSchedule.next_sample_due).all()
     return jsonify([s.to_dict() for s in schedules])
 
 
+@api_bp.route('/sampling-schedules/forecast', methods=['GET'])
+@login_required
+def sampling_schedule_forecast():
+    """Projected sampling workload per week / month — see app/schedules/forecast.py."""
+    months = request.args.get('months', 12, type=int)
+    if not 1 <= months <= MAX_MONTHS:
+        return _err(f'months must be between 1 and {MAX_MONTHS}')
+    q = db.session.query(
+        SamplingSchedule.frequency, SamplingSchedule.next_sample_due, SamplingSchedule.last_sampled_date,
+        HEG.department, HEG.heg_number, Stressor.name,
+    ).join(HEG, SamplingSchedule.heg).join(Stressor, SamplingSchedule.stressor)
+    return jsonify(forecast(_scoped(q, SamplingSchedule).all(), months))
+
+
+@api_bp.route('/sampling-schedules/generate', methods=['POST'])
+@login_required
+def generate_sampling_schedules():
+    """Schedules for every unscheduled HEG–stressor link — see app/schedules/generate.py."""
+    data = request.get_json(silent=True) or {}
+    last_sampled = _parse_date(data.get('lastSampledDate'))
+    if data.get('lastSampledDate') and not last_sampled:
+        return _err('lastSampledDate must be YYYY-MM-DD')
+    op = _op_id()
+    if op is None and data.get('operationId'):
+        op = int(data['operationId'])
+    return jsonify(generate_schedules(op, last_sampled))
+
+
 @api_bp.route('/sampling-schedules', methods=['POST'])
 @login_required
 def create_sampling_schedule():
@@ -555,6 +644,8 @@ def create_sampling_schedule():
     err = _owns(heg)
     if err:
         return err
+    if SamplingSchedule.duplicate_exists(int(data['hegId']), int(data['stressorId']), data.get('occupation')):
+        return _err('A schedule for this HEG, stressor and occupation already exists')
 
     s = SamplingSchedule(
         heg_id            = int(data['hegId']),
@@ -588,6 +679,9 @@ def update_sampling_schedule(sid):
     if 'frequency'       in data: s.frequency         = data['frequency']
     if 'lastSampledDate' in data: s.last_sampled_date = _parse_date(data['lastSampledDate'])
     if 'remarks'         in data: s.remarks           = data['remarks'] or None
+    if SamplingSchedule.duplicate_exists(s.heg_id, s.stressor_id, s.occupation, exclude_id=s.id):
+        db.session.rollback()
+        return _err('A schedule for this HEG, stressor and occupation already exists')
     s.recalculate_next_due()
     db.session.commit()
     return jsonify(s.to_dict())
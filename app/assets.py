@@ -0,0 +1,324 @@
+"""
+Single-page app asset serving.
+
+The built React app lives in the top-level static/ directory (index.html plus
+Vite's fingerprinted bundles under assets/). At startup a manifest of every
+file is built once — content type, ETag, whether the name is fingerprinted —
+so requests never touch the filesystem to decide what to send.
+
+  * assets/<name>-<hash>.<ext>  Cache-Control: public, max-age=31536000, immutable
+  * index.html                  Cache-Control: no-cache (revalidated via ETag)
+  * anything else               Cache-Control: public, max-age=ASSET_MAX_AGE
+
+Compressible files are served brotli or gzip encoded according to
+Accept-Encoding. Variants written at build time by `python -m app.assets`
+(<file>.br / <file>.gz, maximum compression) are used when present;
+otherwise a variant is compressed in memory — at a faster brotli quality —
+the first time it is requested and kept for the life of the process.
+Brotli is optional — without the `brotli` package only gzip is offered
+(unless .br files were shipped with the build).
+
+Unknown paths fall back to index.html for client-side routing, except under
+assets/, where a missing bundle (e.g. a stale chunk after a deploy) is a 404
+rather than HTML served as JavaScript.
+
+index.html responses carry a Link header preloading the critical chunks — the
+entry module, its static imports and their CSS — taken from Vite's build
+manifest (.vite/manifest.json, needs `build.manifest: true`) or, without one,
+from the tags in index.html. Where the server exposes `wsgi.early_hints` the
+same links go out first as a 103 Early Hints response; CDNs such as
+Cloudflare can also derive Early Hints from the Link header on their own.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+import click
+from flask import current_app, request, abort
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:   # optional — gzip only
+    brotli = None
+
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+INDEX = 'index.html'
+
+_FINGERPRINT_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+_COMPRESSIBLE = {'.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.xml', '.wasm'}
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+_MIN_COMPRESS_SIZE = 1024
+_VITE_MANIFESTS = ('.vite/manifest.json', 'manifest.json')
+_TAG_RE = re.compile(r'<(script|link)\b([^>]*)>', re.I)
+_ATTR_RE = re.compile(r'([\w-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+
+class Asset:
+    """One servable file, described once at startup."""
+
+    def __init__(self, root, rel):
+        self.rel = rel
+        self.path = os.path.join(root, rel)
+        self.mimetype = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        self.immutable = bool(_FINGERPRINT_RE.match(rel))
+        st = os.stat(self.path)
+        self.size = st.st_size
+        if self.immutable:
+            self.etag = rel.rsplit('-', 1)[1].split('.', 1)[0]
+        else:
+            with open(self.path, 'rb') as f:
+                self.etag = hashlib.sha1(f.read()).hexdigest()[:16]
+        self.compressible = (
+            os.path.splitext(rel)[1].lower() in _COMPRESSIBLE and self.size >= _MIN_COMPRESS_SIZE
+        )
+        # Precompressed files shipped with the build
+        self.variants = {
+            enc: None for enc, suffix in _ENCODINGS if os.path.isfile(self.path + suffix)
+        }
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class AssetManifest:
+    def __init__(self, root, brotli_quality=9, gzip_level=9):
+        self.root = root
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self.assets = {}
+        self._lock = threading.Lock()
+        for dirpath, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]   # e.g. .vite/manifest.json
+            for name in files:
+                if name.startswith('.') or name.endswith(('.br', '.gz')):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, '/')
+                self.assets[rel] = Asset(root, rel)
+        self.preload = _link_header(_vite_preloads(root) or _html_preloads(root))
+
+    def get(self, rel):
+        return self.assets.get(rel)
+
+    def encodings(self, asset):
+        """Encodings this asset can be sent with, best first."""
+        if not asset.compressible:
+            return []
+        return [enc for enc, _ in _ENCODINGS if enc != 'br' or brotli or enc in asset.variants]
+
+    def variant(self, asset, encoding):
+        """Bytes of `asset` in `encoding`, loading or compressing them once."""
+        data = asset.variants.get(encoding)
+        if data is not None:
+            return data
+        with self._lock:
+            data = asset.variants.get(encoding)
+            if data is None:
+                suffix = dict(_ENCODINGS)[encoding]
+                if encoding in asset.variants:            # precompressed on disk
+                    with open(asset.path + suffix, 'rb') as f:
+                        data = f.read()
+                elif encoding == 'br':
+                    data = brotli.compress(asset.read(), quality=self.brotli_quality)
+                else:
+                    data = gzip.compress(asset.read(), compresslevel=self.gzip_level, mtime=0)
+                asset.variants[encoding] = data
+        return data
+
+
+# ---------------------------------------------------------------------------
+# Preload links for the critical chunks
+# ---------------------------------------------------------------------------
+
+def _vite_preloads(root):
+    """[(url, kind)] for the entry chunk, its static imports and their CSS."""
+    for name in _VITE_MANIFESTS:
+        path = os.path.join(root, name)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                chunks = json.load(f)
+            break
+    else:
+        return []
+
+    links, seen = [], set()
+
+    def visit(key):
+        if key in seen or key not in chunks:
+            return
+        seen.add(key)
+        chunk = chunks[key]
+        for css in chunk.get('css', []):
+            links.append(('/' + css, 'style'))
+        if chunk.get('file', '').endswith('.js'):
+            links.append(('/' + chunk['file'], 'module'))
+        for imported in chunk.get('imports', []):   # static imports only; dynamic ones stay lazy
+            visit(imported)
+
+    for key, chunk in chunks.items():
+        if chunk.get('isEntry'):
+            visit(key)
+    return list(dict.fromkeys(links))
+
+
+def _html_preloads(root):
+    """[(url, kind)] read from the module script and stylesheet tags of index.html."""
+    path = os.path.join(root, INDEX)
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    links = []
+    for tag, raw in _TAG_RE.findall(html):
+        attrs = {m[0].lower(): m[1] or m[2] or m[3] for m in _ATTR_RE.findall(raw)}
+        rel = attrs.get('rel', '').lower()
+        if tag.lower() == 'script' and attrs.get('type') == 'module' and attrs.get('src'):
+            links.append((attrs['src'], 'module'))
+        elif tag.lower() == 'link' and rel == 'modulepreload' and attrs.get('href'):
+            links.append((attrs['href'], 'module'))
+        elif tag.lower() == 'link' and rel == 'stylesheet' and attrs.get('href'):
+            links.append((attrs['href'], 'style'))
+    return [(url, kind) for url, kind in dict.fromkeys(links) if url.startswith('/') and not url.startswith('//')]
+
+
+def _link_header(links):
+    parts = []
+    for url, kind in links:
+        if kind == 'module':
+            parts.append(f'<{url}>; rel=modulepreload; crossorigin')
+        else:
+            parts.append(f'<{url}>; rel=preload; as=style; crossorigin')
+    return ', '.join(parts) or None
+
+
+def _send_early_hints(link):
+    """Emit 103 Early Hints if the WSGI server offers a way to (e.g. wsgi.early_hints)."""
+    early_hints = request.environ.get('wsgi.early_hints')
+    if callable(early_hints):
+        try:
+            early_hints([('Link', link)])
+        except Exception:
+            current_app.logger.debug('Early Hints not sent', exc_info=True)
+
+
+def _static_root():
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+
+
+def init_app(app):
+    app.extensions['assets'] = AssetManifest(
+        app.config.get('ASSET_ROOT') or _static_root(),
+        brotli_quality=app.config.get('ASSET_BROTLI_QUALITY', 9),
+        gzip_level=app.config.get('ASSET_GZIP_LEVEL', 9),
+    )
+    app.cli.add_command(assets_cli)
+
+
+def _negotiate(manifest, asset):
+    for encoding in manifest.encodings(asset):
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def _cache_control(asset):
+    if asset.rel == INDEX:
+        return 'no-cache'
+    if asset.immutable:
+        return IMMUTABLE
+    return f"public, max-age={current_app.config.get('ASSET_MAX_AGE', 3600)}"
+
+
+def serve(path):
+    """Response for an SPA path: the asset itself, or index.html for app routes."""
+    manifest = current_app.extensions['assets']
+    asset = manifest.get(path)
+    if asset is None:
+        if path.startswith('assets/'):
+            abort(404)
+        asset = manifest.get(INDEX)
+        if asset is None:
+            abort(404)
+
+    link = manifest.preload if asset.rel == INDEX else None
+    if link:
+        _send_early_hints(link)
+
+    encoding = _negotiate(manifest, asset)
+    data = manifest.variant(asset, encoding) if encoding else asset.read()
+    resp = current_app.response_class(data, mimetype=asset.mimetype)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    if asset.compressible:
+        resp.vary.add('Accept-Encoding')
+    resp.set_etag(f'{asset.etag}-{encoding}' if encoding else asset.etag)
+    resp.headers['Cache-Control'] = _cache_control(asset)
+    if link:
+        resp.headers['Link'] = link
+    return resp.make_conditional(request)
+
+
+# ---------------------------------------------------------------------------
+# CLI — python -m app.assets (build step), flask assets compress
+# ---------------------------------------------------------------------------
+
+def compress(manifest, brotli_quality=11):
+    """Write .gz (and .br, if brotli is installed) next to compressible assets; returns the count."""
+    manifest.brotli_quality = brotli_quality
+    written = 0
+    for asset in manifest.assets.values():
+        if not asset.compressible:
+            continue
+        for encoding, suffix in _ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            with open(asset.path + suffix, 'wb') as f:
+                f.write(manifest.variant(asset, encoding))
+            written += 1
+    return written
+
+
+_brotli_quality_option = click.option(
+    '--brotli-quality', default=11, show_default=True,
+    help='Slow but smallest; this runs once per build, not per process.')
+
+
+@click.command('compress')
+@click.option('--root', type=click.Path(exists=True, file_okay=False),
+              help='Built frontend directory (default: static/).')
+@_brotli_quality_option
+def main(root, brotli_quality):
+    """Precompress the built frontend without creating the app.
+
+    The build step runs this — create_app() would open the database, which
+    is usually not reachable (or not yet created) at build time.
+    """
+    manifest = AssetManifest(root or _static_root())
+    written = compress(manifest, brotli_quality)
+    click.echo(f'Wrote {written} precompressed file(s) under {manifest.root}')
+
+
+@click.group('assets')
+def assets_cli():
+    """Built frontend asset commands."""
+
+
+@assets_cli.command('compress')
+@_brotli_quality_option
+@with_appcontext
+def compress_command(brotli_quality):
+    """Write .gz (and .br, if brotli is installed) next to compressible assets."""
+    manifest = current_app.extensions['assets']
+    written = compress(manifest, brotli_quality)
+    click.echo(f'Wrote {written} precompressed file(s) under {manifest.root}')
+
+
+if __name__ == '__main__':
+    main()
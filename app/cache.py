@@ -0,0 +1,242 @@
+"""
+In-process response cache, invalidated by per-table data versions.
+
+Every table has a counter in `data_version`. A session records the tables it
+writes — unit-of-work flushes (including many-to-many association rows) and
+ORM bulk insert / update / delete statements alike — and once it commits,
+their counters are incremented in one short transaction of their own, so a
+writing transaction never holds a lock on the shared version rows. A rolled
+back transaction bumps nothing. A cached value remembers the versions of the
+tables it was built from; a lookup reads the current versions in one query
+and rebuilds on any mismatch. Each gunicorn worker keeps its own entries,
+but since the versions live in the database all workers agree on what is
+stale. (A process that dies between its commit and the bump leaves entries
+for those tables stale until their next write or ttl.)
+
+    return cache.json_response(f'heg-graph:{op}', ('heg', 'heg_stressor', 'stressor'), build)
+
+build() returns the JSON-serialisable document; the serialised body is what
+is cached, with an ETag of its hash (If-None-Match → 304). A session with
+uncommitted writes to the tables builds without the cache.
+`ttl` (seconds) additionally expires entries for data that depends on the
+date. Raw SQL writes must call bump() before the session commits.
+
+Finer-grained versions: a model may define a classmethod
+cache_scopes(objects, connection) returning extra version names, built with
+scope() (e.g. scope('employee', 42)), for the instances a flush is about to
+write. It runs before the flush, so it sees the old values and links of the
+rows too, and must not lazy-load: read the instance state or issue one query
+on `connection` for the whole batch. A cache entry stamped with the scope is
+only rebuilt when that record's data changes. Records share SCOPE_BUCKETS
+versions per kind, which keeps data_version bounded; a collision only costs
+a rebuild. Bulk statements only bump the table and must bump() the scopes
+they touch themselves.
+
+recall() / keep() hold values that are not tied to data versions, such as
+the previous run of an incremental computation, in the same bounded store.
+
+CACHE_ENABLED = False bypasses the cache (documents are built every time);
+CACHE_MAX_ENTRIES bounds each worker's store (least recently used goes).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from flask import current_app, request
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import db
+
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    name    = db.Column(db.String(64), primary_key=True)   # table name or scope
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+_TABLE = DataVersion.__table__
+
+SCOPE_BUCKETS = 512
+
+
+# ---------------------------------------------------------------------------
+# Versions
+# ---------------------------------------------------------------------------
+
+def versions(tables):
+    """Current version of each table or scope (0 if it has never been written)."""
+    rows = dict(db.session.execute(select(_TABLE.c.name, _TABLE.c.version).where(_TABLE.c.name.in_(tables))).all())
+    return tuple(rows.get(t, 0) for t in tables)
+
+
+def _increment(conn, tables):
+    dialect = conn.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(_TABLE).values([{'name': t, 'version': 1} for t in tables])
+        conn.execute(stmt.on_conflict_do_update(index_elements=[_TABLE.c.name],
+                                                set_={'version': _TABLE.c.version + 1}))
+        return
+    for t in tables:
+        if not conn.execute(update(_TABLE).where(_TABLE.c.name == t).values(version=_TABLE.c.version + 1)).rowcount:
+            conn.execute(_TABLE.insert().values(name=t, version=1))
+
+
+def scope(kind, key):
+    """Version name covering one record, e.g. scope('employee', 42) → 'employee:42'."""
+    return f'{kind}:{key % SCOPE_BUCKETS}'
+
+
+def _pending(session):
+    """Tables and scopes written by the session's current transaction."""
+    return session.info.setdefault('cache_pending', set())
+
+
+def bump(tables, session=None):
+    """Increment the versions of `tables` once the session's current transaction commits."""
+    _pending(session or db.session).update(set(tables) - {_TABLE.name})
+
+
+def _changed(session):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        yield obj
+
+
+def _changed_tables(session):
+    tables = set()
+    for obj in _changed(session):
+        state = inspect(obj)
+        tables.update(t.name for t in state.mapper.tables)
+        for rel in state.mapper.relationships:
+            if rel.secondary is not None and state.attrs[rel.key].history.has_changes():
+                tables.add(rel.secondary.name)
+    return tables
+
+
+def _before_flush(session, flush_context, instances):
+    by_class = {}
+    for obj in _changed(session):
+        if hasattr(obj, 'cache_scopes'):
+            by_class.setdefault(type(obj), []).append(obj)
+    for cls, objects in by_class.items():
+        bump(cls.cache_scopes(objects, session.connection()), session)
+
+
+def _after_flush(session, flush_context):
+    bump(_changed_tables(session), session)
+
+
+def _do_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None):
+            bump([table.name], state.session)
+
+
+def _after_commit(session):
+    tables = sorted(session.info.pop('cache_pending', ()))
+    if tables:
+        # Own short transaction, rows in a fixed order: the version row locks last only as long as the bump
+        with session.get_bind().begin() as conn:
+            _increment(conn, tables)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:     # a rolled-back savepoint still leaves the outer writes
+        session.info.pop('cache_pending', None)
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class _Store:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, stamp):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != stamp or (entry[1] is not None and entry[1] < time.monotonic()):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, stamp, value, ttl):
+        with self._lock:
+            self.entries[key] = (stamp, time.monotonic() + ttl if ttl else None, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+def _store():
+    return current_app.extensions['cache']
+
+
+def get_or_build(key, tables, build, ttl=None):
+    """Cached build() for `key`, rebuilt when any of `tables` has changed."""
+    if not current_app.config.get('CACHE_ENABLED', True) or not _pending(db.session).isdisjoint(tables):
+        return build()
+    stamp = versions(tables)
+    value = _store().get(key, stamp)
+    if value is None:
+        value = build()
+        _store().put(key, stamp, value, ttl)
+    return value
+
+
+def recall(key):
+    """A value stored with keep(), or None. Such values share the LRU store but no data versions."""
+    return _store().get(key, ())
+
+
+def keep(key, value):
+    """Store state worth reusing across rebuilds (e.g. per-group results) under `key`."""
+    _store().put(key, (), value, None)
+
+
+def json_response(key, tables, build, ttl=None):
+    """A JSON response whose serialised body is cached; honours If-None-Match."""
+    def serialise():
+        body = current_app.json.dumps(build()).encode('utf-8')
+        return body, hashlib.sha1(body).hexdigest()[:16]
+
+    body, etag = get_or_build(key, tables, serialise, ttl)
+    resp = current_app.response_class(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp.make_conditional(request)
+
+
+def stats():
+    store = _store()
+    return {'entries': len(store.entries), 'capacity': store.capacity, 'hits': store.hits, 'misses': store.misses}
+
+
+def init_app(app):
+    app.extensions['cache'] = _Store(app.config.get('CACHE_MAX_ENTRIES', 1024))
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _do_orm_execute)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_soft_rollback', _after_soft_rollback)
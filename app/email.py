@@ -2,7 +2,10 @@ import os
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
+from app.telemetry.metrics import time_email
 
+
+@time_email('invite')
 def send_invite_email(to_email, username, invite_url, operation_name=None):
     op_line = f"\nOperation: {operation_name}\n" if operation_name else ""
     body = f"""Hi {username},
@@ -28,6 +31,7 @@ This link expires in 72 hours. If you did not expect this invitation, you can sa
     client.send(message)
 
 
+@time_email('alert')
 def send_alert_email(to_email, username, operation_name,
                      medical_overdue, medical_due_soon,
                      sampling_overdue, sampling_due_soon, today):
@@ -85,6 +89,7 @@ def send_alert_email(to_email, username, operation_name,
     SendGridAPIClient(os.environ.get('SENDGRID_API_KEY')).send(message)
 
 
+@time_email('reset')
 def send_reset_email(to_email, username, reset_url):
     body = f"""Hi {username},
 
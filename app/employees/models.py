@@ -1,5 +1,6 @@
-from app import db
+from app import db, cache
 from datetime import date
+from sqlalchemy import inspect
 
 # Association table: direct employee ↔ stressor assignments
 employee_stressor = db.Table(
@@ -25,6 +26,10 @@ class Employee(db.Model):
     is_active        = db.Column(db.Boolean,     default=True)
     operation_id     = db.Column(db.Integer,     db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_employee_operation_id_name', 'operation_id', 'name'),
+    )
+
     # Direct hazard assignments (used by the React frontend)
     stressors = db.relationship('Stressor', secondary=employee_stressor, lazy='subquery',
                                 backref=db.backref('employees', lazy=True))
@@ -39,6 +44,11 @@ class Employee(db.Model):
             'hazardIds':  [s.id for s in self.stressors],
         }
 
+    @classmethod
+    def cache_scopes(cls, employees, connection):
+        """Data versions of these employees' exposure profiles (app/cache.py)."""
+        return {cache.scope('employee', inspect(e).identity[0]) for e in employees if inspect(e).identity}
+
     def __repr__(self):
         return f'<Employee {self.name}>'
 
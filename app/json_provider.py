@@ -0,0 +1,88 @@
+"""
+JSON providers for jsonify / request.get_json.
+
+Models hand date and datetime objects straight to jsonify; both providers
+render them as ISO 8601 ('2026-03-02', '2026-03-02T08:15:00'), which is what
+the React app parses. Flask's own default would send dates as HTTP dates.
+
+  IsoJSONProvider    stdlib json — always available
+  OrjsonProvider     orjson — several times faster on large lists
+
+JSON_PROVIDER picks one: 'auto' (orjson when installed, the default),
+'orjson' or 'default'. Output is equivalent either way; orjson writes UTF-8
+instead of \\u escapes.
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:   # optional — stdlib json fallback
+    orjson = None
+
+
+def _default(o):
+    """Types neither json nor orjson handle the way the API wants."""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with ISO 8601 dates."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; date, datetime and UUID are native to orjson."""
+
+    mimetype = 'application/json'
+    sort_keys = False
+
+    def _option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._option()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._option() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def provider_class(name):
+    """Provider class for a JSON_PROVIDER setting."""
+    if name == 'orjson':
+        if orjson is None:
+            raise RuntimeError("JSON_PROVIDER='orjson' but orjson is not installed")
+        return OrjsonProvider
+    if name == 'auto' and orjson is not None:
+        return OrjsonProvider
+    return IsoJSONProvider
+
+
+def init_app(app):
+    app.json = provider_class(app.config.get('JSON_PROVIDER', 'auto'))(app)
@@ -28,8 +28,8 @@ class Operation(db.Model):
             'code':           self.code,
             'location':       self.location or '',
             'status':         self.status,
-            'created_at':     self.created_at.isoformat() if self.created_at else None,
-            'updated_at':     self.updated_at.isoformat() if self.updated_at else None,
+            'created_at':     self.created_at,
+            'updated_at':     self.updated_at,
         }
 
 
@@ -40,7 +40,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin      = db.Column(db.Boolean, default=False)
     role          = db.Column(db.String(20), nullable=False, default='viewer')
-    operation_id  = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
+    operation_id  = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True, index=True)
     created_at    = db.Column(db.DateTime, default=datetime.utcnow)
 
     @property
@@ -0,0 +1,10 @@
+"""
+Field sheet scan pipeline
+=========================
+storage  — pluggable backends (local disk, Cloudinary), content-addressed keys
+worker   — spools uploads to disk and pushes them to storage in the background
+sessions — resumable chunked uploads (Content-Range), expiring when idle
+serving  — signed, cacheable (ETag / Range / X-Sendfile) delivery of local scans
+images   — normalizes scans (TIFF → WebP/PDF, resolution cap) and renders previews
+models   — ScanUpload (status of a queued upload), ScanUploadSession
+"""
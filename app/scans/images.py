@@ -0,0 +1,122 @@
+"""
+Scan normalization and preview generation (runs in the upload worker).
+
+  normalize()     — single-page TIFFs become compressed WebP/PNG, multi-page
+                    TIFFs become a PDF, and oversized images are downscaled to
+                    SCAN_MAX_DIMENSION. PDFs are stored untouched.
+  make_previews() — small thumbnail + first-page preview (WebP) rendered from
+                    the first page; PDFs need pypdfium2, otherwise no preview.
+"""
+
+import os
+import tempfile
+from PIL import Image, ImageOps
+
+from app.scans.storage import file_ext
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:   # previews for PDFs are skipped without it
+    pdfium = None
+
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'tif', 'tiff'}
+
+_SAVE_OPTIONS = {
+    'webp': {'quality': 82, 'method': 4},
+    'png':  {'optimize': True},
+    'jpeg': {'quality': 85, 'optimize': True},
+}
+
+
+def _tmp_path(directory, ext):
+    fd, path = tempfile.mkstemp(dir=directory, suffix=f'.{ext}')
+    os.close(fd)
+    return path
+
+
+def _flatten(img):
+    """Scans arrive as 1-bit, CMYK, palette, 16-bit… — bring them to L/RGB(A)."""
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('1', 'I;16', 'I;16B', 'I', 'F'):
+        return img.convert('L')
+    if img.mode not in ('L', 'RGB', 'RGBA'):
+        return img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+    return img
+
+
+def _save(img, path, fmt):
+    if fmt == 'jpeg' and img.mode == 'RGBA':
+        img = img.convert('RGB')
+    img.save(path, fmt.upper(), **_SAVE_OPTIONS.get(fmt, {}))
+
+
+def normalize(src_path, filename, max_dim, fmt='webp'):
+    """
+    Return (path, filename) of the file that should be stored.
+    When nothing needs to change the inputs are returned as-is; otherwise a
+    new temp file is written next to `src_path` (caller removes it).
+    """
+    ext = file_ext(filename)
+    if ext not in IMAGE_EXTENSIONS:
+        return src_path, filename
+
+    base = filename.rsplit('.', 1)[0]
+    directory = os.path.dirname(src_path)
+    with Image.open(src_path) as img:
+        frames = getattr(img, 'n_frames', 1)
+        is_tiff = ext in ('tif', 'tiff')
+
+        if is_tiff and frames > 1:
+            pages = []
+            for i in range(frames):
+                img.seek(i)
+                page = _flatten(img.copy())
+                page.thumbnail((max_dim, max_dim))
+                pages.append(page.convert('RGB'))
+            out = _tmp_path(directory, 'pdf')
+            pages[0].save(out, 'PDF', save_all=True, append_images=pages[1:], resolution=150)
+            return out, f'{base}.pdf'
+
+        if not is_tiff and max(img.size) <= max_dim:
+            return src_path, filename
+
+        page = _flatten(img)
+        page.thumbnail((max_dim, max_dim))
+        out_fmt = fmt if is_tiff else ('jpeg' if ext in ('jpg', 'jpeg') else ext)
+        out_ext = 'jpg' if out_fmt == 'jpeg' else out_fmt
+        out = _tmp_path(directory, out_ext)
+        _save(page, out, out_fmt)
+        return out, f'{base}.{out_ext}'
+
+
+def _first_page(src_path, filename, size):
+    if file_ext(filename) == 'pdf':
+        if pdfium is None:
+            return None
+        pdf = pdfium.PdfDocument(src_path)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            scale = size / max(width, height, 1)
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+    img = Image.open(src_path)
+    img.draft('RGB', (size, size))   # cheap JPEG decode at reduced scale
+    return _flatten(img)
+
+
+def make_previews(src_path, filename, thumb_size, preview_size):
+    """Return {'thumb': path, 'preview': path} (WebP temp files), or {} if none can be made."""
+    page = _first_page(src_path, filename, preview_size)
+    if page is None:
+        return {}
+    directory = os.path.dirname(src_path)
+    result = {}
+    for variant, size in (('preview', preview_size), ('thumb', thumb_size)):
+        page.thumbnail((size, size))
+        path = _tmp_path(directory, 'webp')
+        _save(page, path, 'webp')
+        result[variant] = path
+    return result
@@ -0,0 +1,85 @@
+"""
+Scan pipeline models
+====================
+Models: ScanUpload, ScanUploadSession
+"""
+
+from datetime import datetime
+from app import db
+
+
+# ---------------------------------------------------------------------------
+# ScanUpload  (one queued / processed scan upload)
+# ---------------------------------------------------------------------------
+
+class ScanUpload(db.Model):
+    __tablename__ = 'scan_upload'
+
+    id             = db.Column(db.Integer, primary_key=True)
+    field_sheet_id = db.Column(db.Integer, db.ForeignKey('field_sheet.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename       = db.Column(db.String(255), nullable=False)
+    size           = db.Column(db.Integer,     nullable=True)            # bytes
+    sha256         = db.Column(db.String(64),  nullable=True)
+    spool_path     = db.Column(db.Text,        nullable=True)            # local file awaiting upload
+    status         = db.Column(db.String(20),  nullable=False, default='queued')  # queued, processing, done, failed
+    error          = db.Column(db.Text,        nullable=True)
+    created_at     = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at    = db.Column(db.DateTime, nullable=True)
+    operation_id   = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
+
+    @property
+    def status_url(self):
+        return f'/api/field-sheets/{self.field_sheet_id}/scan/uploads/{self.id}'
+
+    def to_dict(self):
+        return {
+            'id':             self.id,
+            'field_sheet_id': self.field_sheet_id,
+            'filename':       self.filename,
+            'size':           self.size,
+            'status':         self.status,
+            'error':          self.error,
+            'created_at':     self.created_at,
+            'finished_at':    self.finished_at,
+            'status_url':     self.status_url,
+        }
+
+    def __repr__(self):
+        return f"<ScanUpload sheet:{self.field_sheet_id} {self.filename} status:{self.status}>"
+
+
+# ---------------------------------------------------------------------------
+# ScanUploadSession  (resumable chunked upload in progress)
+# ---------------------------------------------------------------------------
+
+class ScanUploadSession(db.Model):
+    __tablename__ = 'scan_upload_session'
+
+    id             = db.Column(db.Integer, primary_key=True)
+    token          = db.Column(db.String(64),  unique=True, nullable=False)
+    field_sheet_id = db.Column(db.Integer, db.ForeignKey('field_sheet.id', ondelete='CASCADE'), nullable=False, index=True)
+    filename       = db.Column(db.String(255), nullable=False)
+    size           = db.Column(db.BigInteger,  nullable=False)           # declared total bytes
+    sha256         = db.Column(db.String(64),  nullable=True)            # declared by the client, verified at the end
+    received       = db.Column(db.BigInteger,  nullable=False, default=0)
+    path           = db.Column(db.Text,        nullable=False)           # partial file in the spool dir
+    created_at     = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at     = db.Column(db.DateTime, nullable=False, index=True)
+    operation_id   = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
+
+    @property
+    def upload_url(self):
+        return f'/api/field-sheets/{self.field_sheet_id}/scan/sessions/{self.token}'
+
+    def to_dict(self):
+        return {
+            'token':      self.token,
+            'filename':   self.filename,
+            'size':       self.size,
+            'offset':     self.received,
+            'expires_at': self.expires_at,
+            'upload_url': self.upload_url,
+        }
+
+    def __repr__(self):
+        return f"<ScanUploadSession sheet:{self.field_sheet_id} {self.received}/{self.size}>"
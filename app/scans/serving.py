@@ -0,0 +1,104 @@
+"""
+Signed, cacheable delivery of scans held by the local storage backend.
+
+The authenticated /api/field-sheets/<id>/scan routes redirect to
+/api/scan-files/<token>; the token is an HMAC-signed description of the
+stored object with an expiry rounded up to a SCAN_URL_TTL window, so repeat
+requests within a window get the same URL and hit the browser cache.
+
+Responses carry a strong ETag, support Range requests (partial fetches of
+large PDFs) and are marked immutable for content-addressed keys. With
+SCAN_SENDFILE set to 'x-sendfile' (Apache / lighttpd) or 'x-accel-redirect'
+(nginx, internal location SCAN_ACCEL_REDIRECT_PREFIX → SCAN_STORAGE_DIR)
+the file transfer itself, including Range, is left to the web server.
+"""
+
+import mimetypes
+import os
+import time
+import unicodedata
+from urllib.parse import quote
+
+from flask import current_app, request, send_file
+from itsdangerous import URLSafeSerializer, BadSignature
+
+from app.scans.storage import is_content_addressed
+
+IMMUTABLE = 'private, max-age=31536000, immutable'
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='scan-file')
+
+
+def signed_url(key, filename, download_name):
+    """Signed URL for a stored object, valid for at least one SCAN_URL_TTL window."""
+    window = current_app.config['SCAN_URL_TTL']
+    expires = (int(time.time()) // window + 2) * window
+    token = _serializer().dumps({'k': key, 'f': filename, 'n': download_name, 'e': expires})
+    return f'/api/scan-files/{token}'
+
+
+def verify(token):
+    """Return (key, filename, download_name), or None if the token is forged or expired."""
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        return None
+    if data.get('e', 0) < time.time():
+        return None
+    return data['k'], data['f'], data['n']
+
+
+def _etag(key, path):
+    if is_content_addressed(key):
+        return key.rsplit('/', 1)[-1]   # "<sha256>" or "<sha256>.<variant>"
+    st = os.stat(path)
+    return f'{st.st_size:x}-{st.st_mtime_ns:x}'
+
+
+def _clean_name(download_name):
+    """The uploaded filename without control characters (CR/LF would split the header)."""
+    return ''.join(c for c in download_name if unicodedata.category(c)[0] != 'C') or 'scan'
+
+
+def _content_disposition(download_name):
+    """Header parameters as flask.send_file builds them: RFC 5987 filename* with an ASCII fallback."""
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': "UTF-8''" + quote(download_name, safe="!#$&+^`|~")}
+    return {'filename': download_name}
+
+
+def send_stored(storage, key, filename, download_name):
+    download_name = _clean_name(download_name)
+    path = storage.path(key, filename)
+    etag = _etag(key, path)
+    cache_control = IMMUTABLE if is_content_addressed(key) else 'private, no-cache'
+    mode = current_app.config.get('SCAN_SENDFILE')
+
+    if not mode:
+        resp = send_file(path, download_name=download_name, etag=etag, conditional=True)
+        resp.headers['Cache-Control'] = cache_control
+        return resp
+
+    resp = current_app.response_class(
+        mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream',
+    )
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = cache_control
+    resp.headers['Accept-Ranges'] = 'bytes'
+    resp.headers.set('Content-Disposition', 'inline', **_content_disposition(download_name))
+    if etag in request.if_none_match:
+        resp.status_code = 304
+        return resp
+    if mode == 'x-accel-redirect':
+        rel = os.path.relpath(path, storage.root).replace(os.sep, '/')
+        resp.headers['X-Accel-Redirect'] = current_app.config['SCAN_ACCEL_REDIRECT_PREFIX'].rstrip('/') + '/' + rel
+    elif mode == 'x-sendfile':
+        resp.headers['X-Sendfile'] = path
+    else:
+        raise RuntimeError(f'Unknown SCAN_SENDFILE mode: {mode}')
+    return resp
@@ -0,0 +1,158 @@
+"""
+Resumable chunked scan uploads.
+
+  POST   /api/field-sheets/<id>/scan/sessions           {filename, size, sha256?}
+  GET    /api/field-sheets/<id>/scan/sessions/<token>   → offset to resume from
+  PUT    /api/field-sheets/<id>/scan/sessions/<token>   one chunk,
+                                                        Content-Range: bytes <first>-<last>/<size>
+  DELETE /api/field-sheets/<id>/scan/sessions/<token>   abort
+
+Chunks are appended to a partial file under SCAN_SPOOL_DIR/sessions. When the
+last byte arrives the file is hashed and handed to the upload worker exactly
+like a single-shot upload. Sessions idle for longer than SCAN_SESSION_TTL
+seconds expire together with their partial file: whenever a session is
+opened, in the daily alerts job (alerts_job.py) and via `flask scans expire`.
+"""
+
+import os
+import re
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.scans.models import ScanUpload, ScanUploadSession
+from app.scans.worker import sha256_file
+
+
+_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class ChunkError(Exception):
+    """Rejected chunk; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _sessions_dir():
+    path = os.path.join(current_app.config['SCAN_SPOOL_DIR'], 'sessions')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _expiry():
+    return datetime.utcnow() + timedelta(seconds=current_app.config['SCAN_SESSION_TTL'])
+
+
+def open_session(sheet, filename, size, sha256=None):
+    if size <= 0:
+        raise ChunkError('size must be a positive number of bytes')
+    if size > current_app.config['SCAN_MAX_UPLOAD_SIZE']:
+        raise ChunkError('File is too large', 413)
+    expire_sessions()
+    token = secrets.token_urlsafe(24)
+    path = os.path.join(_sessions_dir(), f'{token}.part')
+    open(path, 'wb').close()
+    session = ScanUploadSession(
+        token          = token,
+        field_sheet_id = sheet.id,
+        filename       = filename,
+        size           = size,
+        sha256         = sha256.lower() if sha256 else None,
+        received       = 0,
+        path           = path,
+        expires_at     = _expiry(),
+        operation_id   = sheet.operation_id,
+    )
+    db.session.add(session)
+    db.session.commit()
+    return session
+
+
+def parse_content_range(header, size):
+    """Return (first, last) byte positions from a Content-Range header."""
+    m = _RANGE_RE.match((header or '').strip())
+    if not m:
+        raise ChunkError('Content-Range: bytes <first>-<last>/<size> is required')
+    first, last, total = int(m.group(1)), int(m.group(2)), m.group(3)
+    if last < first or last >= size or (total != '*' and int(total) != size):
+        raise ChunkError('Content-Range does not match the session', 416)
+    return first, last
+
+
+def append_chunk(session, first, last, stream):
+    """
+    Append bytes first..last to the partial file. A chunk that starts anywhere
+    other than the current offset is rejected with 409 so the client can
+    re-sync from GET; a retried chunk that was already stored is accepted.
+    """
+    if last < session.received:
+        return session.received
+    if first != session.received:
+        raise ChunkError(f'Expected a chunk starting at byte {session.received}', 409)
+
+    expected = last - first + 1
+    written = 0
+    with open(session.path, 'r+b') as out:
+        out.truncate(first)   # drop any tail left by an interrupted write
+        out.seek(first)
+        for block in iter(lambda: stream.read(min(1024 * 1024, expected - written)), b''):
+            out.write(block)
+            written += len(block)
+            if written >= expected:
+                break
+    if written != expected:
+        raise ChunkError('Chunk body is shorter than its Content-Range')
+
+    session.received   = last + 1
+    session.expires_at = _expiry()
+    db.session.commit()
+    return session.received
+
+
+def complete(session):
+    """Turn a fully received session into a queued ScanUpload."""
+    digest = sha256_file(session.path)
+    if session.sha256 and digest != session.sha256:
+        discard(session)
+        raise ChunkError('Checksum mismatch — the upload was corrupted, start again', 422)
+
+    upload = ScanUpload(
+        field_sheet_id = session.field_sheet_id,
+        filename       = session.filename,
+        size           = session.size,
+        sha256         = digest,
+        spool_path     = session.path,
+        operation_id   = session.operation_id,
+    )
+    db.session.add(upload)
+    db.session.delete(session)
+    db.session.commit()
+    return upload
+
+
+def discard(session):
+    try:
+        os.remove(session.path)
+    except OSError:
+        pass
+    db.session.delete(session)
+    db.session.commit()
+
+
+def expire_sessions(now=None):
+    """Drop sessions (and partial files) that have been idle past their TTL."""
+    now = now or datetime.utcnow()
+    stale = ScanUploadSession.query.filter(ScanUploadSession.expires_at < now).all()
+    for session in stale:
+        try:
+            os.remove(session.path)
+        except OSError:
+            pass
+        db.session.delete(session)
+    if stale:
+        db.session.commit()
+    return len(stale)
@@ -0,0 +1,129 @@
+"""
+Scan storage backends.
+
+The backend is picked by SCAN_STORAGE:
+  cloudinary — persistent across Heroku dyno restarts (needs CLOUDINARY_URL)
+  local      — files under SCAN_STORAGE_DIR; used for local dev and tests
+
+Keys look like "ohms/scans/<sha256[:2]>/<sha256>" (no extension) — scans are
+content-addressed; scans uploaded before that still live under
+"ohms/field_sheets/<sheet id>/<name>".  The filename is passed alongside so
+each backend can pick a resource type / file extension.  Previews live next
+to the scan as "<key>.thumb" and "<key>.preview" (WebP).
+"""
+
+import os
+import shutil
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+
+PREVIEW_VARIANTS = ('thumb', 'preview')
+
+
+def file_ext(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+
+def scan_key(sheet_id, filename):
+    """Legacy per-sheet storage key (scans stored before content addressing)."""
+    name = secure_filename(filename).rsplit('.', 1)[0]
+    return f"ohms/field_sheets/{sheet_id}/{name}"
+
+
+def blob_key(sha256):
+    """Content-addressed storage key."""
+    return f"ohms/scans/{sha256[:2]}/{sha256}"
+
+
+def is_content_addressed(key):
+    return key.startswith('ohms/scans/')
+
+
+def sheet_scan_key(sheet):
+    if sheet.scan_sha256:
+        return blob_key(sheet.scan_sha256)
+    return scan_key(sheet.id, sheet.scan_filename)
+
+
+class LocalStorage:
+    """Stores scans on the local filesystem below `root`."""
+
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key, filename):
+        ext = file_ext(filename)
+        rel = f"{key}.{ext}" if ext else key
+        path = os.path.abspath(os.path.join(self.root, rel))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f'Invalid storage key: {key}')
+        return path
+
+    def save(self, key, src_path, filename):
+        """Copy the spooled file into place. Returns the external URL (None — served by the API)."""
+        dest = self.path(key, filename)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + '.part'
+        shutil.copyfile(src_path, tmp)
+        os.replace(tmp, dest)
+        return None
+
+    def delete(self, key, filename):
+        try:
+            os.remove(self.path(key, filename))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key, filename):
+        return os.path.isfile(self.path(key, filename))
+
+
+class CloudinaryStorage:
+    """Stores scans in Cloudinary; PDFs as raw resources, everything else as images."""
+
+    name = 'cloudinary'
+
+    @staticmethod
+    def _resource_type(filename):
+        return 'raw' if file_ext(filename) == 'pdf' else 'image'
+
+    def save(self, key, src_path, filename):
+        import cloudinary.uploader
+        result = cloudinary.uploader.upload(
+            src_path,
+            public_id=key,
+            resource_type=self._resource_type(filename),
+            overwrite=True,
+        )
+        return result.get('secure_url')
+
+    def delete(self, key, filename):
+        import cloudinary.api
+        cloudinary.api.delete_resources([key], resource_type=self._resource_type(filename))
+
+    def exists(self, key, filename):
+        import cloudinary.api
+        try:
+            cloudinary.api.resource(key, resource_type=self._resource_type(filename))
+            return True
+        except Exception:
+            return False
+
+
+def get_storage(app=None):
+    """Return the configured storage backend (one instance per app)."""
+    app = app or current_app
+    storage = app.extensions.get('scan_storage')
+    if storage is None:
+        kind = app.config.get('SCAN_STORAGE', 'local')
+        if kind == 'cloudinary':
+            storage = CloudinaryStorage()
+        elif kind == 'local':
+            storage = LocalStorage(app.config['SCAN_STORAGE_DIR'])
+        else:
+            raise RuntimeError(f'Unknown SCAN_STORAGE backend: {kind}')
+        app.extensions['scan_storage'] = storage
+    return storage
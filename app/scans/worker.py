@@ -0,0 +1,290 @@
+"""
+Background scan uploads.
+
+The request handler only spools the file to SCAN_SPOOL_DIR and records a
+ScanUpload row; a daemon thread (one per gunicorn worker, started lazily)
+normalizes the spooled file, renders previews (app/scans/images.py), pushes
+everything to the storage backend and then links it to the field sheet.
+
+Stored scans are content-addressed by the SHA-256 of the uploaded bytes: a
+re-upload of a scan that any sheet already references just copies that
+sheet's scan metadata, and a blob is only deleted once no sheet links to it.
+
+Set SCAN_UPLOAD_SYNC to process inline (tests, one-off scripts).
+
+Uploads left queued by a restarted worker can be retried with:
+    flask scans drain
+"""
+
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app import db
+from app.scans.models import ScanUpload
+from app.scans import images
+from app.scans.storage import get_storage, blob_key, sheet_scan_key, file_ext, PREVIEW_VARIANTS
+from app.telemetry import metrics
+
+
+_queue  = queue.Queue()
+_lock   = threading.Lock()
+_worker = {'thread': None, 'pid': None}
+
+
+def spool(file_storage, spool_dir):
+    """Stream an uploaded file to disk. Returns (path, size in bytes, sha256 hex)."""
+    os.makedirs(spool_dir, exist_ok=True)
+    ext = file_ext(file_storage.filename)
+    fd, path = tempfile.mkstemp(dir=spool_dir, suffix=f'.{ext}' if ext else '')
+    h, size = hashlib.sha256(), 0
+    with os.fdopen(fd, 'wb') as out:
+        for block in iter(lambda: file_storage.stream.read(1024 * 1024), b''):
+            h.update(block)
+            out.write(block)
+            size += len(block)
+    return path, size, h.hexdigest()
+
+
+def enqueue(upload_id, app=None):
+    """Hand an upload to the background worker (or process it now in sync mode)."""
+    app = app or current_app._get_current_object()
+    if app.config.get('SCAN_UPLOAD_SYNC'):
+        process_upload(upload_id)
+        return
+    _ensure_worker(app)
+    _queue.put(upload_id)
+
+
+def _ensure_worker(app):
+    # Threads do not survive gunicorn's fork, so track the owning pid.
+    with _lock:
+        t = _worker['thread']
+        if t is not None and t.is_alive() and _worker['pid'] == os.getpid():
+            return
+        t = threading.Thread(target=_run, args=(app,), name='scan-upload-worker', daemon=True)
+        t.start()
+        _worker['thread'], _worker['pid'] = t, os.getpid()
+
+
+def _run(app):
+    while True:
+        upload_id = _queue.get()
+        with app.app_context():
+            try:
+                process_upload(upload_id)
+            except Exception:
+                app.logger.exception(f'Scan upload {upload_id} crashed')
+            finally:
+                db.session.remove()
+        _queue.task_done()
+
+
+def _finish(upload, status, error=None):
+    upload.status      = status
+    upload.error       = error
+    upload.finished_at = datetime.utcnow()
+
+
+def process_upload(upload_id):
+    """Push one spooled upload to storage and link it to its field sheet."""
+    from app.schedules.models import FieldSheet
+
+    upload = db.session.get(ScanUpload, upload_id)
+    if upload is None or upload.status not in ('queued', 'processing'):
+        return
+    upload.status = 'processing'
+    db.session.commit()
+
+    sheet = db.session.get(FieldSheet, upload.field_sheet_id)
+    if sheet is None:
+        _finish(upload, 'failed', 'Field sheet no longer exists')
+        discard_spool(upload)
+        db.session.commit()
+        return
+    if not upload.spool_path or not os.path.isfile(upload.spool_path):
+        _finish(upload, 'failed', 'Spooled file is missing')
+        db.session.commit()
+        return
+    if not upload.sha256:
+        upload.sha256 = sha256_file(upload.spool_path)
+
+    previous = ScanRef.of(sheet)
+    storage  = get_storage()
+    # Identical bytes already stored — link, don't re-upload.
+    if not link_existing(sheet, upload.sha256, upload.filename, release=False):
+        try:
+            _store(storage, sheet, upload)
+        except Exception as exc:
+            db.session.rollback()
+            _finish(upload, 'failed', str(exc))
+            db.session.commit()
+            current_app.logger.error(f'Scan upload {upload.id} failed: {exc}')
+            return
+    _finish(upload, 'done')
+    db.session.commit()
+
+    # Only drop the previous scan once the replacement is stored.
+    if previous and previous.sha256 != sheet.scan_sha256:
+        release_scan(storage, previous)
+    discard_spool(upload)
+    db.session.commit()
+
+
+def _store(storage, sheet, upload):
+    cfg = current_app.config
+    stored_path, stored_name = upload.spool_path, upload.filename
+    previews = {}
+    try:
+        stored_path, stored_name = images.normalize(
+            upload.spool_path, upload.filename,
+            cfg['SCAN_MAX_DIMENSION'], cfg['SCAN_IMAGE_FORMAT'],
+        )
+        previews = images.make_previews(
+            stored_path, stored_name, cfg['SCAN_THUMB_SIZE'], cfg['SCAN_PREVIEW_SIZE'],
+        )
+    except Exception as exc:
+        # A scan we cannot decode is still worth keeping as uploaded.
+        current_app.logger.warning(f'Scan upload {upload.id}: normalization skipped: {exc}')
+
+    key = blob_key(upload.sha256)
+    try:
+        with metrics.scan_upload_timer(storage.name):
+            url = storage.save(key, stored_path, stored_name)
+        preview_urls = {
+            variant: storage.save(f'{key}.{variant}', path, f'{variant}.webp')
+            for variant, path in previews.items()
+        }
+    finally:
+        _remove_temp(upload.spool_path, stored_path, *previews.values())
+
+    sheet.scan_filename             = stored_name
+    sheet.scan_sha256               = upload.sha256
+    sheet.scan_url_external         = url
+    sheet.scan_has_preview          = bool(previews)
+    sheet.scan_thumb_url_external   = preview_urls.get('thumb')
+    sheet.scan_preview_url_external = preview_urls.get('preview')
+
+
+def link_existing(sheet, sha256, filename, release=True):
+    """
+    If a sheet of the same operation already references a blob with this hash,
+    point `sheet` at it (metadata only) and return True. With `release`, the
+    change is committed and the sheet's previous scan released.
+    """
+    from app.schedules.models import FieldSheet
+
+    # Stay within the operation: a bare hash is not proof of holding the bytes.
+    twin = FieldSheet.query.filter(
+        FieldSheet.scan_sha256 == sha256,
+        FieldSheet.operation_id == sheet.operation_id,
+    ).first()
+    if twin is None:
+        return False
+    previous = ScanRef.of(sheet)
+    _copy_scan(sheet, twin, filename)
+    if release:
+        db.session.commit()
+        if previous and previous.sha256 != sha256:
+            release_scan(get_storage(), previous)
+    return True
+
+
+def _copy_scan(sheet, twin, filename):
+    base = filename.rsplit('.', 1)[0]
+    ext  = file_ext(twin.scan_filename)
+    values = {
+        'scan_filename':             f'{base}.{ext}' if ext else base,
+        'scan_sha256':               twin.scan_sha256,
+        'scan_url_external':         twin.scan_url_external,
+        'scan_has_preview':          twin.scan_has_preview,
+        'scan_thumb_url_external':   twin.scan_thumb_url_external,
+        'scan_preview_url_external': twin.scan_preview_url_external,
+    }
+    for attr, value in values.items():
+        setattr(sheet, attr, value)
+
+
+class ScanRef:
+    """Snapshot of where a sheet's scan lives, taken before it is replaced or deleted."""
+
+    def __init__(self, sha256, key, filename, has_preview):
+        self.sha256, self.key, self.filename, self.has_preview = sha256, key, filename, has_preview
+
+    @classmethod
+    def of(cls, sheet):
+        if not sheet.scan_filename:
+            return None
+        return cls(sheet.scan_sha256, sheet_scan_key(sheet), sheet.scan_filename, sheet.scan_has_preview)
+
+
+def release_scan(storage, ref):
+    """Delete a stored scan (and its previews) unless another sheet still links to it."""
+    from app.schedules.models import FieldSheet
+
+    if ref.sha256 and FieldSheet.query.filter_by(scan_sha256=ref.sha256).count():
+        return
+    try:
+        storage.delete(ref.key, ref.filename)
+        if ref.has_preview:
+            for variant in PREVIEW_VARIANTS:
+                storage.delete(f'{ref.key}.{variant}', f'{variant}.webp')
+    except Exception as exc:
+        current_app.logger.warning(f'Could not delete stored scan {ref.key}: {exc}')
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _remove_temp(spool_path, *paths):
+    """Remove temp files produced by normalization (the spool file is kept for retries)."""
+    for p in paths:
+        if p and p != spool_path:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def discard_spool(upload):
+    """Remove the spooled copy of an upload (no-op once it has been stored)."""
+    if upload.spool_path:
+        try:
+            os.remove(upload.spool_path)
+        except OSError:
+            pass
+        upload.spool_path = None
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+scans_cli = AppGroup('scans', help='Field sheet scan pipeline.')
+
+
+@scans_cli.command('drain')
+def drain_command():
+    """Process queued scan uploads whose spool file is still on disk."""
+    pending = ScanUpload.query.filter(ScanUpload.status.in_(('queued', 'processing'))).all()
+    for upload in pending:
+        process_upload(upload.id)
+        click.echo(f'  upload {upload.id} ({upload.filename}): {upload.status}')
+    click.echo(f'Done — {len(pending)} upload(s) processed.')
+
+
+@scans_cli.command('expire')
+def expire_command():
+    """Drop resumable upload sessions (and their chunks) that have gone idle."""
+    from app.scans.sessions import expire_sessions
+    click.echo(f'Expired {expire_sessions()} upload session(s).')
@@ -0,0 +1,128 @@
+"""
+Sampling workload forecast — GET /api/sampling-schedules/forecast?months=12
+
+Projects every future due date of every schedule over the horizon, following
+calculate_next_due(): each occurrence is the previous one plus the frequency
+in months, clamped to the end of the month (31 Jan → 28 Feb → 28 Mar). The
+first occurrence is next_sample_due, or last_sampled_date + frequency when
+next_sample_due is blank. A schedule already overdue counts once in
+`overdue` and is projected on from today, as if sampled now.
+
+The projection is vectorised with numpy: one pass per month of horizon over
+all schedules at once, then bincount into week (Monday-start) and month
+buckets per department, HEG and stressor.
+"""
+
+from datetime import date
+
+import numpy as np
+
+from app.schedules.models import FREQUENCY_MONTHS, _add_months
+
+MAX_MONTHS = 120
+DIMENSIONS = ('department', 'heg', 'stressor')
+
+
+def add_months(dates, months):
+    """Vectorised _add_months: datetime64[D] + months (per element), clamped to month end."""
+    month_start = dates.astype('datetime64[M]')
+    day = (dates - month_start.astype('datetime64[D]')).astype(np.int64)          # 0-based
+    target = month_start + months.astype('timedelta64[M]')
+    month_len = ((target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')).astype(np.int64)
+    return target.astype('datetime64[D]') + np.minimum(day, month_len - 1).astype('timedelta64[D]')
+
+
+def _dates(values):
+    return np.array([v if v is not None else 'NaT' for v in values], dtype='datetime64[D]')
+
+
+def _week_start(dates):
+    days = dates.astype(np.int64)           # 1970-01-01 was a Thursday
+    return (days - (days + 3) % 7).astype('datetime64[D]')
+
+
+def _counts(values):
+    keys, counts = np.unique(values, return_counts=True)
+    return {str(k): int(c) for k, c in zip(keys, counts)}
+
+
+def _histograms(bucket, n_buckets, labels):
+    """{'total': [...], dimension: {value: [...]}} — occurrence counts per bucket."""
+    out = {'total': np.bincount(bucket, minlength=n_buckets).tolist()}
+    for dim, values in labels.items():
+        keys, inverse = np.unique(values, return_inverse=True)
+        counts = np.bincount(inverse * n_buckets + bucket, minlength=len(keys) * n_buckets)
+        out[dim] = {str(k): row.tolist() for k, row in zip(keys, counts.reshape(len(keys), n_buckets))}
+    return out
+
+
+def forecast(rows, months=12, today=None):
+    """
+    rows: (frequency, next_sample_due, last_sampled_date, department, heg_number, stressor)
+    per schedule. Returns the forecast structure served by the API.
+    """
+    today = today or date.today()
+    end = _add_months(today, months)
+    n = len(rows)
+
+    step = np.array([FREQUENCY_MONTHS.get(r[0], 0) for r in rows], dtype=np.int64)
+    due = _dates([r[1] for r in rows])
+    last = _dates([r[2] for r in rows])
+    labels = {dim: np.array([r[3 + i] or 'Unassigned' for r in rows], dtype=object)
+              for i, dim in enumerate(DIMENSIONS)}
+
+    # First occurrence: next_sample_due, else last_sampled_date + frequency
+    derive = np.isnat(due) & ~np.isnat(last) & (step > 0)
+    due[derive] = add_months(last[derive], step[derive])
+    valid = ~np.isnat(due) & (step > 0)
+
+    # Overdue: counted once, then projected from today
+    t0 = np.datetime64(today, 'D')
+    overdue = valid & (due < t0)
+    due[overdue] = add_months(np.full(overdue.sum(), t0), step[overdue])
+
+    idx = np.flatnonzero(valid)
+    current, steps = due[idx], step[idx]
+    occ_idx, occ_dates = [], []
+    t_end = np.datetime64(end, 'D')
+    while idx.size:
+        keep = current <= t_end
+        idx, current, steps = idx[keep], current[keep], steps[keep]
+        occ_idx.append(idx)
+        occ_dates.append(current)
+        current = add_months(current, steps)
+    occ_idx = np.concatenate(occ_idx) if occ_idx else np.empty(0, dtype=np.int64)
+    occ_dates = np.concatenate(occ_dates) if occ_dates else np.empty(0, dtype='datetime64[D]')
+    occ_labels = {dim: values[occ_idx] for dim, values in labels.items()}
+
+    # Month buckets: today's month … end's month
+    m0 = t0.astype('datetime64[M]')
+    month_labels = np.arange(m0, t_end.astype('datetime64[M]') + 1)
+    month_bucket = (occ_dates.astype('datetime64[M]') - m0).astype(np.int64)
+
+    # Week buckets: Monday of today's week … Monday of end's week
+    w0 = _week_start(np.array([t0]))[0]
+    week_labels = np.arange(w0, _week_start(np.array([t_end]))[0] + 1, 7)
+    week_bucket = ((_week_start(occ_dates) - w0).astype(np.int64) // 7)
+
+    overdue_idx = np.flatnonzero(overdue)
+    return {
+        'from':        today.isoformat(),
+        'to':          end.isoformat(),
+        'months':      months,
+        'schedules':   n,
+        'projected':   int(valid.sum()),
+        'occurrences': int(occ_idx.size),
+        'overdue': {
+            'total': int(overdue_idx.size),
+            **{dim: _counts(values[overdue_idx]) for dim, values in labels.items()},
+        },
+        'by_month': {
+            'periods': np.datetime_as_string(month_labels).tolist(),
+            **_histograms(month_bucket, len(month_labels), occ_labels),
+        },
+        'by_week': {
+            'periods': np.datetime_as_string(week_labels).tolist(),
+            **_histograms(week_bucket, len(week_labels), occ_labels),
+        },
+    }
@@ -0,0 +1,137 @@
+"""
+Bulk sampling schedule generation from the HEG–stressor matrix.
+
+generate_schedules() creates the schedules for every HEGStressor link that
+has none yet: one per occupation listed on the HEG, or a single general
+schedule (occupation NULL) when the HEG lists none. Links that already have a
+schedule are left alone, so re-running it only fills in new links.
+
+Frequency comes from the stressor's default_frequency, falling back to the
+HEG's risk level (RISK_FREQUENCY). The first sample is due on
+`last_sampled` + frequency when a last sampling date is given, otherwise
+immediately (a baseline survey). The missing links come from one SELECT and
+the schedules go in with one multi-row INSERT; the unique index on
+(heg_id, stressor_id, occupation) turns a concurrent duplicate into a no-op.
+
+    POST /api/sampling-schedules/generate   {"lastSampledDate": "2026-01-31"}
+    flask schedules generate [--operation ID] [--last-sampled YYYY-MM-DD]
+"""
+
+from datetime import date
+
+import click
+from sqlalchemy import and_, exists, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.schedules.models import (
+    FREQUENCY_MONTHS, HEG, HEGStressor, SamplingSchedule, Stressor,
+    calculate_next_due, schedule_status,
+)
+
+# Stressor.default_frequency is free text from the React frontend
+# ('Annual', '6 Monthly', ...); schedules use the FREQUENCY_MONTHS names.
+STRESSOR_FREQUENCY = {
+    'monthly':     'Monthly',
+    '1 monthly':   'Monthly',
+    'quarterly':   'Quarterly',
+    '3 monthly':   'Quarterly',
+    'bi-annually': 'Bi-Annually',
+    'bi-annual':   'Bi-Annually',
+    'biannual':    'Bi-Annually',
+    'semi-annual': 'Bi-Annually',
+    '6 monthly':   'Bi-Annually',
+    'annually':    'Annually',
+    'annual':      'Annually',
+    'yearly':      'Annually',
+    '12 monthly':  'Annually',
+}
+
+RISK_FREQUENCY = {
+    'High':     'Quarterly',
+    'Moderate': 'Bi-Annually',
+    'Low':      'Annually',
+}
+
+
+def schedule_frequency(default_frequency, risk_level):
+    """Frequency for a new schedule: the stressor's default, else by HEG risk level."""
+    frequency = STRESSOR_FREQUENCY.get((default_frequency or '').strip().lower())
+    return frequency or RISK_FREQUENCY.get(risk_level, 'Annually')
+
+
+def _occupations(heg_occupations):
+    names = [o.strip() for o in heg_occupations or [] if isinstance(o, str) and o.strip()]
+    return list(dict.fromkeys(names)) or [None]
+
+
+def _insert():
+    table = SamplingSchedule.__table__
+    dialect = db.session.get_bind().dialect.name
+    # RETURNING only yields the rows actually inserted; executemany rowcount is not reliable here
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing().returning(table.c.id)
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing().returning(table.c.id)
+    return insert(table)
+
+
+def generate_schedules(operation_id=None, last_sampled=None, today=None):
+    """
+    Create schedules for every unscheduled HEG–stressor link, in `operation_id`
+    (None = every operation). Commits; returns {'created': n, 'links': n}.
+    """
+    today = today or date.today()
+    scheduled = exists().where(and_(SamplingSchedule.heg_id == HEGStressor.heg_id,
+                                    SamplingSchedule.stressor_id == HEGStressor.stressor_id))
+    q = (
+        db.session.query(HEGStressor.heg_id, HEGStressor.stressor_id, HEG.operation_id,
+                         HEG.occupations, HEG.risk_level, Stressor.default_frequency)
+        .join(HEG, HEGStressor.heg)
+        .join(Stressor, HEGStressor.stressor)
+        .filter(~scheduled)
+    )
+    if operation_id is not None:
+        q = q.filter(HEG.operation_id == operation_id)
+    links = q.all()
+
+    # At most one due date per frequency
+    due = {}
+    for frequency in FREQUENCY_MONTHS:
+        next_due = calculate_next_due(last_sampled, frequency) if last_sampled else today
+        due[frequency] = (next_due, schedule_status(next_due, today))
+
+    rows = []
+    for heg_id, stressor_id, op_id, occupations, risk_level, default_frequency in links:
+        frequency = schedule_frequency(default_frequency, risk_level)
+        next_due, status = due[frequency]
+        for occupation in _occupations(occupations):
+            rows.append({
+                'heg_id':            heg_id,
+                'stressor_id':       stressor_id,
+                'occupation':        occupation,
+                'sampling_type':     'Personal',
+                'frequency':         frequency,
+                'last_sampled_date': last_sampled,
+                'next_sample_due':   next_due,
+                'status':            status,
+                'created_at':        today,
+                'operation_id':      op_id,
+            })
+    created = 0
+    if rows:
+        # Rows another writer scheduled meanwhile are skipped by ON CONFLICT DO NOTHING
+        result = db.session.execute(_insert(), rows)
+        created = len(result.all()) if result.returns_rows else len(rows)
+    db.session.commit()
+    return {'created': created, 'links': len(links)}
+
+
+@click.command('generate')
+@click.option('--operation', type=int, default=None, help='Operation id (default: every operation).')
+@click.option('--last-sampled', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Last sampling date to schedule from (default: first sample due today).')
+def generate_command(operation, last_sampled):
+    """Create sampling schedules for HEG–stressor links that have none."""
+    summary = generate_schedules(operation, last_sampled.date() if last_sampled else None)
+    click.echo(f"Done — {summary['created']} schedule(s) created for {summary['links']} link(s).")
@@ -6,8 +6,12 @@ Models: Stressor, HEG, HEGStressor, SamplingSchedule,
 """
 
 import calendar
-from datetime import date, datetime
-from app import db
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, false, func, inspect, or_, select
+from sqlalchemy.orm import validates
+from app import db, cache
+
+DUE_SOON_DAYS = 30   # schedules due within this many days are 'Due'
 
 
 # ---------------------------------------------------------------------------
@@ -23,6 +27,14 @@ def _add_months(source_date, months):
     return date(year, month, day)
 
 
+FREQUENCY_MONTHS = {
+    'Monthly':     1,
+    'Quarterly':   3,
+    'Bi-Annually': 6,
+    'Annually':    12,
+}
+
+
 def calculate_next_due(last_date, frequency):
     """
     Calculate next sample due date from last sampled date and frequency string.
@@ -30,18 +42,32 @@ def calculate_next_due(last_date, frequency):
     """
     if not last_date:
         return None
-    freq_map = {
-        'Monthly':     1,
-        'Quarterly':   3,
-        'Bi-Annually': 6,
-        'Annually':    12,
-    }
-    months = freq_map.get(frequency)
+    months = FREQUENCY_MONTHS.get(frequency)
     if months:
         return _add_months(last_date, months)
     return None
 
 
+def schedule_status(next_due, today=None):
+    """'Overdue' / 'Due' / 'Upcoming' for a next-due date, 'Unknown' without one."""
+    if not next_due:
+        return 'Unknown'
+    delta = (next_due - (today or date.today())).days
+    if delta < 0:
+        return 'Overdue'
+    elif delta <= DUE_SOON_DAYS:
+        return 'Due'
+    else:
+        return 'Upcoming'
+
+
+def oel_ratio(measured_value, oel_value):
+    """Measured value as a fraction of the OEL (> 1 exceeds); None without a positive OEL."""
+    if measured_value is None or not oel_value or oel_value <= 0:
+        return None
+    return measured_value / oel_value
+
+
 # ---------------------------------------------------------------------------
 # Stressor (master list)
 # ---------------------------------------------------------------------------
@@ -63,7 +89,7 @@ class Stressor(db.Model):
     health_effects     = db.Column(db.Text, nullable=True)
     linked_test        = db.Column(db.String(120), nullable=True)
     default_frequency  = db.Column(db.String(20), nullable=True)   # Annual, 6 Monthly, Quarterly
-    operation_id       = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
+    operation_id       = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True, index=True)
 
     # Relationships
     heg_stressors      = db.relationship('HEGStressor',      back_populates='stressor', cascade='all, delete-orphan')
@@ -115,6 +141,10 @@ class HEG(db.Model):
     created_at   = db.Column(db.Date, default=date.today)
     operation_id = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_heg_operation_id_heg_number', 'operation_id', 'heg_number'),
+    )
+
     # Relationships
     heg_stressors     = db.relationship('HEGStressor',     back_populates='heg',      cascade='all, delete-orphan')
     sampling_schedules = db.relationship('SamplingSchedule', back_populates='heg',     cascade='all, delete-orphan')
@@ -127,6 +157,54 @@ class HEG(db.Model):
     def overdue_count(self):
         return sum(1 for s in self.sampling_schedules if s.computed_status == 'Overdue')
 
+    @classmethod
+    def overview_stats(cls, operation_id=None, today=None):
+        """
+        Stressor and schedule counts for every HEG in one query, instead of
+        loading each HEG's schedules to call overdue_count. Stressors and
+        schedules are grouped separately and joined per HEG, so neither
+        multiplies the other's rows. operation_id None means all operations.
+        Returns {heg_id: {'stressors', 'schedules', 'overdue', 'due'}}.
+        """
+        heg_ids = select(cls.id)
+        if operation_id is not None:
+            heg_ids = heg_ids.where(cls.operation_id == operation_id)
+        status = SamplingSchedule.status_case(today)
+        stressor_counts = (
+            select(HEGStressor.heg_id, func.count().label('n'))
+            .where(HEGStressor.heg_id.in_(heg_ids))
+            .group_by(HEGStressor.heg_id)
+            .subquery()
+        )
+        schedule_counts = (
+            select(
+                SamplingSchedule.heg_id,
+                func.count().label('n'),
+                func.count(case((status == 'Overdue', 1))).label('overdue'),
+                func.count(case((status == 'Due', 1))).label('due'),
+            )
+            .where(SamplingSchedule.heg_id.in_(heg_ids))
+            .group_by(SamplingSchedule.heg_id)
+            .subquery()
+        )
+        q = (
+            db.session.query(
+                cls.id,
+                func.coalesce(stressor_counts.c.n, 0),
+                func.coalesce(schedule_counts.c.n, 0),
+                func.coalesce(schedule_counts.c.overdue, 0),
+                func.coalesce(schedule_counts.c.due, 0),
+            )
+            .outerjoin(stressor_counts, stressor_counts.c.heg_id == cls.id)
+            .outerjoin(schedule_counts, schedule_counts.c.heg_id == cls.id)
+        )
+        if operation_id is not None:
+            q = q.filter(cls.operation_id == operation_id)
+        return {
+            heg_id: {'stressors': stressors, 'schedules': schedules, 'overdue': overdue, 'due': due}
+            for heg_id, stressors, schedules, overdue, due in q
+        }
+
     def __repr__(self):
         return f"<HEG {self.heg_number} | {self.job_title} | {self.department}>"
 
@@ -176,6 +254,15 @@ class SamplingSchedule(db.Model):
     created_at        = db.Column(db.Date,        default=date.today)
     operation_id      = db.Column(db.Integer,     db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_sampling_schedule_operation_id_next_sample_due', 'operation_id', 'next_sample_due'),
+        db.Index('ix_sampling_schedule_next_sample_due', 'next_sample_due'),
+        db.Index('ix_sampling_schedule_operation_id_status', 'operation_id', 'status'),
+        # One schedule per HEG × stressor × occupation (NULL occupation = general)
+        db.Index('uq_sampling_schedule_heg_stressor_occupation',
+                 'heg_id', 'stressor_id', func.coalesce(occupation, ''), unique=True),
+    )
+
     # Relationships
     heg      = db.relationship('HEG',      back_populates='sampling_schedules')
     stressor = db.relationship('Stressor', back_populates='sampling_schedules')
@@ -183,16 +270,44 @@ class SamplingSchedule(db.Model):
     @property
     def computed_status(self):
         """Derive status from next_sample_due vs today."""
-        if not self.next_sample_due:
-            return 'Unknown'
-        today = date.today()
-        delta = (self.next_sample_due - today).days
-        if delta < 0:
-            return 'Overdue'
-        elif delta <= 30:
-            return 'Due'
-        else:
-            return 'Upcoming'
+        return schedule_status(self.next_sample_due)
+
+    @classmethod
+    def status_filter(cls, status, today=None):
+        """SQL condition equivalent to `computed_status == status`, as a next_sample_due range."""
+        today = today or date.today()
+        due = cls.next_sample_due
+        if status == 'Unknown':
+            return due.is_(None)
+        if status == 'Overdue':
+            return due < today
+        if status == 'Due':
+            return due.between(today, today + timedelta(days=DUE_SOON_DAYS))
+        if status == 'Upcoming':
+            return due > today + timedelta(days=DUE_SOON_DAYS)
+        return false()
+
+    @classmethod
+    def status_case(cls, today=None):
+        """SQL CASE expression that evaluates to `computed_status` for every row."""
+        today = today or date.today()
+        due = cls.next_sample_due
+        return case(
+            (due.is_(None), 'Unknown'),
+            (due < today, 'Overdue'),
+            (due <= today + timedelta(days=DUE_SOON_DAYS), 'Due'),
+            else_='Upcoming',
+        )
+
+    @classmethod
+    def duplicate_exists(cls, heg_id, stressor_id, occupation, exclude_id=None):
+        """True if another schedule has this HEG, stressor and occupation (the unique key)."""
+        q = cls.query.filter(cls.heg_id == heg_id, cls.stressor_id == stressor_id,
+                             func.coalesce(cls.occupation, '') == (occupation or ''))
+        if exclude_id is not None:
+            q = q.filter(cls.id != exclude_id)
+        with db.session.no_autoflush:     # an edited schedule must not be flushed first
+            return db.session.query(q.exists()).scalar()
 
     @property
     def days_until_due(self):
@@ -223,8 +338,8 @@ class SamplingSchedule(db.Model):
             'occupation':       self.occupation,
             'sampling_type':    self.sampling_type,
             'frequency':        self.frequency,
-            'last_sampled_date':self.last_sampled_date.isoformat() if self.last_sampled_date else None,
-            'next_sample_due':  self.next_sample_due.isoformat()   if self.next_sample_due   else None,
+            'last_sampled_date':self.last_sampled_date,
+            'next_sample_due':  self.next_sample_due,
             'status':           self.computed_status,
             'remarks':          self.remarks,
         }
@@ -247,11 +362,62 @@ class ExposureReading(db.Model):
     oel_value      = db.Column(db.Float, nullable=True)   # snapshot at time of reading
     oel_unit       = db.Column(db.String(40), nullable=True)
     date           = db.Column(db.Date, nullable=False, default=date.today)
+    exceedance_ratio = db.Column(db.Float, nullable=True)  # measured_value / oel_value, kept by the validator
     operation_id   = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_exposure_reading_operation_id_date', 'operation_id', 'date'),
+        db.Index('ix_exposure_reading_operation_id_stressor_id_ratio', 'operation_id', 'stressor_id',
+                 'exceedance_ratio'),
+        db.Index('ix_exposure_reading_stressor_id_ratio', 'stressor_id', 'exceedance_ratio'),
+    )
+
     stressor          = db.relationship('Stressor', back_populates='exposure_readings')
     employee_exposures = db.relationship('EmployeeExposure', back_populates='reading', cascade='all, delete-orphan')
 
+    @classmethod
+    def cache_scopes(cls, readings, connection):
+        """Data versions of the employees these readings are linked to (app/cache.py)."""
+        ids = [inspect(r).identity[0] for r in readings if inspect(r).identity]
+        return EmployeeExposure.employee_scopes(connection, reading_ids=ids)
+
+    @validates('measured_value', 'oel_value')
+    def _keep_exceedance_ratio(self, key, value):
+        measured = value if key == 'measured_value' else self.measured_value
+        oel = value if key == 'oel_value' else self.oel_value
+        self.exceedance_ratio = oel_ratio(measured, oel)
+        return value
+
+    @classmethod
+    def exceeds(cls):
+        """SQL condition: the reading is above its OEL snapshot."""
+        return cls.exceedance_ratio > 1
+
+    @classmethod
+    def exceedance_counts(cls, operation_id=None):
+        """
+        Readings with an OEL and how many exceed it, per stressor, from one
+        GROUP BY. operation_id None means all operations. Returns
+        [{'stressorId', 'stressor', 'readings', 'exceedances', 'maxRatio'}],
+        most exceedances first.
+        """
+        q = (
+            db.session.query(Stressor.id, Stressor.name, func.count(cls.id),
+                             func.count(case((cls.exceeds(), cls.id))), func.max(cls.exceedance_ratio))
+            .join(cls.stressor)
+            .filter(cls.exceedance_ratio.isnot(None))
+            .group_by(Stressor.id, Stressor.name)
+        )
+        if operation_id is not None:
+            q = q.filter(cls.operation_id == operation_id)
+        rows = [
+            {'stressorId': sid, 'stressor': name, 'readings': readings, 'exceedances': exceedances,
+             'maxRatio': max_ratio}
+            for sid, name, readings, exceedances, max_ratio in q
+        ]
+        rows.sort(key=lambda r: (-r['exceedances'], r['stressor']))
+        return rows
+
     def to_api_dict(self):
         return {
             'id':            self.id,
@@ -260,7 +426,8 @@ class ExposureReading(db.Model):
             'measuredValue': self.measured_value,
             'oel':           self.oel_value,
             'unit':          self.oel_unit or '',
-            'date':          self.date.isoformat(),
+            'date':          self.date,
+            'exceedanceRatio': self.exceedance_ratio,
             'employeeIds':   [ee.employee_id for ee in self.employee_exposures],
         }
 
@@ -277,7 +444,7 @@ class EmployeeExposure(db.Model):
 
     id          = db.Column(db.Integer, primary_key=True)
     reading_id  = db.Column(db.Integer, db.ForeignKey('exposure_reading.id'), nullable=False)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'),         nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'),         nullable=False, index=True)
 
     reading  = db.relationship('ExposureReading', back_populates='employee_exposures')
     employee = db.relationship('Employee')
@@ -286,6 +453,55 @@ class EmployeeExposure(db.Model):
         db.UniqueConstraint('reading_id', 'employee_id', name='uq_employee_exposure'),
     )
 
+    @classmethod
+    def cache_scopes(cls, links, connection):
+        """
+        Data versions of the employees on either end of a changed link: the
+        stored employee_id (read before the flush, so a moved link also
+        invalidates the employee it left) and the one being written.
+        """
+        ids, current = [], set()
+        for ee in links:
+            state = inspect(ee)
+            if state.identity:
+                ids.append(state.identity[0])
+            employee = state.dict.get('employee')
+            if employee is not None and inspect(employee).identity:
+                current.add(inspect(employee).identity[0])
+            elif state.dict.get('employee_id') is not None:
+                current.add(state.dict['employee_id'])
+        return cls.employee_scopes(connection, link_ids=ids) | {cache.scope('employee', eid) for eid in current}
+
+    @classmethod
+    def employee_scopes(cls, connection, link_ids=(), reading_ids=()):
+        """Employee scopes of the stored links with these ids or on these readings, in one query."""
+        if not link_ids and not reading_ids:
+            return set()
+        rows = connection.execute(
+            select(cls.employee_id).distinct()
+            .where(or_(cls.id.in_(link_ids), cls.reading_id.in_(reading_ids)))
+        )
+        return {cache.scope('employee', eid) for eid, in rows}
+
+    @classmethod
+    def profile_rows(cls, employee_id):
+        """
+        Every reading of one employee with its stressor, in one query ordered
+        by stressor then date: (stressor id, name, category, reading id, date,
+        measured value, OEL, unit, exceedance ratio, location).
+        """
+        return (
+            db.session.query(Stressor.id, Stressor.name, Stressor.category, ExposureReading.id,
+                             ExposureReading.date, ExposureReading.measured_value, ExposureReading.oel_value,
+                             ExposureReading.oel_unit, ExposureReading.exceedance_ratio, ExposureReading.location)
+            .select_from(cls)
+            .join(cls.reading)
+            .join(ExposureReading.stressor)
+            .filter(cls.employee_id == employee_id)
+            .order_by(Stressor.name, Stressor.id, ExposureReading.date, ExposureReading.id)
+            .all()
+        )
+
 
 # ---------------------------------------------------------------------------
 # MedicalRecord  (medical surveillance per employee / stressor)
@@ -304,6 +520,10 @@ class MedicalRecord(db.Model):
     status       = db.Column(db.String(20),  nullable=False, default='scheduled')
     operation_id = db.Column(db.Integer,     db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_medical_record_operation_id_next_due', 'operation_id', 'next_due'),
+    )
+
     employee = db.relationship('Employee', backref=db.backref('medical_records', lazy='dynamic'))
     stressor = db.relationship('Stressor', back_populates='medical_records')
 
@@ -313,8 +533,8 @@ class MedicalRecord(db.Model):
             'employeeId': self.employee_id,
             'hazardId':   self.stressor_id,
             'testName':   self.test_name,
-            'lastDone':   self.last_done.isoformat() if self.last_done else '',
-            'nextDue':    self.next_due.isoformat()  if self.next_due  else '',
+            'lastDone':   self.last_done or '',
+            'nextDue':    self.next_due or '',
             'result':     self.result or '',
             'status':     self.status,
         }
@@ -419,8 +639,16 @@ class FieldSheet(db.Model):
     # ── Scanned copy (stored in Cloudinary) ──────────────────────────────────
     scan_filename        = db.Column(db.String(255), nullable=True)
     scan_url_external    = db.Column(db.Text,        nullable=True)  # Cloudinary CDN URL
+    scan_sha256          = db.Column(db.String(64),  nullable=True, index=True)  # content address
+    scan_has_preview          = db.Column(db.Boolean, default=False)
+    scan_thumb_url_external   = db.Column(db.Text,    nullable=True)  # Cloudinary CDN URL
+    scan_preview_url_external = db.Column(db.Text,    nullable=True)  # Cloudinary CDN URL
     operation_id         = db.Column(db.Integer,     db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_field_sheet_operation_id_created_at', 'operation_id', 'created_at'),
+    )
+
     @property
     def status(self):
         has_core = bool(self.employee_name and self.sampling_date)
@@ -436,7 +664,7 @@ class FieldSheet(db.Model):
     def to_dict(self):
         return {
             'id':               self.id,
-            'created_at':       self.created_at.isoformat() if self.created_at else None,
+            'created_at':       self.created_at,
             'status':           self.status,
             # Header
             'mine_site':        self.mine_site,
@@ -448,7 +676,7 @@ class FieldSheet(db.Model):
             'coy_number':       self.coy_number,
             'job_title':        self.job_title,
             'company_name':     self.company_name,
-            'sampling_date':    self.sampling_date.isoformat() if self.sampling_date else None,
+            'sampling_date':    self.sampling_date,
             'shift_sampled':    self.shift_sampled,
             'purpose':          self.purpose,
             # Weather
@@ -474,7 +702,7 @@ class FieldSheet(db.Model):
             'noise_demarcated':     self.noise_demarcated,
             'noise_hpd_provided':   self.noise_hpd_provided,
             'noise_dbadge_serial':  self.noise_dbadge_serial,
-            'noise_cal_date':       self.noise_cal_date.isoformat() if self.noise_cal_date else None,
+            'noise_cal_date':       self.noise_cal_date,
             'noise_method':         self.noise_method,
             'noise_pre_cal':        self.noise_pre_cal,
             'noise_post_cal':       self.noise_post_cal,
@@ -489,7 +717,7 @@ class FieldSheet(db.Model):
             'air_area_sample':      self.air_area_sample,
             'air_pump_serial':      self.air_pump_serial,
             'air_filter_number':    self.air_filter_number,
-            'air_cal_date':         self.air_cal_date.isoformat() if self.air_cal_date else None,
+            'air_cal_date':         self.air_cal_date,
             'air_method':           self.air_method,
             'air_pre_cal_flow':     self.air_pre_cal_flow,
             'air_post_cal_flow':    self.air_post_cal_flow,
@@ -500,7 +728,7 @@ class FieldSheet(db.Model):
             'wearer_signature':     self.wearer_signature,
             'sampled_by':           self.sampled_by,
             'sampled_designation':  self.sampled_designation,
-            'sampled_date':         self.sampled_date.isoformat() if self.sampled_date else None,
+            'sampled_date':         self.sampled_date,
             'verified_by':          self.verified_by,
             # Sampling type
             'sampling_type':        self.sampling_type or 'both',
@@ -513,10 +741,21 @@ class FieldSheet(db.Model):
             'result_pnoc_twa':      self.result_pnoc_twa,
             # Scan
             'scan_filename':        self.scan_filename,
-            'scan_url':             f'/api/field-sheets/{self.id}/scan' if self.scan_filename else None,
+            'scan_url':             f'/api/field-sheets/{self.id}/scan{self._scan_version()}' if self.scan_filename else None,
             'scan_url_external':    self.scan_url_external,
+            'scan_thumbnail_url':   self._scan_variant_url('thumb', self.scan_thumb_url_external),
+            'scan_preview_url':     self._scan_variant_url('preview', self.scan_preview_url_external),
         }
 
+    def _scan_variant_url(self, variant, external):
+        if not (self.scan_filename and self.scan_has_preview):
+            return None
+        return external or f'/api/field-sheets/{self.id}/scan/{variant}{self._scan_version()}'
+
+    def _scan_version(self):
+        # A replaced scan gets new URLs, so a cached redirect never outlives its blob
+        return f'?v={self.scan_sha256[:16]}' if self.scan_sha256 else ''
+
     def __repr__(self):
         return f"<FieldSheet id:{self.id} emp:{self.employee_name} status:{self.status}>"
 
@@ -543,6 +782,10 @@ class LabResult(db.Model):
     lab_report_ref    = db.Column(db.String(80), nullable=True)
     operation_id      = db.Column(db.Integer, db.ForeignKey('operation.id'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_lab_result_operation_id_sampling_date', 'operation_id', 'sampling_date'),
+    )
+
     @property
     def validity_pct(self):
         if self.shift_duration and self.sampling_duration is not None:
@@ -559,8 +802,8 @@ class LabResult(db.Model):
     def to_dict(self):
         return {
             'id':               self.id,
-            'created_at':       self.created_at.isoformat() if self.created_at else None,
-            'sampling_date':    self.sampling_date.isoformat() if self.sampling_date else None,
+            'created_at':       self.created_at,
+            'sampling_date':    self.sampling_date,
             'sampling_quarter': self.sampling_quarter,
             'activity_area':    self.activity_area,
             'occupation':       self.occupation,
@@ -8,7 +8,8 @@ from flask import (
     render_template, redirect, url_for,
     flash, request, jsonify, abort
 )
-from app import db
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from app import db, cache
 from app.schedules import schedules_bp
 from app.schedules.models import HEG, Stressor, HEGStressor, SamplingSchedule, calculate_next_due
 from app.schedules.forms import HEGForm, HEGStressorForm, SamplingScheduleForm, StressorForm
@@ -31,8 +32,11 @@ def _all_hegs():
 @schedules_bp.route('/hegs')
 def heg_list():
     """List all HEGs with their linked stressors and schedule summary."""
-    hegs = HEG.query.order_by(HEG.heg_number).all()
-    return render_template('schedules/heg_list.html', hegs=hegs)
+    hegs = HEG.query.options(
+        selectinload(HEG.heg_stressors).joinedload(HEGStressor.stressor),
+        selectinload(HEG.sampling_schedules).joinedload(SamplingSchedule.stressor),
+    ).order_by(HEG.heg_number).all()
+    return render_template('schedules/heg_list.html', hegs=hegs, stats=HEG.overview_stats())
 
 
 @schedules_bp.route('/hegs/add', methods=['GET', 'POST'])
@@ -156,13 +160,11 @@ def schedule_list():
         query = query.filter(HEG.department.ilike(f'%{department}%'))
     if risk_level:
         query = query.filter(HEG.risk_level == risk_level)
+    if status:
+        query = query.filter(SamplingSchedule.status_filter(status))
 
     schedules = query.order_by(SamplingSchedule.next_sample_due).all()
 
-    # Filter by computed status (can't do in DB since it's a property)
-    if status:
-        schedules = [s for s in schedules if s.computed_status == status]
-
     # For filter dropdowns
     stressors   = _active_stressors()
     departments = db.session.query(HEG.department).distinct().order_by(HEG.department).all()
@@ -188,20 +190,23 @@ def schedule_add():
         form.heg_id.data = preselect_heg
 
     if form.validate_on_submit():
-        schedule = SamplingSchedule(
-            heg_id            = form.heg_id.data,
-            stressor_id       = form.stressor_id.data,
-            sampling_type     = form.sampling_type.data,
-            frequency         = form.frequency.data,
-            last_sampled_date = form.last_sampled_date.data,
-            status            = form.status.data,
-            remarks           = form.remarks.data,
-        )
-        schedule.recalculate_next_due()
-        db.session.add(schedule)
-        db.session.commit()
-        flash('Sampling schedule created successfully.', 'success')
-        return redirect(url_for('schedules.schedule_list'))
+        if SamplingSchedule.duplicate_exists(form.heg_id.data, form.stressor_id.data, None):
+            flash('A schedule for this HEG and stressor already exists.', 'danger')
+        else:
+            schedule = SamplingSchedule(
+                heg_id            = form.heg_id.data,
+                stressor_id       = form.stressor_id.data,
+                sampling_type     = form.sampling_type.data,
+                frequency         = form.frequency.data,
+                last_sampled_date = form.last_sampled_date.data,
+                status            = form.status.data,
+                remarks           = form.remarks.data,
+            )
+            schedule.recalculate_next_due()
+            db.session.add(schedule)
+            db.session.commit()
+            flash('Sampling schedule created successfully.', 'success')
+            return redirect(url_for('schedules.schedule_list'))
 
     stressor_data = {
         s.id: {
@@ -225,17 +230,21 @@ def schedule_edit(schedule_id):
     form.set_stressor_choices(_active_stressors())
 
     if form.validate_on_submit():
-        schedule.heg_id            = form.heg_id.data
-        schedule.stressor_id       = form.stressor_id.data
-        schedule.sampling_type     = form.sampling_type.data
-        schedule.frequency         = form.frequency.data
-        schedule.last_sampled_date = form.last_sampled_date.data
-        schedule.status            = form.status.data
-        schedule.remarks           = form.remarks.data
-        schedule.recalculate_next_due()
-        db.session.commit()
-        flash('Schedule updated successfully.', 'success')
-        return redirect(url_for('schedules.schedule_list'))
+        if SamplingSchedule.duplicate_exists(form.heg_id.data, form.stressor_id.data, schedule.occupation,
+                                             exclude_id=schedule.id):
+            flash('A schedule for this HEG and stressor already exists.', 'danger')
+        else:
+            schedule.heg_id            = form.heg_id.data
+            schedule.stressor_id       = form.stressor_id.data
+            schedule.sampling_type     = form.sampling_type.data
+            schedule.frequency         = form.frequency.data
+            schedule.last_sampled_date = form.last_sampled_date.data
+            schedule.status            = form.status.data
+            schedule.remarks           = form.remarks.data
+            schedule.recalculate_next_due()
+            db.session.commit()
+            flash('Schedule updated successfully.', 'success')
+            return redirect(url_for('schedules.schedule_list'))
 
     stressor_data = {
         s.id: {
@@ -316,11 +325,12 @@ def stressor_edit(stressor_id):
 
 @schedules_bp.route('/api/hegs')
 def api_hegs():
-    """Return all HEGs with their linked stressors as JSON."""
-    hegs = HEG.query.order_by(HEG.heg_number).all()
-    data = []
-    for h in hegs:
-        data.append({
+    """Return all HEGs with their linked stressors as JSON (cached until any of them change)."""
+    def build():
+        hegs = HEG.query.options(
+            selectinload(HEG.heg_stressors).selectinload(HEGStressor.stressor),
+        ).order_by(HEG.heg_number).all()
+        return [{
             'id':          h.id,
             'heg_number':  h.heg_number,
             'job_title':   h.job_title,
@@ -339,8 +349,9 @@ def api_hegs():
                 }
                 for hs in h.heg_stressors
             ],
-        })
-    resp = jsonify(data)
+        } for h in hegs]
+
+    resp = cache.json_response('schedules.api_hegs', ('heg', 'heg_stressor', 'stressor'), build)
     resp.headers['Access-Control-Allow-Origin'] = '*'
     return resp
 
@@ -348,7 +359,9 @@ def api_hegs():
 @schedules_bp.route('/api/schedules')
 def api_schedules():
     """Return all sampling schedules as JSON for the React OHMS Manager UI."""
-    schedules = SamplingSchedule.query.join(HEG).join(Stressor).order_by(
+    schedules = SamplingSchedule.query.join(HEG).join(Stressor).options(
+        contains_eager(SamplingSchedule.heg), contains_eager(SamplingSchedule.stressor),
+    ).order_by(
         SamplingSchedule.next_sample_due
     ).all()
     resp = jsonify([s.to_dict() for s in schedules])
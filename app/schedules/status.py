@@ -0,0 +1,61 @@
+"""
+Stored sampling schedule status.
+
+SamplingSchedule.status is written when a schedule is saved, so it goes stale
+as the calendar moves on. refresh_statuses() rewrites it for every schedule in
+a single `UPDATE ... SET status = CASE ...` touching only rows whose status
+actually changes. alerts_job.py runs it daily before building the alerts; run
+it by hand with:
+
+    flask schedules refresh-status [--today YYYY-MM-DD]
+"""
+
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, update
+
+from app import db
+from app.schedules.models import SamplingSchedule
+
+
+def refresh_statuses(today=None):
+    """
+    Bring every stored status in line with `computed_status`.
+    Returns {'changed': n, 'transitions': {'Due → Overdue': n, ...}}.
+    """
+    new_status = SamplingSchedule.status_case(today or date.today())
+    stale = SamplingSchedule.status != new_status
+
+    transitions = (
+        db.session.query(SamplingSchedule.status, new_status, func.count())
+        .filter(stale)
+        .group_by(SamplingSchedule.status, new_status)
+        .all()
+    )
+    result = db.session.execute(
+        update(SamplingSchedule).where(stale).values(status=new_status)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return {
+        'changed':     result.rowcount,
+        'transitions': {f'{old} → {new}': n for old, new, n in sorted(transitions)},
+    }
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+schedules_cli = AppGroup('schedules', help='Sampling schedule maintenance.')
+
+
+@schedules_cli.command('refresh-status')
+@click.option('--today', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Date to evaluate against (default: today).')
+def refresh_status_command(today):
+    """Recompute the stored status of every sampling schedule."""
+    summary = refresh_statuses(today.date() if today else None)
+    for transition, n in summary['transitions'].items():
+        click.echo(f'  {transition}: {n}')
+    click.echo(f"Done — {summary['changed']} schedule(s) changed status.")
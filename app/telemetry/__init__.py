@@ -0,0 +1,27 @@
+"""
+Request telemetry
+=================
+queries       — per-request query count / DB time (cursor hooks) and query budgets
+server_timing — Server-Timing header: db, serialize, total
+metrics       — Prometheus metrics at /metrics (request latency, DB, email, uploads, alerts job)
+slow_queries  — ring buffer of slow statements with their call site, at /api/_debug/slow-queries
+profiling     — super-admin request profiling on demand (X-Profile header), at /api/_debug/profiles
+"""
+
+import time
+
+from flask import g
+
+
+def _mark_start():
+    g.request_started = time.perf_counter()
+
+
+def init_app(app):
+    from app.telemetry import queries, server_timing, metrics, slow_queries, profiling
+    app.before_request(_mark_start)
+    queries.init_app(app)
+    server_timing.init_app(app)
+    metrics.init_app(app)
+    slow_queries.init_app(app)
+    profiling.init_app(app)
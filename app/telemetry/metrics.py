@@ -0,0 +1,200 @@
+"""
+Prometheus metrics  —  GET /metrics
+
+  ohms_http_request_duration_seconds   histogram  blueprint, endpoint, method, status
+  ohms_request_db_seconds              histogram  endpoint — SQL time per request
+  ohms_request_queries                 histogram  endpoint — statements per request
+  ohms_db_pool_connections             gauge      state (checked_out, checked_in, overflow)
+  ohms_email_send_seconds              histogram  kind (invite, alert, reset)
+  ohms_email_failures_total            counter    kind
+  ohms_scan_upload_seconds             histogram  backend — pushing a scan to storage
+  ohms_alerts_job_duration_seconds     histogram
+  ohms_alerts_job_last_success_unixtime gauge
+
+alerts_job runs in its own process; its samples reach Prometheus through the
+shared multiprocess directory when it runs on the same host, or through
+PROMETHEUS_PUSHGATEWAY.
+
+/metrics needs a logged-in super admin or `Authorization: Bearer <METRICS_TOKEN>`.
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py) so every
+worker writes its samples to a shared directory and a scrape of any worker
+returns the sum; with METRICS_PORT set the gunicorn master also serves them
+on a separate, unauthenticated port for an internal scraper.
+
+prometheus_client is optional: without it every helper here is a no-op and
+/metrics answers 501.
+"""
+
+import functools
+import hmac
+import os
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from app.telemetry import queries
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:   # optional — metrics disabled
+    prometheus_client = None
+
+
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+if prometheus_client is not None:
+    REQUEST_SECONDS = Histogram(
+        'ohms_http_request_duration_seconds', 'Time to handle a request',
+        ['blueprint', 'endpoint', 'method', 'status'],
+    )
+    REQUEST_DB_SECONDS = Histogram(
+        'ohms_request_db_seconds', 'Time spent in SQL statements per request', ['endpoint'],
+    )
+    REQUEST_QUERIES = Histogram(
+        'ohms_request_queries', 'SQL statements per request', ['endpoint'], buckets=_QUERY_BUCKETS,
+    )
+    POOL_CONNECTIONS = Gauge(
+        'ohms_db_pool_connections', 'Database pool connections by state', ['state'],
+        multiprocess_mode='livesum',
+    )
+    EMAIL_SECONDS = Histogram(
+        'ohms_email_send_seconds', 'Time to hand an email to SendGrid', ['kind'], buckets=_SLOW_BUCKETS,
+    )
+    EMAIL_FAILURES = Counter('ohms_email_failures_total', 'Emails SendGrid refused or errored on', ['kind'])
+    SCAN_UPLOAD_SECONDS = Histogram(
+        'ohms_scan_upload_seconds', 'Time to push a scan file to storage', ['backend'], buckets=_SLOW_BUCKETS,
+    )
+    ALERTS_JOB_SECONDS = Histogram(
+        'ohms_alerts_job_duration_seconds', 'Duration of the daily alerts job', buckets=_SLOW_BUCKETS,
+    )
+    ALERTS_JOB_LAST_SUCCESS = Gauge(
+        'ohms_alerts_job_last_success_unixtime', 'When the alerts job last finished without error',
+        multiprocess_mode='max',
+    )
+
+
+def enabled():
+    return prometheus_client is not None
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation helpers
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def _timer(histogram, failures=None):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if failures is not None:
+            failures.inc()
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+def time_email(kind):
+    """Decorator: record send duration and failures of an email function."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            with _timer(EMAIL_SECONDS.labels(kind), EMAIL_FAILURES.labels(kind)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def scan_upload_timer(backend):
+    return _timer(SCAN_UPLOAD_SECONDS.labels(backend)) if enabled() else _noop()
+
+
+@contextmanager
+def alerts_job_timer():
+    if not enabled():
+        yield
+        return
+    with _timer(ALERTS_JOB_SECONDS):
+        yield
+    ALERTS_JOB_LAST_SUCCESS.set_to_current_time()
+
+
+def push_job_metrics(job):
+    """Push to PROMETHEUS_PUSHGATEWAY, for one-off processes nobody scrapes (Heroku Scheduler)."""
+    gateway = os.environ.get('PROMETHEUS_PUSHGATEWAY')
+    if enabled() and gateway:
+        prometheus_client.push_to_gateway(gateway, job=job, registry=registry())
+
+
+def _update_pool_gauges():
+    pool = current_app.extensions['sqlalchemy'].engine.pool
+    for state, attr in (('checked_out', 'checkedout'), ('checked_in', 'checkedin'), ('overflow', 'overflow')):
+        read = getattr(pool, attr, None)
+        if read is not None:
+            POOL_CONNECTIONS.labels(state).set(max(read(), 0))
+
+
+def _observe_request(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    endpoint = request.endpoint or '<unmatched>'   # keeps 404 scans from exploding label cardinality
+    REQUEST_SECONDS.labels(
+        request.blueprint or '', endpoint, request.method, str(response.status_code),
+    ).observe(time.perf_counter() - started)
+    stats = queries.current()
+    if stats is not None:
+        REQUEST_DB_SECONDS.labels(endpoint).observe(stats.seconds)
+        REQUEST_QUERIES.labels(endpoint).observe(stats.count)
+    try:
+        _update_pool_gauges()
+    except Exception:   # pool implementations without counters (SQLite in tests)
+        pass
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+def registry():
+    """Registry to expose: the multiprocess aggregate when running under gunicorn."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        reg = CollectorRegistry()
+        multiprocess.MultiProcessCollector(reg)
+        return reg
+    return prometheus_client.REGISTRY
+
+
+def _authorized():
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+        return True
+    return current_user.is_authenticated and current_user.role == 'super_admin'
+
+
+def metrics_view():
+    if not enabled():
+        return {'error': 'prometheus_client is not installed'}, 501
+    if not _authorized():
+        return {'error': 'Authentication required'}, 401
+    body = prometheus_client.generate_latest(registry())
+    return current_app.response_class(body, mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    if enabled():
+        app.after_request(_observe_request)
@@ -0,0 +1,169 @@
+"""
+On-demand request profiling for super admins.
+
+Send `X-Profile: 1` (or add `?_profile=1`) on any request while logged in as
+a super admin and that one request runs under a profiler:
+
+  pyinstrument   sampling profiler, saved as an HTML flame view (default when installed)
+  cprofile       stdlib deterministic profiler, saved as .pstats (`X-Profile: cprofile`)
+
+The file goes to PROFILE_DIR, which keeps the newest PROFILE_MAX_FILES; its
+name comes back in the X-Profile-Id response header.
+
+  GET    /api/_debug/profiles          list saved profiles, newest first
+  GET    /api/_debug/profiles/<name>   open one (HTML inline, pstats as a download)
+  DELETE /api/_debug/profiles/<name>   remove one
+
+The trigger is ignored for everyone else. Untriggered requests pay a header
+and query-string lookup and nothing more — no profiler, no user load.
+"""
+
+import cProfile
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, g, jsonify, request, send_from_directory
+from flask_login import current_user, login_required
+
+try:
+    from pyinstrument import Profiler
+except ImportError:   # optional — cProfile only
+    Profiler = None
+
+HEADER = 'X-Profile'
+QUERY_FLAG = '_profile'
+_NAME = re.compile(r'^[\w.\-]+\.(html|pstats)$')
+
+
+def _requested():
+    """Profiler asked for by this request ('pyinstrument' / 'cprofile'), or None."""
+    value = request.headers.get(HEADER)
+    if value is None:
+        if QUERY_FLAG not in request.args:
+            return None
+        value = request.args.get(QUERY_FLAG)
+    value = value.strip().lower()
+    if value in ('0', 'false', 'no', 'off'):
+        return None
+    if value == 'cprofile' or Profiler is None:
+        return 'cprofile'
+    return 'pyinstrument'
+
+
+def _profile_dir():
+    path = current_app.config['PROFILE_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _start():
+    kind = _requested()
+    if kind is None:
+        return
+    if not (current_user.is_authenticated and current_user.role == 'super_admin'):
+        return
+    if kind == 'pyinstrument':
+        profiler = Profiler(interval=0.001, async_mode='disabled')
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g.profiler = (kind, profiler, time.perf_counter())
+
+
+def _stop(status):
+    """Stop the running profiler and save it; returns the file name."""
+    kind, profiler, started = g.pop('profiler')
+    elapsed_ms = round((time.perf_counter() - started) * 1000)
+    endpoint = re.sub(r'[^\w.]', '_', request.endpoint or 'unmatched')
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    directory = _profile_dir()
+
+    if kind == 'pyinstrument':
+        profiler.stop()
+        name = f'{stamp}-{endpoint}-{status}-{elapsed_ms}ms.html'
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        name = f'{stamp}-{endpoint}-{status}-{elapsed_ms}ms.pstats'
+        profiler.dump_stats(os.path.join(directory, name))
+
+    _prune(directory, current_app.config.get('PROFILE_MAX_FILES', 50))
+    return name
+
+
+def _prune(directory, keep):
+    files = sorted((e for e in os.scandir(directory) if _NAME.match(e.name)),
+                   key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in files[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _finish(response):
+    if 'profiler' in g:
+        response.headers['X-Profile-Id'] = _stop(response.status_code)
+    return response
+
+
+def _teardown(exc):
+    if 'profiler' in g:   # the view raised before after_request ran
+        _stop('error')
+
+
+# ---------------------------------------------------------------------------
+# Admin endpoints
+# ---------------------------------------------------------------------------
+
+def _forbidden():
+    return jsonify({'error': 'Super Admin access required'}), 403
+
+
+@login_required
+def list_profiles():
+    if current_user.role != 'super_admin':
+        return _forbidden()
+    directory = _profile_dir()
+    profiles = []
+    for entry in os.scandir(directory):
+        if not _NAME.match(entry.name):
+            continue
+        stat = entry.stat()
+        profiles.append({
+            'name':    entry.name,
+            'kind':    'pyinstrument' if entry.name.endswith('.html') else 'cprofile',
+            'size':    stat.st_size,
+            'created': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(timespec='seconds'),
+        })
+    profiles.sort(key=lambda p: p['name'], reverse=True)
+    return jsonify({'directory': directory, 'max_files': current_app.config.get('PROFILE_MAX_FILES', 50),
+                    'profiles': profiles})
+
+
+@login_required
+def profile_file(name):
+    if current_user.role != 'super_admin':
+        return _forbidden()
+    directory = _profile_dir()
+    if not _NAME.match(name) or not os.path.isfile(os.path.join(directory, name)):
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.method == 'DELETE':
+        os.remove(os.path.join(directory, name))
+        return jsonify({'deleted': name})
+    return send_from_directory(directory, name, as_attachment=name.endswith('.pstats'))
+
+
+def init_app(app):
+    from app import csrf
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_teardown)
+    # JSON admin endpoints like the rest of /api: exempt from CSRF as api_bp is
+    app.add_url_rule('/api/_debug/profiles', 'profiles', list_profiles)
+    app.add_url_rule('/api/_debug/profiles/<name>', 'profile_file', csrf.exempt(profile_file),
+                     methods=['GET', 'DELETE'])
@@ -0,0 +1,105 @@
+"""
+Per-request SQL accounting.
+
+before/after_cursor_execute listeners on every Engine count the statements a
+request runs and the time spent in them. Outside a request (CLI commands, the
+scan upload worker) nothing is recorded.
+
+Query budgets catch N+1 regressions: QUERY_BUDGETS maps an endpoint name to
+the most statements it may run (QUERY_BUDGET_DEFAULT applies to the rest,
+None = unlimited). Budgets are enforced only in debug and testing —
+QUERY_BUDGET_MODE 'raise' turns an overrun into QueryBudgetExceeded, 'log'
+writes a warning with the statements; unset means raise under TESTING and log
+under DEBUG.
+"""
+
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    """An endpoint ran more SQL statements than its budget allows."""
+
+
+class QueryStats:
+    """Statements run by one request."""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+def current():
+    """QueryStats for the active request, or None outside one."""
+    if not has_request_context():
+        return None
+    return g.get('query_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current() is not None:
+        context._ohms_query_started = time.perf_counter()   # per statement, so a failed one leaves nothing behind
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current()
+    started = getattr(context, '_ohms_query_started', None)
+    if stats is not None and started is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+def _budget_mode(app):
+    mode = app.config.get('QUERY_BUDGET_MODE')
+    if mode:
+        return mode
+    if app.testing:
+        return 'raise'
+    if app.debug:
+        return 'log'
+    return 'off'
+
+
+def budget_for(endpoint):
+    budgets = current_app.config.get('QUERY_BUDGETS') or {}
+    return budgets.get(endpoint, current_app.config.get('QUERY_BUDGET_DEFAULT'))
+
+
+def _start():
+    g.query_stats = QueryStats(keep_statements=_budget_mode(current_app) != 'off')
+
+
+def _check_budget(response):
+    stats = current()
+    mode = _budget_mode(current_app)
+    if stats is None or mode == 'off' or request.endpoint is None:
+        return response
+    budget = budget_for(request.endpoint)
+    if budget is None or stats.count <= budget:
+        return response
+
+    repeated = Counter(stats.statements).most_common(3)
+    detail = '\n'.join(f"  {n}× {' '.join(sql.split())}" for sql, n in repeated)
+    message = f'{request.endpoint} ran {stats.count} queries (budget {budget}); most repeated:\n{detail}'
+    if mode == 'raise':
+        raise QueryBudgetExceeded(message)
+    current_app.logger.warning(message)
+    return response
+
+
+def init_app(app):
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start)
+    app.after_request(_check_budget)
@@ -0,0 +1,51 @@
+"""
+Server-Timing response header, e.g.
+
+    Server-Timing: db;dur=12.4;desc="7 queries", serialize;dur=3.1, total;dur=41.0
+
+db is time inside SQL statements (see queries), serialize is time spent in
+the JSON provider building response bodies, total runs from the telemetry
+before_request hook to after_request. Browser dev tools show these under the request's Timing tab.
+Turned off with SERVER_TIMING = False.
+"""
+
+import functools
+import time
+
+from flask import g, has_request_context
+
+from app.telemetry import queries
+
+
+def _timed_json_response(response):
+    @functools.wraps(response)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return response(*args, **kwargs)
+        finally:
+            if has_request_context():
+                g.serialize_seconds = g.get('serialize_seconds', 0.0) + time.perf_counter() - started
+    return wrapper
+
+
+def _header(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    parts = []
+    stats = queries.current()
+    if stats is not None:
+        parts.append(f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+    parts.append(f"serialize;dur={g.get('serialize_seconds', 0.0) * 1000:.1f}")
+    parts.append(f'total;dur={total * 1000:.1f}')
+    response.headers.add('Server-Timing', ', '.join(parts))
+    return response
+
+
+def init_app(app):
+    if not app.config.get('SERVER_TIMING', True):
+        return
+    app.json.response = _timed_json_response(app.json.response)
+    app.after_request(_header)
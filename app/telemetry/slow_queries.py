@@ -0,0 +1,148 @@
+"""
+Slow-query log  —  GET /api/_debug/slow-queries  (super admin only)
+
+Statements slower than SLOW_QUERY_MS go into a ring buffer of the last
+SLOW_QUERY_BUFFER entries, held in memory by each worker process (so a
+gunicorn scrape shows that worker's view only). Each entry records:
+
+  sql          statement text, whitespace-collapsed
+  params       shape of the bound parameters — types, never values
+  duration_ms
+  endpoint     request endpoint, method and path (None outside a request)
+  caller       first stack frame under app/ — the ORM call that ran it
+
+DELETE on the same URL empties the buffer. SLOW_QUERY_BUFFER = 0 turns the
+hooks off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import current_app, has_app_context, has_request_context, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_DIR = os.path.join(_APP_DIR, 'telemetry')
+_ROOT_DIR = os.path.dirname(_APP_DIR)
+_MAX_SQL = 4000
+
+
+class SlowQueryLog:
+    """Bounded, thread-safe buffer of slow statements."""
+
+    def __init__(self, capacity):
+        self.entries = deque(maxlen=capacity)
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(reversed(self.entries)), self.recorded
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.recorded = 0
+
+
+def _log():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('slow_queries')
+
+
+def _shape(parameters, executemany=False):
+    """Types of the bound parameters, so the log never holds personal data."""
+    if executemany:
+        rows = list(parameters or [])
+        return {'rows': len(rows), 'each': _shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def _caller():
+    """First frame in application code, skipping this package."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and not filename.startswith(_SKIP_DIR):
+            return f'{os.path.relpath(filename, _ROOT_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _log() is not None:
+        context._ohms_slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _log()
+    started = getattr(context, '_ohms_slow_query_started', None)
+    if log is None or started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < current_app.config.get('SLOW_QUERY_MS', 250):
+        return
+
+    entry = {
+        'at':          datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'duration_ms': round(duration_ms, 2),
+        'sql':         ' '.join(statement.split())[:_MAX_SQL],
+        'params':      _shape(parameters, executemany),
+        'endpoint':    None,
+        'method':      None,
+        'path':        None,
+        'caller':      _caller(),
+    }
+    if has_request_context():
+        entry.update(endpoint=request.endpoint, method=request.method, path=request.path)
+    log.add(entry)
+
+
+@login_required
+def slow_queries_view():
+    if current_user.role != 'super_admin':
+        return jsonify({'error': 'Super Admin access required'}), 403
+    log = current_app.extensions.get('slow_queries')
+    if log is None:
+        return jsonify({'error': 'Slow-query log is disabled (SLOW_QUERY_BUFFER = 0)'}), 404
+    if request.method == 'DELETE':
+        log.clear()
+        return jsonify({'cleared': True})
+    entries, recorded = log.snapshot()
+    return jsonify({
+        'threshold_ms': current_app.config.get('SLOW_QUERY_MS', 250),
+        'capacity':     log.entries.maxlen,
+        'recorded':     recorded,
+        'pid':          os.getpid(),
+        'queries':      entries,
+    })
+
+
+def init_app(app):
+    from app import csrf
+    capacity = app.config.get('SLOW_QUERY_BUFFER', 200)
+    # JSON admin endpoint like the rest of /api: exempt from CSRF as api_bp is
+    app.add_url_rule('/api/_debug/slow-queries', 'slow_queries', csrf.exempt(slow_queries_view),
+                     methods=['GET', 'DELETE'])
+    if not capacity:
+        return
+    app.extensions['slow_queries'] = SlowQueryLog(capacity)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,11 @@
+"""
+Performance benchmarks — run from the repository root, e.g.
+
+    python -m benchmarks.json_providers --rows 10000
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.generator
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.driver --output before.json
+    python -m benchmarks.compare before.json after.json
+
+Not part of the test suite; results are printed as JSON so runs can be diffed.
+"""
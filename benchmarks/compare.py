@@ -0,0 +1,46 @@
+"""
+Compare two benchmarks.driver reports.
+
+    python -m benchmarks.compare before.json after.json
+
+Prints p50 / p95 / p99 per endpoint with the relative change; endpoints
+present in only one report are listed at the end.
+"""
+
+import argparse
+import json
+
+
+def _load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report['meta'], {r['path']: r for r in report['endpoints']}
+
+
+def _delta(before, after):
+    if not before:
+        return '     n/a'
+    return f'{(after - before) / before * 100:+7.1f}%'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args(argv)
+
+    meta_a, a = _load(args.before)
+    meta_b, b = _load(args.after)
+    print(f"{meta_a.get('commit') or args.before} → {meta_b.get('commit') or args.after}\n")
+    print(f"{'endpoint':<40} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17}")
+    for path in sorted(a.keys() & b.keys()):
+        cols = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            cols.append(f'{b[path][key]:>8.2f} {_delta(a[path][key], b[path][key])}')
+        print(f'{path:<40} ' + ' '.join(cols))
+    for path in sorted(a.keys() ^ b.keys()):
+        print(f"{path:<40} only in {'before' if path in a else 'after'}")
+
+
+if __name__ == '__main__':
+    main()
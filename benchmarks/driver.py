@@ -0,0 +1,215 @@
+"""
+Load driver — hits every parameterless GET under /api (DMPR exports included)
+and reports latency percentiles and throughput as JSON.
+
+In process, through the Flask test client (uses DATABASE_URL):
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.driver --requests 50
+
+Against a running server (e.g. gunicorn -w 4 run:app):
+
+    python -m benchmarks.driver --url http://127.0.0.1:8000 --concurrency 8 --output before.json
+
+Logs in once as --user (default: the first tenant admin made by
+benchmarks.generator; super-admin-only endpoints then count as 403 errors —
+use root@bench.test to time those too). Each endpoint gets one warm-up request, then
+--requests timed ones spread over --concurrency threads. Compare two runs with
+`python -m benchmarks.compare before.json after.json`.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SKIP_PREFIXES = ('/api/_debug',)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))   # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def api_get_paths(app):
+    """Every GET rule under /api without URL parameters."""
+    paths = set()
+    for rule in app.url_map.iter_rules():
+        if ('GET' in rule.methods and not rule.arguments and rule.rule.startswith('/api/')
+                and not rule.rule.startswith(SKIP_PREFIXES)):
+            paths.add(rule.rule)
+    return sorted(paths)
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class TestClientTarget:
+    """In-process Flask test client; one client per thread sharing one login."""
+
+    name = 'test-client'
+
+    def __init__(self, user, password):
+        from app import create_app
+        self.app = create_app()
+        self._local = threading.local()
+        client = self.app.test_client()
+        r = client.post('/api/auth/login', json={'email': user, 'password': password})
+        if r.status_code != 200:
+            raise SystemExit(f'Login as {user} failed: {r.status_code} {r.get_data(as_text=True)}')
+        self._session = client.get_cookie(self.app.config.get('SESSION_COOKIE_NAME', 'session'))
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self.app.test_client()
+            client.set_cookie(self._session.key, self._session.value)
+            self._local.client = client
+        return client
+
+    def paths(self):
+        return api_get_paths(self.app)
+
+    def get(self, path):
+        r = self._client().get(path, headers={'Accept-Encoding': 'gzip, br'})
+        return r.status_code, len(r.data)
+
+
+class HttpTarget:
+    """Real server over HTTP; threads share one (thread-safe) cookie jar."""
+
+    name = 'http'
+
+    def __init__(self, base_url, user, password):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        body = json.dumps({'email': user, 'password': password}).encode()
+        req = urllib.request.Request(f'{self.base_url}/api/auth/login', data=body,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            self.opener.open(req).read()
+        except urllib.error.HTTPError as exc:
+            raise SystemExit(f'Login as {user} failed: {exc.code}')
+
+    def paths(self):
+        # Only the URL map is needed; don't require a database on the load-generating host.
+        os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+        from app import create_app
+        return api_get_paths(create_app())
+
+    def get(self, path):
+        req = urllib.request.Request(f'{self.base_url}{path}', headers={'Accept-Encoding': 'gzip, br'})
+        try:
+            with self.opener.open(req) as resp:
+                return resp.status, len(resp.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, len(exc.read())
+
+
+# ---------------------------------------------------------------------------
+# Run
+# ---------------------------------------------------------------------------
+
+def measure(target, path, requests, concurrency):
+    target.get(path)   # warm-up: caches, connection, first-request compression
+
+    def one(_):
+        started = time.perf_counter()
+        status, size = target.get(path)
+        return time.perf_counter() - started, status, size
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - wall_started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if s[1] >= 400)
+    return {
+        'path':       path,
+        'requests':   requests,
+        'errors':     errors,
+        'status':     sorted({s[1] for s in samples}),
+        'bytes':      samples[-1][2],
+        'p50_ms':     round(percentile(latencies, 50), 2),
+        'p95_ms':     round(percentile(latencies, 95), 2),
+        'p99_ms':     round(percentile(latencies, 99), 2),
+        'mean_ms':    round(sum(latencies) / len(latencies), 2),
+        'throughput_rps': round(requests / wall, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(target, requests=20, concurrency=1, only=None):
+    paths = [p for p in target.paths() if not only or any(o in p for o in only)]
+    results = []
+    for path in paths:
+        result = measure(target, path, requests, concurrency)
+        print(f"  {path:<40} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"{result['throughput_rps']:>8.1f} req/s", file=sys.stderr)
+        results.append(result)
+    total_requests = sum(r['requests'] for r in results)
+    return {
+        'meta': {
+            'commit':      _git_commit(),
+            'timestamp':   datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'target':      target.name,
+            'python':      platform.python_version(),
+            'requests_per_endpoint': requests,
+            'concurrency': concurrency,
+        },
+        'summary': {
+            'endpoints': len(results),
+            'requests':  total_requests,
+            'errors':    sum(r['errors'] for r in results),
+        },
+        'endpoints': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='base URL of a running server; omit to use the Flask test client')
+    parser.add_argument('--user', default='admin1@bench.test')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--requests', type=int, default=20, help='timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--only', action='append', help='substring filter on paths (repeatable)')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        target = HttpTarget(args.url, args.user, args.password)
+    else:
+        target = TestClientTarget(args.user, args.password)
+    report = run(target, args.requests, args.concurrency, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
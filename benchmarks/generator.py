@@ -0,0 +1,288 @@
+"""
+Deterministic synthetic tenant generator — production-sized data for load tests.
+
+    DATABASE_URL=postgresql://.../ohms_bench \\
+    python -m benchmarks.generator --operations 20 --employees 100000 --readings 1000000
+
+Creates N operations, each with a tenant admin (admin<n>@bench.test) and its
+own stressors, HEGs, sampling schedules, employees, exposure readings (each
+linked to 1–3 employees), medical records, field sheets and lab results, plus
+one super admin (root@bench.test). Every password is "benchmark". Counts are
+totals spread evenly over the operations; the same --seed and --today give
+the same rows.
+
+Rows go in through batched executemany INSERTs with explicit ids, so a
+million readings load in minutes rather than hours. Run it against an empty
+database — ids start after whatever is already there, but nothing else
+checks for existing benchmark data.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+
+from app import create_app, db, bcrypt
+from app.models import Operation, User
+from app.employees.models import Employee, employee_stressor
+from app.schedules.models import (
+    Stressor, HEG, SamplingSchedule, ExposureReading, EmployeeExposure, MedicalRecord,
+    FieldSheet, LabResult, calculate_next_due, oel_ratio,
+)
+
+PASSWORD = 'benchmark'
+BATCH = 10_000
+
+STRESSORS = [
+    # name, category, oel, unit, default frequency
+    ('Noise',                     'Physical', 85.0,  'dB(A)', 'Annually'),
+    ('Respirable dust',           'Chemical', 3.0,   'mg/m³', 'Bi-Annually'),
+    ('Inhalable dust',            'Chemical', 10.0,  'mg/m³', 'Annually'),
+    ('Manganese',                 'Chemical', 0.2,   'mg/m³', 'Quarterly'),
+    ('Respirable crystalline silica', 'Chemical', 0.1, 'mg/m³', 'Quarterly'),
+    ('Diesel particulate matter', 'Chemical', 0.16,  'mg/m³', 'Bi-Annually'),
+    ('Whole body vibration',      'Physical', 0.5,   'm/s²',  'Annually'),
+    ('Heat stress',               'Physical', 30.0,  '°C WBGT', 'Annually'),
+    ('Illumination',              'Physical', 200.0, 'lux',   'Annually'),
+    ('Carbon monoxide',           'Chemical', 30.0,  'ppm',   'Quarterly'),
+]
+DEPARTMENTS = ['Mining', 'Processing', 'Engineering', 'Exploration', 'Services']
+JOBS = ['Driller', 'Blaster', 'Fitter', 'Electrician', 'Boilermaker', 'Plant Worker', 'Pit Worker',
+        'Driver: Bulldozer', 'Driver: Grader', 'Millwright', 'Instrument Technician', 'Supervisor']
+AREAS = ['Opencast Pit', 'Crusher', 'Screening Plant', 'Stockpile', 'Workshop', 'Laboratory']
+FREQUENCIES = ['Monthly', 'Quarterly', 'Bi-Annually', 'Annually']
+TESTS = ['Audiometry', 'Spirometry', 'Chest X-ray', 'Blood manganese', 'Vision screening']
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+
+
+class Ids:
+    """Hands out explicit primary keys, starting after the table's current max."""
+
+    def __init__(self, model):
+        self.next = (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def take(self):
+        value, self.next = self.next, self.next + 1
+        return value
+
+
+def _insert(target, rows, label=None):
+    """Batched executemany INSERT; `rows` may be any iterable of dicts."""
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            db.session.execute(insert(target), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(target), batch)
+        total += len(batch)
+    db.session.commit()
+    if label:
+        print(f'  {label:<18} {total:>10,}', file=sys.stderr)
+    return total
+
+
+def _fix_sequences():
+    """Explicit ids leave PostgreSQL sequences behind; move them past the new rows."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('operation', 'user', 'stressor', 'heg', 'sampling_schedule', 'employee',
+                  'exposure_reading', 'employee_exposure', 'medical_record', 'field_sheet', 'lab_result'):
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{table}\"), 1))"
+        ))
+    db.session.commit()
+
+
+def _spread(total, parts):
+    """Split `total` into `parts` near-equal integers."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def generate(operations=2, employees=2_000, readings=20_000, field_sheets=5_000, lab_results=5_000,
+             hegs_per_operation=30, medical_per_employee=1, seed=42, today=None):
+    rng = random.Random(seed)
+    today = today or date.today()
+    started = time.perf_counter()
+    password_hash = bcrypt.generate_password_hash(PASSWORD).decode('utf-8')
+
+    ids = {model: Ids(model) for model in (
+        Operation, User, Stressor, HEG, SamplingSchedule, Employee, ExposureReading,
+        EmployeeExposure, MedicalRecord, FieldSheet, LabResult,
+    )}
+    counts = {}
+
+    # ── Operations and users ────────────────────────────────────────────────
+    op_ids = [ids[Operation].take() for _ in range(operations)]
+    counts['operations'] = _insert(Operation, (
+        dict(id=op_id, operation_name=f'Bench Operation {n + 1}', code=f'B{n + 1:03d}',
+             location='Northern Cape', status='active')
+        for n, op_id in enumerate(op_ids)
+    ), 'operations')
+    users = [dict(id=ids[User].take(), username='bench_root', email='root@bench.test',
+                  password_hash=password_hash, role='super_admin', operation_id=None)]
+    users += [dict(id=ids[User].take(), username=f'bench_admin{n + 1}', email=f'admin{n + 1}@bench.test',
+                   password_hash=password_hash, role='admin', operation_id=op_id)
+              for n, op_id in enumerate(op_ids)]
+    counts['users'] = _insert(User, users, 'users')
+
+    # ── Per-tenant reference data ───────────────────────────────────────────
+    stressors, hegs = {}, {}
+    stressor_rows, heg_rows, schedule_rows = [], [], []
+    for op_id in op_ids:
+        stressors[op_id] = []
+        for name, category, oel, unit, frequency in STRESSORS:
+            sid = ids[Stressor].take()
+            stressors[op_id].append((sid, oel, unit))
+            stressor_rows.append(dict(id=sid, name=name, category=category, oel_value=oel, oel_unit=unit,
+                                      oel_reference='MHSA Reg. 22.9', default_frequency=frequency,
+                                      is_active=True, operation_id=op_id))
+        hegs[op_id] = []
+        for h in range(hegs_per_operation):
+            hid = ids[HEG].take()
+            job = rng.choice(JOBS)
+            hegs[op_id].append((hid, f'HEG-{h + 1:02d}', job))
+            heg_rows.append(dict(id=hid, heg_number=f'HEG-{h + 1:02d}', job_title=job,
+                                 department=rng.choice(DEPARTMENTS),
+                                 risk_level=rng.choice(['Low', 'Moderate', 'High']),
+                                 occupations=rng.sample(JOBS, 3), operation_id=op_id))
+            for sid, _oel, _unit in rng.sample(stressors[op_id], 4):
+                frequency = rng.choice(FREQUENCIES)
+                last = today - timedelta(days=rng.randrange(400))
+                due = calculate_next_due(last, frequency)
+                status = 'Overdue' if due < today else ('Due' if (due - today).days <= 30 else 'Upcoming')
+                schedule_rows.append(dict(id=ids[SamplingSchedule].take(), heg_id=hid, stressor_id=sid,
+                                          sampling_type='Personal', frequency=frequency,
+                                          last_sampled_date=last, next_sample_due=due, status=status,
+                                          operation_id=op_id))
+    counts['stressors'] = _insert(Stressor, stressor_rows, 'stressors')
+    counts['hegs'] = _insert(HEG, heg_rows, 'hegs')
+    counts['schedules'] = _insert(SamplingSchedule, schedule_rows, 'schedules')
+
+    # ── Employees (with direct stressor assignments) ────────────────────────
+    employees_by_op = {}
+    employee_rows, assignment_rows = [], []
+    for op_id, n in zip(op_ids, _spread(employees, operations)):
+        employees_by_op[op_id] = []
+        for _ in range(n):
+            eid = ids[Employee].take()
+            hid, heg_number, job = rng.choice(hegs[op_id])
+            employees_by_op[op_id].append((eid, heg_number, job))
+            employee_rows.append(dict(id=eid, name=f'Employee {eid:07d}', job_title=job,
+                                      department=rng.choice(DEPARTMENTS), heg_number=heg_number,
+                                      is_active=rng.random() > 0.03, operation_id=op_id))
+            for sid, _oel, _unit in rng.sample(stressors[op_id], 2):
+                assignment_rows.append(dict(employee_id=eid, stressor_id=sid))
+    counts['employees'] = _insert(Employee, employee_rows, 'employees')
+    _insert(employee_stressor, assignment_rows)
+    del employee_rows, assignment_rows
+
+    # ── Exposure readings (streamed — the biggest table) ────────────────────
+    links = []
+
+    def reading_rows():
+        for op_id, n in zip(op_ids, _spread(readings, operations)):
+            staff = employees_by_op[op_id]
+            for _ in range(n):
+                rid = ids[ExposureReading].take()
+                sid, oel, unit = rng.choice(stressors[op_id])
+                value = round(oel * rng.lognormvariate(-0.7, 0.8), 4)
+                yield dict(id=rid, stressor_id=sid, location=rng.choice(AREAS), measured_value=value,
+                           oel_value=oel, oel_unit=unit, exceedance_ratio=oel_ratio(value, oel),
+                           date=today - timedelta(days=rng.randrange(730)), operation_id=op_id)
+                if staff:
+                    for eid, _h, _j in rng.sample(staff, min(len(staff), rng.randint(1, 3))):
+                        links.append(dict(id=ids[EmployeeExposure].take(), reading_id=rid, employee_id=eid))
+
+    counts['readings'] = _insert(ExposureReading, reading_rows(), 'readings')
+    counts['exposure_links'] = _insert(EmployeeExposure, links, 'exposure links')
+    del links
+
+    # ── Medical records ─────────────────────────────────────────────────────
+    def medical_rows():
+        for op_id in op_ids:
+            for eid, _h, _j in employees_by_op[op_id]:
+                for _ in range(medical_per_employee):
+                    last = today - timedelta(days=rng.randrange(500))
+                    due = last + timedelta(days=365)
+                    yield dict(id=ids[MedicalRecord].take(), employee_id=eid,
+                               stressor_id=rng.choice(stressors[op_id])[0], test_name=rng.choice(TESTS),
+                               last_done=last, next_due=due, result='Fit',
+                               status='overdue' if due < today else 'scheduled', operation_id=op_id)
+
+    counts['medical_records'] = _insert(MedicalRecord, medical_rows(), 'medical records')
+
+    # ── Field sheets and lab results ────────────────────────────────────────
+    def field_sheet_rows():
+        for op_id, n in zip(op_ids, _spread(field_sheets, operations)):
+            staff = employees_by_op[op_id] or [(0, 'HEG-01', 'Driller')]
+            for _ in range(n):
+                eid, heg_number, job = rng.choice(staff)
+                day = today - timedelta(days=rng.randrange(730))
+                yield dict(id=ids[FieldSheet].take(), created_at=datetime.combine(day, datetime.min.time()),
+                           mine_site=f'Bench Mine {op_id}', heg=heg_number,
+                           sampling_quarter=QUARTERS[(day.month - 1) // 3], employee_name=f'Employee {eid:07d}',
+                           coy_number=f'C{eid}', job_title=job, company_name='Bench Mining', sampling_date=day,
+                           shift_sampled='Day', sampling_type=rng.choice(['noise', 'dust', 'both']),
+                           noise_dbadge_serial=f'DB{rng.randrange(50):03d}', noise_run_time=rng.randint(420, 540),
+                           noise_laeq=round(rng.uniform(70, 105), 1),
+                           air_contaminant='Mn / SiO2 / PNOC', air_pump_serial=f'P{rng.randrange(50):03d}',
+                           activity_area=rng.choice(AREAS), occupation_group=job,
+                           result_mn_twa=round(rng.lognormvariate(-3.2, 0.9), 4),
+                           result_si_twa=round(rng.lognormvariate(-4.0, 0.8), 4),
+                           result_pnoc_twa=round(rng.lognormvariate(0.3, 0.7), 3),
+                           operation_id=op_id)
+
+    counts['field_sheets'] = _insert(FieldSheet, field_sheet_rows(), 'field sheets')
+
+    def lab_result_rows():
+        for op_id, n in zip(op_ids, _spread(lab_results, operations)):
+            for _ in range(n):
+                day = today - timedelta(days=rng.randrange(730))
+                yield dict(id=ids[LabResult].take(), sampling_date=day,
+                           sampling_quarter=QUARTERS[(day.month - 1) // 3], activity_area=rng.choice(AREAS),
+                           occupation=rng.choice(JOBS), result_mn_twa=round(rng.lognormvariate(-3.2, 0.9), 4),
+                           result_si_twa=round(rng.lognormvariate(-4.0, 0.8), 4),
+                           result_pnoc_twa=round(rng.lognormvariate(0.3, 0.7), 3),
+                           shift_duration=rng.choice([8, 9, 10, 12]), sampling_duration=rng.randint(380, 700),
+                           survey_ref=f'SV{rng.randrange(1000):04d}', operation_id=op_id)
+
+    counts['lab_results'] = _insert(LabResult, lab_result_rows(), 'lab results')
+
+    _fix_sequences()
+    counts['seconds'] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--operations', type=int, default=2)
+    parser.add_argument('--employees', type=int, default=2_000, help='total across operations')
+    parser.add_argument('--readings', type=int, default=20_000, help='total exposure readings')
+    parser.add_argument('--field-sheets', type=int, default=5_000)
+    parser.add_argument('--lab-results', type=int, default=5_000)
+    parser.add_argument('--hegs-per-operation', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--today', type=date.fromisoformat, default=None,
+                        help='anchor date for generated dates (YYYY-MM-DD); defaults to today')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        print(f"Generating into {db.engine.url.render_as_string(hide_password=True)}", file=sys.stderr)
+        counts = generate(args.operations, args.employees, args.readings, args.field_sheets,
+                          args.lab_results, args.hegs_per_operation, seed=args.seed, today=args.today)
+    json.dump(counts, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
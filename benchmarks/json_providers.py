@@ -0,0 +1,68 @@
+"""
+Compare the stdlib and orjson JSON providers on large list payloads.
+
+    python -m benchmarks.json_providers [--rows 10000] [--repeat 7]
+
+Each provider builds a full jsonify response for 10k field sheets and 10k
+sampling schedules; the best of --repeat runs is reported with the body size.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from flask import Flask
+
+from app.json_provider import IsoJSONProvider, OrjsonProvider, orjson
+from benchmarks import payloads
+
+
+def _best(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(rows=10_000, repeat=7):
+    app = Flask(__name__)
+    providers = {'default': IsoJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+
+    data = {'field_sheets': payloads.field_sheets(rows), 'schedules': payloads.schedules(rows)}
+    results = []
+    with app.app_context():
+        for payload, obj in data.items():
+            for name, provider in providers.items():
+                body = provider.response(obj).get_data()
+                seconds = _best(lambda: provider.response(obj), repeat)
+                results.append({
+                    'payload':  payload,
+                    'rows':     rows,
+                    'provider': name,
+                    'ms':       round(seconds * 1000, 2),
+                    'bytes':    len(body),
+                })
+            reference = json.loads(providers['default'].response(obj).get_data())
+            for name, provider in providers.items():
+                assert json.loads(provider.response(obj).get_data()) == reference, f'{name} output differs'
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args(argv)
+    if orjson is None:
+        print('orjson is not installed — reporting the stdlib provider only', file=sys.stderr)
+    json.dump(run(args.rows, args.repeat), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
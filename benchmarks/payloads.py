@@ -0,0 +1,71 @@
+"""
+Synthetic API payloads built from transient model instances (no database).
+
+The rows go through the real to_dict() methods, so a benchmark sees exactly
+the mix of strings, numbers, booleans, None and dates the API returns.
+Generation is seeded, so every run serializes the same data.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import app.models, app.employees.models, app.scans.models  # noqa: F401 — every mapper must be registered
+from app.schedules.models import FieldSheet, HEG, Stressor, SamplingSchedule
+
+_SITES       = ['UMK Mine', 'Tshipi', 'Kalagadi', 'Mamatwan']
+_JOBS        = ['Driller', 'Blaster', 'Fitter', 'Electrician', 'Operator', 'Boilermaker', 'Sampler']
+_FREQUENCIES = ['Monthly', 'Quarterly', 'Bi-Annually', 'Annually']
+_STRESSORS   = [('Noise', 'Physical', 85.0, 'dB(A)'), ('Respirable dust', 'Chemical', 3.0, 'mg/m³'),
+                ('Manganese', 'Chemical', 0.2, 'mg/m³'), ('Crystalline silica', 'Chemical', 0.1, 'mg/m³'),
+                ('Whole body vibration', 'Physical', 0.5, 'm/s²')]
+
+
+def field_sheets(n, seed=1):
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        day = start + timedelta(days=rng.randrange(540))
+        sheet = FieldSheet(
+            id=i + 1,
+            created_at=datetime(2025, 1, 1, 6, 30) + timedelta(minutes=rng.randrange(800_000)),
+            mine_site=rng.choice(_SITES), heg=f'HEG-{rng.randrange(1, 60):02d}',
+            sampling_quarter=f'Q{(day.month - 1) // 3 + 1}', survey_number=f'S{rng.randrange(10_000):05d}',
+            employee_name=f'Employee {rng.randrange(5_000)}', coy_number=f'C{rng.randrange(90_000)}',
+            job_title=rng.choice(_JOBS), company_name='UMK', sampling_date=day, shift_sampled='Day',
+            purpose='Routine compliance monitoring',
+            weather_dry=True, weather_hot=rng.random() < 0.4, wind_speed='Gentle',
+            brief_1=True, brief_2=True, brief_3=True, brief_4=True, brief_5=True, brief_6=rng.random() < 0.9,
+            noise_dbadge_serial=f'DB{rng.randrange(100):03d}', noise_cal_date=day - timedelta(days=1),
+            noise_time_on='06:10', noise_time_off='14:05', noise_run_time=475,
+            noise_laeq=round(rng.uniform(70, 105), 1),
+            air_contaminant='Mn / SiO2 / PNOC', air_pump_serial=f'P{rng.randrange(100):03d}',
+            air_pre_cal_flow=2.2, air_post_cal_flow=round(rng.uniform(2.0, 2.3), 2), air_run_time=470,
+            sampled_by='Hygienist', sampled_date=day, sampling_type=rng.choice(['noise', 'dust', 'both']),
+            result_mn_twa=round(rng.lognormvariate(-3, 1), 4), result_si_twa=None,
+            operation_id=1,
+        )
+        rows.append(sheet.to_dict())
+    return rows
+
+
+def schedules(n, seed=2):
+    rng = random.Random(seed)
+    hegs = [HEG(id=h + 1, heg_number=f'HEG-{h + 1:02d}', job_title=rng.choice(_JOBS),
+                department='Mining', risk_level=rng.choice(['Low', 'Moderate', 'High']))
+            for h in range(60)]
+    stressors = [Stressor(id=s + 1, name=name, category=cat, oel_value=oel, oel_unit=unit,
+                          oel_reference='OHS Act')
+                 for s, (name, cat, oel, unit) in enumerate(_STRESSORS)]
+    rows = []
+    for i in range(n):
+        heg, stressor = rng.choice(hegs), rng.choice(stressors)
+        last = date(2025, 1, 1) + timedelta(days=rng.randrange(540))
+        schedule = SamplingSchedule(
+            id=i + 1, heg=heg, heg_id=heg.id, stressor=stressor, stressor_id=stressor.id,
+            occupation=rng.choice(_JOBS), sampling_type='Personal', frequency=rng.choice(_FREQUENCIES),
+            last_sampled_date=last, next_sample_due=last + timedelta(days=rng.choice([30, 91, 182, 365])),
+            remarks=None,
+        )
+        rows.append(schedule.to_dict())
+    return rows
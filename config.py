@@ -18,3 +18,67 @@ class Config:
     SENDGRID_FROM_EMAIL = os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@rodmon.co.za')
     APP_URL             = os.environ.get('APP_URL', 'http://localhost:5173')
 
+    # Field sheet scans — Cloudinary when the addon is configured, else local disk
+    SCAN_STORAGE       = os.environ.get('SCAN_STORAGE') or \
+                         ('cloudinary' if os.environ.get('CLOUDINARY_URL') else 'local')
+    SCAN_STORAGE_DIR   = os.environ.get('SCAN_STORAGE_DIR') or \
+                         os.path.join(os.path.dirname(__file__), 'instance', 'scans')
+    SCAN_SPOOL_DIR     = os.environ.get('SCAN_SPOOL_DIR') or \
+                         os.path.join(os.path.dirname(__file__), 'instance', 'scan_spool')
+    SCAN_UPLOAD_SYNC   = os.environ.get('SCAN_UPLOAD_SYNC', '').lower() in ('1', 'true', 'yes')
+    SCAN_MAX_DIMENSION = int(os.environ.get('SCAN_MAX_DIMENSION', 3508))   # A4 @ 300 dpi, long edge
+    SCAN_IMAGE_FORMAT  = os.environ.get('SCAN_IMAGE_FORMAT', 'webp')      # TIFF → webp | png
+    SCAN_THUMB_SIZE    = 240
+    SCAN_PREVIEW_SIZE  = 1200
+    SCAN_CHUNK_SIZE    = 2 * 1024 * 1024     # advertised to resumable-upload clients
+    SCAN_SESSION_TTL   = 24 * 3600           # seconds an idle upload session is kept
+    SCAN_MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+    SCAN_URL_TTL       = 3600                # signed local scan URLs stay valid 1–2 windows
+    SCAN_SENDFILE      = os.environ.get('SCAN_SENDFILE') or None   # x-sendfile | x-accel-redirect
+    SCAN_ACCEL_REDIRECT_PREFIX = os.environ.get('SCAN_ACCEL_REDIRECT_PREFIX', '/_scans/')
+
+    # Built React app (static/) — see app/assets.py
+    ASSET_MAX_AGE        = 3600              # seconds, for files without a content hash in the name
+    ASSET_BROTLI_QUALITY = int(os.environ.get('ASSET_BROTLI_QUALITY', 9))  # in-memory; `python -m app.assets` uses 11
+    ASSET_GZIP_LEVEL     = 9
+
+    # JSON API response compression — see app/api/compression.py
+    API_COMPRESSION          = os.environ.get('API_COMPRESSION', '1').lower() in ('1', 'true', 'yes')
+    API_COMPRESSION_MIN_SIZE = 1024          # bytes; smaller bodies aren't worth the CPU
+    API_GZIP_LEVEL           = int(os.environ.get('API_GZIP_LEVEL', 6))
+    API_BROTLI_QUALITY       = int(os.environ.get('API_BROTLI_QUALITY', 4))   # 0–11; dynamic content
+
+    # jsonify backend — 'auto' (orjson when installed), 'orjson' or 'default'; see app/json_provider.py
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # Response cache invalidated by per-table data versions — see app/cache.py
+    CACHE_ENABLED       = os.environ.get('CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    CACHE_MAX_ENTRIES   = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))     # per worker
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))   # seconds; /api/dashboard
+
+    # Request telemetry — see app/telemetry
+    SERVER_TIMING        = os.environ.get('SERVER_TIMING', '1').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET_MODE    = os.environ.get('QUERY_BUDGET_MODE') or None   # raise | log | off; default by DEBUG/TESTING
+    QUERY_BUDGET_DEFAULT = None              # statements per request for endpoints not listed below
+    QUERY_BUDGETS        = {                 # login user + the list query (+ one eager load)
+        'api.list_field_sheets':       3,
+        'api.list_employees':          3,
+        'api.list_stressors':          3,
+        'api.list_hegs':               3,
+        'api.list_sampling_schedules': 3,
+        'api.list_exposure_readings':  3,
+        'api.list_medical_records':    3,
+        'api.sampling_schedule_forecast': 2,
+        'api.exposure_reading_exceedances': 2,
+        'api.employee_exposure_profile': 4,   # + employee, data versions, profile join
+        'api.dashboard':               6,   # + data versions and four aggregates
+        'api.heg_statistics_endpoint': 6,   # + data versions, samples, stressor names (+ HEG/agent maps for lab results)
+        'api.en689_compliance':        6,   # + data versions, lab results, HEG/agent maps, stressors
+        'api.me':                      3,
+    }
+    METRICS_TOKEN        = os.environ.get('METRICS_TOKEN')   # Bearer token for /metrics scrapers
+    SLOW_QUERY_MS        = float(os.environ.get('SLOW_QUERY_MS', 250))   # statements at least this slow are kept
+    SLOW_QUERY_BUFFER    = int(os.environ.get('SLOW_QUERY_BUFFER', 200))  # entries per worker; 0 disables
+    PROFILE_DIR          = os.environ.get('PROFILE_DIR') or \
+                           os.path.join(os.path.dirname(__file__), 'instance', 'profiles')
+    PROFILE_MAX_FILES    = int(os.environ.get('PROFILE_MAX_FILES', 50))   # oldest profiles are deleted
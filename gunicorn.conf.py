@@ -0,0 +1,45 @@
+"""
+gunicorn settings — read automatically from the working directory
+(`gunicorn run:app`, see Procfile).
+
+Prometheus multiprocess mode: every worker writes its metric samples under
+PROMETHEUS_MULTIPROC_DIR so /metrics on any worker reports the sum across
+all of them (app/telemetry/metrics.py). The directory is emptied when the
+master starts and a dead worker's live gauges are dropped. With METRICS_PORT
+set the master also serves the aggregate on that port, for a scraper on a
+private network.
+"""
+
+import os
+import shutil
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join('/tmp', 'ohms-prometheus'))
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def when_ready(server):
+    port = os.environ.get('METRICS_PORT')
+    if not port:
+        return
+    try:
+        from prometheus_client import CollectorRegistry, start_http_server, multiprocess
+    except ImportError:
+        server.log.warning('METRICS_PORT set but prometheus_client is not installed')
+        return
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(int(port), registry=registry)
+    server.log.info(f'Serving Prometheus metrics on :{port}')
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,37 @@
+r"""
+Seed helpers shared by the test modules. Each module keeps its own `app`
+fixture and adds its request-specific data on top of these.
+
+    from conftest import add_operation, add_stressor, add_heg, login
+"""
+
+from app import db
+from app.models import Operation, User
+from app.schedules.models import HEG, Stressor
+
+
+def add_operation(code):
+    """Operation `code` with an admin user <code>@test.com / 'password' (flushed)."""
+    op = Operation(operation_name=f'Operation {code}', code=code, status='active')
+    db.session.add(op)
+    db.session.flush()
+    user = User(username=f'user_{code.lower()}', email=f'{code.lower()}@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add(user)
+    return op
+
+
+def add_stressor(op, name, category='Chemical', **fields):
+    stressor = Stressor(name=name, category=category, operation_id=op.id, **fields)
+    db.session.add(stressor)
+    return stressor
+
+
+def add_heg(op, heg_number, job_title='Driller', department='Mining', **fields):
+    heg = HEG(heg_number=heg_number, job_title=job_title, department=department, operation_id=op.id, **fields)
+    db.session.add(heg)
+    return heg
+
+
+def login(client, email='alpha@test.com', password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
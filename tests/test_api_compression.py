@@ -0,0 +1,131 @@
+r"""
+Tests for negotiated compression of JSON API responses.
+
+Run with:
+    python -m pytest tests/test_api_compression.py -v
+"""
+
+import gzip
+import json
+import pytest
+from flask import Response
+from app import create_app, db
+from app.api import api_bp, compression
+from app.models import User, Operation
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    compression.reset_stats()
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from app.schedules.models import FieldSheet
+
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    admin = User(username='root', email='root@test.com', role='super_admin')
+    admin.set_password('password')
+    user = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add_all([admin, user])
+    for i in range(40):
+        db.session.add(FieldSheet(employee_name=f'Employee {i}', mine_site='UMK', operation_id=op.id))
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+class TestApiCompression:
+    def test_gzip_when_accepted(self, client):
+        _login(client, 'alpha@test.com')
+        r = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in r.headers['Vary']
+        assert int(r.headers['Content-Length']) == len(r.data)
+        assert len(json.loads(gzip.decompress(r.data))) == 40
+
+    def test_brotli_preferred_unless_q_lower(self, client):
+        brotli = pytest.importorskip('brotli')
+        _login(client, 'alpha@test.com')
+        r = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip, br'})
+        assert r.headers['Content-Encoding'] == 'br'
+        assert len(json.loads(brotli.decompress(r.data))) == 40
+        r = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip, br;q=0.5'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+
+    def test_identity_without_accept_encoding(self, client):
+        _login(client, 'alpha@test.com')
+        r = client.get('/api/field-sheets')
+        assert 'Content-Encoding' not in r.headers
+        assert len(r.get_json()) == 40
+
+    def test_small_response_not_compressed(self, client):
+        r = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip'})   # 401 body
+        assert 'Content-Encoding' not in r.headers
+
+    def test_level_and_switch_configurable(self, app, client):
+        _login(client, 'alpha@test.com')
+        app.config['API_GZIP_LEVEL'] = 1
+        fast = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip'}).data
+        app.config['API_GZIP_LEVEL'] = 9
+        small = client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip'}).data
+        assert len(small) <= len(fast)
+        app.config['API_COMPRESSION'] = False
+        assert 'Content-Encoding' not in client.get(
+            '/api/field-sheets', headers={'Accept-Encoding': 'gzip'}).headers
+
+    def test_streamed_response_compressed_incrementally(self, app, client):
+        def rows():
+            for i in range(200):
+                yield json.dumps({'row': i}) + '\n'
+
+        app.view_functions['api.stream_test'] = lambda: Response(rows(), mimetype='application/x-ndjson')
+        app.url_map.add(app.url_rule_class('/api/_stream-test', endpoint='api.stream_test'))
+        r = client.get('/api/_stream-test', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in r.headers
+        assert gzip.decompress(r.data).count(b'\n') == 200
+
+    def test_stats_per_endpoint(self, client):
+        _login(client, 'alpha@test.com')
+        client.get('/api/field-sheets', headers={'Accept-Encoding': 'gzip'})
+        assert client.get('/api/_debug/compression').status_code == 403
+        client.post('/api/auth/logout')
+        _login(client, 'root@test.com')
+        rows = client.get('/api/_debug/compression').get_json()
+        row = next(r for r in rows if r['endpoint'] == 'api.list_field_sheets')
+        assert row['responses'] == 1
+        assert row['bytes_saved'] > 0
+        assert row['encodings'] == {'gzip': 1}
+
+    def test_compressed_cached_response_revalidates(self, app, client):
+        from app import cache
+        app.view_functions['api.cached_test'] = lambda: cache.json_response(
+            'cached-test', ('field_sheet',), lambda: [{'row': i} for i in range(200)])
+        app.url_map.add(app.url_rule_class('/api/_cached-test', endpoint='api.cached_test'))
+        r = client.get('/api/_cached-test', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        again = client.get('/api/_cached-test',
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': r.headers['ETag']})
+        assert again.status_code == 304
+        assert again.data == b''
+        identity = client.get('/api/_cached-test', headers={'If-None-Match': r.headers['ETag']})
+        assert identity.status_code == 200                  # the gzip ETag does not match the plain body
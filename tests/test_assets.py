@@ -0,0 +1,133 @@
+r"""
+Tests for SPA asset serving (manifest, precompression, cache headers).
+
+Run with:
+    python -m pytest tests/test_assets.py -v
+"""
+
+import gzip
+import pytest
+from app import create_app, db, assets
+
+BUNDLE = b'console.log("ohms");\n' * 400
+
+
+@pytest.fixture(scope='function')
+def app(tmp_path):
+    root = tmp_path / 'static'
+    (root / 'assets').mkdir(parents=True)
+    (root / 'index.html').write_text('<!doctype html><script type="module" crossorigin src="/assets/index-AbCd1234.js"></script>')
+    (root / 'assets' / 'index-AbCd1234.js').write_bytes(BUNDLE)
+    (root / 'favicon.svg').write_text('<svg/>')
+
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['ASSET_ROOT'] = str(root)
+    assets.init_app(application)
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class TestAssetServing:
+    def test_fingerprinted_bundle_is_immutable(self, client):
+        r = client.get('/assets/index-AbCd1234.js')
+        assert r.status_code == 200
+        assert r.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+        assert r.data == BUNDLE
+
+    def test_gzip_negotiated(self, client):
+        r = client.get('/assets/index-AbCd1234.js', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in r.headers['Vary']
+        assert gzip.decompress(r.data) == BUNDLE
+
+    def test_brotli_preferred(self, client):
+        brotli = pytest.importorskip('brotli')
+        r = client.get('/assets/index-AbCd1234.js', headers={'Accept-Encoding': 'gzip, br'})
+        assert r.headers['Content-Encoding'] == 'br'
+        assert brotli.decompress(r.data) == BUNDLE
+
+    def test_precompressed_file_used(self, app, client, tmp_path):
+        path = tmp_path / 'static' / 'assets' / 'index-AbCd1234.js.gz'
+        path.write_bytes(gzip.compress(b'shipped'))
+        assets.init_app(app)
+        r = client.get('/assets/index-AbCd1234.js', headers={'Accept-Encoding': 'gzip'})
+        assert gzip.decompress(r.data) == b'shipped'
+
+    def test_etag_revalidation(self, client):
+        r = client.get('/assets/index-AbCd1234.js', headers={'Accept-Encoding': 'gzip'})
+        again = client.get('/assets/index-AbCd1234.js',
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': r.headers['ETag']})
+        assert again.status_code == 304
+
+    def test_index_and_spa_routes_are_no_cache(self, client):
+        for path in ('/', '/field-sheets/12'):
+            r = client.get(path)
+            assert r.status_code == 200
+            assert r.headers['Cache-Control'] == 'no-cache'
+            assert b'<!doctype html>' in r.data
+
+    def test_missing_bundle_is_404(self, client):
+        assert client.get('/assets/index-Old00000.js').status_code == 404
+
+    def test_unhashed_file_short_cache(self, client):
+        r = client.get('/favicon.svg')
+        assert r.headers['Cache-Control'] == 'public, max-age=3600'
+
+    def test_api_routes_unaffected(self, client):
+        assert client.get('/api/field-sheets').status_code == 401
+
+
+class TestPreloadHints:
+    def test_link_header_from_index_html(self, client):
+        r = client.get('/')
+        assert r.headers['Link'] == '</assets/index-AbCd1234.js>; rel=modulepreload; crossorigin'
+        assert 'Link' not in client.get('/assets/index-AbCd1234.js').headers
+
+    def test_link_header_from_vite_manifest(self, app, client, tmp_path):
+        import json
+        root = tmp_path / 'static'
+        (root / '.vite').mkdir()
+        (root / '.vite' / 'manifest.json').write_text(json.dumps({
+            'index.html': {'file': 'assets/index-AbCd1234.js', 'isEntry': True,
+                           'css': ['assets/index-Css12345.css'],
+                           'imports': ['_vendor.js'], 'dynamicImports': ['src/Report.jsx']},
+            '_vendor.js': {'file': 'assets/vendor-Vend1234.js'},
+            'src/Report.jsx': {'file': 'assets/Report-Lazy1234.js', 'isDynamicEntry': True},
+        }))
+        assets.init_app(app)
+        assert client.get('/').headers['Link'] == (
+            '</assets/index-Css12345.css>; rel=preload; as=style; crossorigin, '
+            '</assets/index-AbCd1234.js>; rel=modulepreload; crossorigin, '
+            '</assets/vendor-Vend1234.js>; rel=modulepreload; crossorigin'
+        )
+        assert client.get('/.vite/manifest.json').headers['Cache-Control'] == 'no-cache'   # not exposed
+
+    def test_early_hints_sent_when_server_supports_them(self, client):
+        sent = []
+        client.get('/reports', environ_base={'wsgi.early_hints': sent.append})
+        assert sent == [[('Link', '</assets/index-AbCd1234.js>; rel=modulepreload; crossorigin')]]
+
+
+class TestCompress:
+    def test_standalone_build_step_needs_no_app(self, tmp_path, monkeypatch):
+        from click.testing import CliRunner
+        root = tmp_path / 'static'
+        (root / 'assets').mkdir(parents=True)
+        (root / 'assets' / 'index-AbCd1234.js').write_bytes(BUNDLE)
+        (root / 'favicon.svg').write_text('<svg/>')
+        monkeypatch.setattr('app.create_app', None)                       # never builds the app
+        monkeypatch.setenv('DATABASE_URL', 'postgresql://nowhere.invalid/ohms')
+
+        result = CliRunner().invoke(assets.main, ['--root', str(root)])
+        assert result.exit_code == 0, result.output
+        assert gzip.decompress((root / 'assets' / 'index-AbCd1234.js.gz').read_bytes()) == BUNDLE
+        assert not (root / 'favicon.svg.gz').exists()                       # below the size threshold
@@ -0,0 +1,173 @@
+r"""
+Tests for the data-versioned response cache (app/cache.py) and /schedules/api/hegs.
+
+Run with:
+    python -m pytest tests/test_cache.py -v
+"""
+
+import pytest
+from sqlalchemy import event, update
+from app import create_app, db, cache
+from app.models import Operation
+from app.employees.models import Employee
+from app.schedules.models import HEG, HEGStressor, Stressor
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['cache'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed(n_hegs=3, code='ALPHA'):
+    op = Operation(operation_name=f'Operation {code}', code=code, status='active')
+    db.session.add(op)
+    db.session.flush()
+    stressors = [Stressor(name=f'Stressor {i}', category='Chemical', operation_id=op.id) for i in range(3)]
+    db.session.add_all(stressors)
+    db.session.flush()
+    for h in range(n_hegs):
+        heg = HEG(heg_number=f'{code}-{h}', job_title='Driller', department='Mining', operation_id=op.id)
+        db.session.add(heg)
+        db.session.flush()
+        for stressor in stressors:
+            db.session.add(HEGStressor(heg_id=heg.id, stressor_id=stressor.id))
+    db.session.commit()
+
+
+def _queries(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])   # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements), result
+
+
+class TestDataVersions:
+    def test_flush_bumps_written_tables(self, app):
+        before = cache.versions(('heg', 'stressor'))
+        heg = HEG.query.first()
+        heg.job_title = 'Blaster'
+        db.session.commit()
+        after = cache.versions(('heg', 'stressor'))
+        assert after[0] == before[0] + 1
+        assert after[1] == before[1]
+
+    def test_unmodified_dirty_object_does_not_bump(self, app):
+        heg = HEG.query.first()
+        before = cache.versions(('heg',))
+        heg.job_title = heg.job_title
+        db.session.commit()
+        assert cache.versions(('heg',)) == before
+
+    def test_association_table_and_bulk_statements(self, app):
+        before = cache.versions(('employee_stressor', 'stressor'))
+        emp = Employee(name='Alice', job_title='Driller', department='Mining')
+        emp.stressors.append(Stressor.query.first())
+        db.session.add(emp)
+        db.session.commit()
+        db.session.execute(update(Stressor).values(is_active=False))
+        db.session.commit()
+        after = cache.versions(('employee_stressor', 'stressor'))
+        assert after[0] > before[0]
+        assert after[1] > before[1]
+
+    def test_bumped_after_commit_not_inside_the_writer(self, app):
+        before = cache.versions(('heg',))
+        HEG.query.first().job_title = 'Blaster'
+        n, _ = _queries(db.session.flush)
+        assert n == 1                          # the UPDATE only; no data_version row locked
+        db.session.commit()
+        assert cache.versions(('heg',)) == (before[0] + 1,)
+
+    def test_savepoint_rollback_keeps_outer_writes(self, app):
+        before = cache.versions(('heg', 'stressor'))
+        HEG.query.first().job_title = 'Blaster'
+        db.session.flush()
+        with db.session.begin_nested() as savepoint:
+            Stressor.query.first().name = 'Manganese'
+            db.session.flush()
+            savepoint.rollback()
+        db.session.commit()
+        assert cache.versions(('heg', 'stressor'))[0] == before[0] + 1
+
+    def test_rollback_discards_bump(self, app):
+        before = cache.versions(('heg',))
+        HEG.query.first().job_title = 'Blaster'
+        db.session.flush()
+        db.session.rollback()
+        assert cache.versions(('heg',)) == before
+
+
+class TestHegGraph:
+    def test_fixed_query_count_and_cached(self, app, client):
+        n_first, r = _queries(lambda: client.get('/schedules/api/hegs'))
+        assert r.status_code == 200 and len(r.get_json()) == 3
+        _seed(n_hegs=5, code='BRAVO')
+        app.extensions['cache'].clear()
+        n_more, r = _queries(lambda: client.get('/schedules/api/hegs'))
+        assert len(r.get_json()) == 8
+        assert n_more == n_first == 4          # versions + HEGs + heg_stressors + stressors
+
+        n_cached, cached = _queries(lambda: client.get('/schedules/api/hegs'))
+        assert n_cached == 1                   # versions only
+        assert cached.data == r.data
+        assert cached.headers['Access-Control-Allow-Origin'] == '*'
+
+    def test_invalidated_by_each_table(self, app, client):
+        def names():
+            return [s['name'] for s in client.get('/schedules/api/hegs').get_json()[0]['stressors']]
+
+        assert names() == ['Stressor 0', 'Stressor 1', 'Stressor 2']
+        Stressor.query.filter_by(name='Stressor 0').first().name = 'Manganese'
+        db.session.commit()
+        assert names()[0] == 'Manganese'
+
+        db.session.delete(HEGStressor.query.first())
+        db.session.commit()
+        assert len(names()) == 2
+
+        HEG.query.filter_by(heg_number='ALPHA-0').first().heg_number = 'ALPHA-Z'
+        db.session.commit()
+        assert client.get('/schedules/api/hegs').get_json()[-1]['heg_number'] == 'ALPHA-Z'
+
+    def test_another_worker_commit_invalidates(self, app, client):
+        first = client.get('/schedules/api/hegs').data
+        # Another process wrote through raw SQL and bumped the version
+        db.session.execute(db.text("UPDATE heg SET job_title = 'Blaster'"))
+        cache.bump(['heg'])
+        db.session.commit()
+        assert client.get('/schedules/api/hegs').data != first
+
+    def test_etag_revalidation(self, client):
+        r = client.get('/schedules/api/hegs')
+        again = client.get('/schedules/api/hegs', headers={'If-None-Match': r.headers['ETag']})
+        assert again.status_code == 304
+
+    def test_uncommitted_writes_bypass_cache(self, app, client):
+        client.get('/schedules/api/hegs')
+        HEG.query.filter_by(heg_number='ALPHA-0').first().heg_number = 'ALPHA-Z'
+        db.session.flush()
+        assert 'ALPHA-Z' in [h['heg_number'] for h in client.get('/schedules/api/hegs').get_json()]
+
+    def test_disabled(self, app, client):
+        app.config['CACHE_ENABLED'] = False
+        client.get('/schedules/api/hegs')
+        n, _ = _queries(lambda: client.get('/schedules/api/hegs'))
+        assert n == 3
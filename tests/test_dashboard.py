@@ -0,0 +1,140 @@
+r"""
+Tests for the /api/dashboard summary endpoint.
+
+Run with:
+    python -m pytest tests/test_dashboard.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User
+from app.employees.models import Employee
+from app.schedules.models import SamplingSchedule, ExposureReading, MedicalRecord
+from conftest import add_heg, add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['cache'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _add_operation(code, scale):
+    today = date.today()
+    op = add_operation(code)
+    noise = add_stressor(op, f'Noise {code}', 'Physical')
+    silica = add_stressor(op, f'Silica {code}')
+    employees = [Employee(name=f'{code} {i}', job_title='Driller', department='Mining', operation_id=op.id,
+                          is_active=i < 3 * scale) for i in range(4 * scale)]
+    hegs = [add_heg(op, f'{code}-{i}') for i in range(scale + 1)]
+    db.session.add_all(employees)
+    db.session.flush()
+
+    # Medical: scale overdue, 2 due soon, 1 later, 1 undated
+    dues = [today - timedelta(days=1 + i) for i in range(scale)] + \
+           [today, today + timedelta(days=30), today + timedelta(days=31), None]
+    for i, due in enumerate(dues):
+        db.session.add(MedicalRecord(employee_id=employees[0].id, test_name=f'Audiogram {i}', next_due=due,
+                                     operation_id=op.id))
+    # Sampling: 1 overdue, scale due soon
+    dues = [today - timedelta(days=10)] + [today + timedelta(days=5 + i) for i in range(scale)]
+    for i, due in enumerate(dues):
+        db.session.add(SamplingSchedule(heg_id=hegs[0].id, stressor_id=noise.id, occupation=f'Slot {i}',
+                                        frequency='Quarterly', next_sample_due=due, operation_id=op.id))
+    # Readings: noise 85 dB(A) limit — 2 × scale above; silica all below; one without an OEL
+    for value, oel, stressor in [(90, 85, noise)] * (2 * scale) + [(80, 85, noise), (0.05, 0.1, silica),
+                                                                    (99, None, silica)]:
+        db.session.add(ExposureReading(stressor_id=stressor.id, location='Pit', measured_value=value,
+                                       oel_value=oel, operation_id=op.id))
+
+
+def _seed():
+    _add_operation('ALPHA', 1)
+    _add_operation('BETA', 2)
+    admin = User(username='root', email='root@test.com', role='super_admin')
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.commit()
+
+
+def _count_queries(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])   # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements), result
+
+
+class TestDashboard:
+    def test_tenant_kpis(self, client):
+        login(client)
+        r = client.get('/api/dashboard')
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data['asOf'] == date.today().isoformat()
+        assert data['medical'] == {'overdue': 1, 'dueSoon': 2}
+        assert data['sampling'] == {'overdue': 1, 'dueSoon': 1}
+        assert data['employees'] == {'active': 3}
+        assert data['hegs'] == 2
+        assert data['exceedances'] == {
+            'total': 2,
+            'byStressor': [{'stressorId': data['exceedances']['byStressor'][0]['stressorId'],
+                            'stressor': 'Noise ALPHA', 'readings': 3, 'exceedances': 2,
+                            'maxRatio': pytest.approx(90 / 85)}],
+        }
+
+    def test_super_admin_sees_all_operations(self, client):
+        login(client, 'root@test.com')
+        data = client.get('/api/dashboard').get_json()
+        assert data['medical'] == {'overdue': 3, 'dueSoon': 4}
+        assert data['sampling'] == {'overdue': 2, 'dueSoon': 3}
+        assert data['employees'] == {'active': 9}
+        assert data['hegs'] == 5
+        assert [(s['stressor'], s['exceedances']) for s in data['exceedances']['byStressor']] == \
+            [('Noise BETA', 4), ('Noise ALPHA', 2)]
+
+    def test_cached_per_tenant_until_data_changes(self, app, client):
+        login(client)
+        n_miss, first = _count_queries(lambda: client.get('/api/dashboard'))
+        n_hit, again = _count_queries(lambda: client.get('/api/dashboard'))
+        assert again.data == first.data
+        assert n_hit == n_miss - 4          # the four aggregates are skipped
+
+        # Another tenant gets its own entry
+        beta = app.test_client()
+        login(beta, 'beta@test.com')
+        assert beta.get('/api/dashboard').get_json()['hegs'] == 3
+
+        record = MedicalRecord.query.filter(MedicalRecord.next_due.is_(None)).first()
+        record.next_due = date.today() - timedelta(days=3)
+        db.session.commit()
+        assert client.get('/api/dashboard').get_json()['medical']['overdue'] == 2
+
+    def test_ttl_expires_entry(self, app, client):
+        app.config['DASHBOARD_CACHE_TTL'] = -1
+        login(client)
+        client.get('/api/dashboard')
+        n, _ = _count_queries(lambda: client.get('/api/dashboard'))
+        assert n >= 5
+
+    def test_requireslogin(self, client):
+        assert client.get('/api/dashboard').status_code in (302, 401)
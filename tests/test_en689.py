@@ -0,0 +1,221 @@
+r"""
+Tests for the batch EN 689 compliance engine (app/analytics/en689.py) and
+/api/analytics/en689.
+
+Run with:
+    python -m pytest tests/test_en689.py -v
+"""
+
+import math
+import statistics
+from datetime import date
+
+import numpy as np
+import pytest
+from app import create_app, db
+from app.models import Operation
+from app.schedules.models import LabResult
+from app.analytics.en689 import compliance, evaluate, fingerprints, u_t
+from app.analytics.samples import Samples
+from conftest import add_heg, add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['cache'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+FITTER_MN = [0.02, 0.035, 0.05, 0.028, 0.06, 0.04, 0.031]     # 7 samples → statistical test
+
+
+def _add_operation(code):
+    op = add_operation(code)
+    add_stressor(op, 'Manganese', oel_value=0.2, oel_unit='mg/m³')
+    add_stressor(op, 'Silica (RCS)', oel_value=0.1, oel_unit='mg/m³')
+    add_stressor(op, 'PNOC')                                           # no numeric OEL
+    add_heg(op, 'HEG-01', 'Boilermaker', 'Plant', occupations=['Boilermaker'])
+    add_heg(op, 'HEG-02', 'Fitter', 'Plant', occupations=['Fitter'])
+    add_heg(op, 'HEG-03', occupations=['Driller'])
+
+    def lab(occupation, day, mn=None, si=None, pnoc=None):
+        db.session.add(LabResult(activity_area='Plant', occupation=occupation, result_mn_twa=mn,
+                                 result_si_twa=si, result_pnoc_twa=pnoc, shift_duration=8,
+                                 sampling_duration=480, sampling_date=day, operation_id=op.id))
+
+    for mn in (0.01, 0.015, 0.018):                   # all < 0.10 × OEL
+        lab('Boilermaker', date(2026, 2, 10), mn=mn, pnoc=1.0)
+    for i, mn in enumerate(FITTER_MN):
+        lab('Fitter', date(2026, 2, 1 + i), mn=mn)
+    for si in (0.02, 0.05, 0.15, 0.03):               # one result above the OEL
+        lab('Driller', date(2026, 5, 5), si=si)
+    lab('Driller', date(2026, 5, 6), mn=0.05)          # single Mn sample
+
+
+def _seed():
+    _add_operation('ALPHA')
+    _add_operation('BETA')
+    db.session.commit()
+
+
+def _groups(data):
+    return {(g['heg'], g['stressor']): g for g in data['groups']}
+
+
+class TestCompliance:
+    def test_u_t_table(self):
+        assert np.isnan(u_t([5])[0])
+        assert u_t([6, 10, 30, 200]) == pytest.approx([2.187, 2.005, 1.820, 1.820])
+
+    def test_preliminary(self):
+        group = np.repeat(np.arange(5), 4)
+        value = np.array([0.01, 0.02, 0.025, 0.029,     # all < 0.15 × 0.2 → compliant
+                          0.01, 0.02, 0.025, 0.031,     # 0.031 ≥ 0.03 → inconclusive
+                          0.01, 0.02, 0.025, 0.21,      # above the OEL → non-compliant
+                          0.01, 0.02, 0.025, 0.20,      # at the OEL → inconclusive
+                          0.01, 0.02, 0.025, 0.029])
+        oel = np.array([0.2, 0.2, 0.2, 0.2, np.nan])
+        result = compliance(group, value, oel, 5)
+        assert list(result['verdict']) == ['compliant', 'inconclusive', 'non-compliant', 'inconclusive', 'no-oel']
+        assert list(result['test']) == ['preliminary'] * 4 + [None]
+
+    def test_statistical_matches_reference(self):
+        rng = np.random.default_rng(2)
+        sizes, oel = [6, 12, 45], np.array([1.0, 1.0, 0.5])
+        values = [rng.lognormal(-2, 0.9, n) for n in sizes]
+        group = np.concatenate([np.full(n, i) for i, n in enumerate(sizes)])
+        result = compliance(group, np.concatenate(values), oel, 3)
+        for i, v in enumerate(values):
+            y = [math.log(x) for x in v]
+            u_r = (math.log(oel[i]) - statistics.mean(y)) / statistics.stdev(y)
+            assert result['uR'][i] == pytest.approx(u_r)
+            assert result['verdict'][i] == ('compliant' if u_r >= u_t([sizes[i]])[0] else 'non-compliant')
+            assert result['test'][i] == 'statistical'
+
+    def test_identical_samples_and_too_few(self):
+        group = np.array([0] * 6 + [1] * 6 + [2, 2])
+        value = np.array([0.1] * 6 + [0.3] * 6 + [0.01, 0.01])
+        result = compliance(group, value, np.array([0.2, 0.2, 0.2]), 3)
+        assert list(result['verdict']) == ['compliant', 'non-compliant', 'insufficient']
+
+    def test_fingerprint_ignores_order(self):
+        group, ids, value = np.array([0, 0, 1]), np.array([1, 2, 3]), np.array([0.1, 0.2, 0.3])
+        a = fingerprints(group, ids, value, 2)
+        b = fingerprints(group[::-1], ids[::-1], value[::-1], 2)
+        assert list(a) == list(b)
+        assert fingerprints(group, ids, np.array([0.1, 0.25, 0.3]), 2)[0] != a[0]
+
+
+class TestEvaluate:
+    @staticmethod
+    def _samples(n=60_000, seed=4):
+        rng = np.random.default_rng(seed)
+        hegs = np.array([f'HEG-{i:02d}' for i in range(20)], dtype=object)
+        return Samples(np.arange(n), np.full(n, 1), hegs[rng.integers(0, 20, n)], rng.integers(1, 6, n),
+                       np.zeros(n, 'datetime64[D]'), rng.lognormal(-3, 1, n), 0)
+
+    def test_recomputes_only_changed_groups(self):
+        samples = self._samples()
+        oels = {sid: 1.0 for sid in range(1, 6)}
+        rows, recomputed, memo = evaluate(samples, oels)
+        assert recomputed == len(rows) == 100
+
+        value = samples.value.copy()
+        value[0] *= 2
+        changed = (samples.heg[0], int(samples.stressor_id[0]))
+        rows2, recomputed, memo2 = evaluate(samples._replace(value=value), oels, previous=memo)
+        assert recomputed == 1
+        assert [r for r in rows2 if (r['heg'], r['stressorId']) != changed] == \
+            [r for r in rows if (r['heg'], r['stressorId']) != changed]
+        fresh, _, _ = evaluate(samples._replace(value=value), oels)
+        assert rows2 == fresh
+
+        _, recomputed, _ = evaluate(samples._replace(value=value), {**oels, 3: 0.5}, previous=memo2)
+        assert recomputed == 20          # stressor 3 in every HEG
+
+    def test_unchanged_batch_recomputes_nothing(self):
+        samples = self._samples(1000)
+        rows, _, memo = evaluate(samples, {1: 1.0})
+        again, recomputed, _ = evaluate(samples, {1: 1.0}, previous=memo)
+        assert recomputed == 0 and again == rows
+
+
+class TestEndpoint:
+    def test_verdicts_per_heg_and_agent(self, client):
+        login(client)
+        r = client.get('/api/analytics/en689')
+        assert r.status_code == 200
+        data = r.get_json()
+        groups = _groups(data)
+        assert groups[('HEG-01', 'Manganese')]['verdict'] == 'compliant'
+        assert groups[('HEG-01', 'Manganese')]['test'] == 'preliminary'
+        assert groups[('HEG-01', 'PNOC')]['verdict'] == 'no-oel'
+        assert groups[('HEG-03', 'Silica (RCS)')]['verdict'] == 'non-compliant'
+        assert groups[('HEG-03', 'Manganese')]['verdict'] == 'insufficient'
+        fitter = groups[('HEG-02', 'Manganese')]
+        y = [math.log(v) for v in FITTER_MN]
+        u_r = (math.log(0.2) - statistics.mean(y)) / statistics.stdev(y)
+        assert (fitter['test'], fitter['n'], fitter['uT']) == ('statistical', 7, 2.120)
+        assert fitter['uR'] == pytest.approx(u_r)
+        assert fitter['verdict'] == 'compliant'
+        assert data['summary'] == {'compliant': 2, 'non-compliant': 1, 'inconclusive': 0,
+                                   'insufficient': 1, 'no-oel': 1}
+        assert data['samples'] == 18
+
+    def test_date_window(self, client):
+        login(client)
+        data = client.get('/api/analytics/en689?from=2026-04-01&to=2026-06-30').get_json()
+        assert set(_groups(data)) == {('HEG-03', 'Silica (RCS)'), ('HEG-03', 'Manganese')}
+        assert (data['from'], data['to']) == ('2026-04-01', '2026-06-30')
+
+    def test_scoped_to_operation(self, client):
+        login(client)
+        data = client.get('/api/analytics/en689').get_json()
+        alpha = Operation.query.filter_by(code='ALPHA').first()
+        assert {g['operationId'] for g in data['groups']} == {alpha.id}
+
+    def test_bad_options(self, client):
+        login(client)
+        assert client.get('/api/analytics/en689?nd=zero').status_code == 400
+        assert client.get('/api/analytics/en689?from=last-quarter').status_code == 400
+
+    def test_recomputes_only_groups_whose_samples_changed(self, client):
+        login(client)
+        first = client.get('/api/analytics/en689').get_json()
+        assert first['recomputed'] == 5
+        assert client.get('/api/analytics/en689').get_json() == first       # cached document
+
+        alpha = Operation.query.filter_by(code='ALPHA').first()
+        result = LabResult.query.filter_by(operation_id=alpha.id, occupation='Driller', result_mn_twa=None).first()
+        result.result_si_twa = 0.04
+        db.session.commit()
+        second = client.get('/api/analytics/en689').get_json()
+        assert second['recomputed'] == 1
+        assert _groups(second)[('HEG-01', 'Manganese')] == _groups(first)[('HEG-01', 'Manganese')]
+
+    def test_alternating_windows_keep_their_groups(self, client):
+        login(client)
+        q1 = '/api/analytics/en689?from=2026-01-01&to=2026-03-31'
+        q2 = '/api/analytics/en689?from=2026-04-01&to=2026-06-30'
+        assert client.get(q1).get_json()['recomputed'] == 3
+        assert client.get(q2).get_json()['recomputed'] == 2
+
+        alpha = Operation.query.filter_by(code='ALPHA').first()
+        LabResult.query.filter_by(operation_id=alpha.id, result_mn_twa=0.05, occupation='Driller').first() \
+            .result_mn_twa = 0.06
+        db.session.commit()
+        assert client.get(q1).get_json()['recomputed'] == 0
+        assert client.get(q2).get_json()['recomputed'] == 1
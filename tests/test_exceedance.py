@@ -0,0 +1,130 @@
+r"""
+Tests for the stored OEL exceedance ratio on exposure readings.
+
+Run with:
+    python -m pytest tests/test_exceedance.py -v
+"""
+
+import pytest
+from sqlalchemy import text
+from app import create_app, db, _migrate_field_sheet
+from app.schedules.models import Stressor, ExposureReading
+from conftest import add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _add_operation(code):
+    op = add_operation(code)
+    noise = add_stressor(op, f'Noise {code}', 'Physical', oel_value=85.0, oel_unit='dB(A)')
+    silica = add_stressor(op, f'Silica {code}', oel_value=0.1, oel_unit='mg/m³')
+    db.session.flush()
+    for value, stressor in [(90, noise), (86, noise), (85, noise), (70, noise), (0.2, silica), (0.05, silica)]:
+        db.session.add(ExposureReading(stressor_id=stressor.id, location='Pit', measured_value=value,
+                                       oel_value=stressor.oel_value, operation_id=op.id))
+
+
+def _seed():
+    _add_operation('ALPHA')
+    _add_operation('BETA')
+    db.session.commit()
+
+
+def _stressor(name):
+    return Stressor.query.filter_by(name=name).first()
+
+
+class TestExceedanceRatio:
+    def test_kept_on_write(self, app):
+        reading = ExposureReading(stressor_id=1, location='Pit', measured_value=0.3, oel_value=0.1)
+        assert reading.exceedance_ratio == pytest.approx(3.0)
+        reading.measured_value = 0.05
+        assert reading.exceedance_ratio == pytest.approx(0.5)
+        reading.oel_value = 0.025
+        assert reading.exceedance_ratio == pytest.approx(2.0)
+        reading.oel_value = None
+        assert reading.exceedance_ratio is None
+        reading.oel_value = 0
+        assert reading.exceedance_ratio is None
+
+    def test_stored_on_create(self, client):
+        login(client)
+        stressor = _stressor('Silica ALPHA')
+        r = client.post('/api/exposure-readings', json={'hazardId': stressor.id, 'location': 'Crusher',
+                                                        'measuredValue': 0.15})
+        assert r.status_code == 201
+        assert r.get_json()['exceedanceRatio'] == pytest.approx(1.5)
+        stored = db.session.execute(text('SELECT exceedance_ratio FROM exposure_reading WHERE id = :id'),
+                                    {'id': r.get_json()['id']}).scalar()
+        assert stored == pytest.approx(1.5)
+
+    def test_migration_backfills(self, app):
+        db.session.execute(text('UPDATE exposure_reading SET exceedance_ratio = NULL'))
+        db.session.commit()
+        _migrate_field_sheet(db)
+        db.session.expire_all()
+        for reading in ExposureReading.query:
+            assert reading.exceedance_ratio == pytest.approx(reading.measured_value / reading.oel_value)
+
+
+class TestExceedsFilter:
+    def test_exceeds_for_hazard(self, client):
+        login(client)
+        noise = _stressor('Noise ALPHA')
+        r = client.get(f'/api/exposure-readings?exceeds=true&hazardId={noise.id}')
+        assert r.status_code == 200
+        assert sorted(x['measuredValue'] for x in r.get_json()) == [86, 90]   # at the limit is not over it
+
+    def test_exceeds_scoped_to_operation(self, client):
+        login(client)
+        readings = client.get('/api/exposure-readings?exceeds=true').get_json()
+        assert sorted(x['measuredValue'] for x in readings) == [0.2, 86, 90]
+        beta_noise = _stressor('Noise BETA')
+        assert client.get(f'/api/exposure-readings?hazardId={beta_noise.id}').get_json() == []
+
+    def test_hazard_without_exceeds(self, client):
+        login(client)
+        silica = _stressor('Silica ALPHA')
+        assert len(client.get(f'/api/exposure-readings?hazardId={silica.id}').get_json()) == 2
+
+    def test_bad_hazard_id(self, client):
+        login(client)
+        assert client.get('/api/exposure-readings?hazardId=noise').status_code == 400
+
+    def test_uses_ratio_index(self, app):
+        q = ExposureReading.query.filter(ExposureReading.operation_id == 1, ExposureReading.stressor_id == 1,
+                                         ExposureReading.exceeds())
+        sql = str(q.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[3] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+        assert 'ix_exposure_reading_operation_id_stressor_id_ratio' in plan
+        assert 'exceedance_ratio>?' in plan
+
+
+class TestExceedanceCounts:
+    def test_per_stressor(self, client):
+        login(client)
+        r = client.get('/api/exposure-readings/exceedances')
+        assert r.status_code == 200
+        assert [(c['stressor'], c['readings'], c['exceedances']) for c in r.get_json()] == \
+            [('Noise ALPHA', 4, 2), ('Silica ALPHA', 2, 1)]
+        assert r.get_json()[1]['maxRatio'] == pytest.approx(2.0)
+
+    def test_all_operations(self, app):
+        counts = ExposureReading.exceedance_counts()
+        assert sum(c['exceedances'] for c in counts) == 6
@@ -0,0 +1,205 @@
+r"""
+Tests for the per-employee exposure profile endpoint.
+
+Run with:
+    python -m pytest tests/test_exposure_profile.py -v
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db, cache
+from app.models import Operation, User
+from app.employees.models import Employee
+from app.schedules.models import Stressor, ExposureReading, EmployeeExposure
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['cache'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _reading(stressor, value, day, *employees):
+    reading = ExposureReading(stressor_id=stressor.id, location='Pit', measured_value=value,
+                              oel_value=stressor.oel_value, oel_unit=stressor.oel_unit, date=day,
+                              operation_id=stressor.operation_id)
+    for emp in employees:
+        reading.employee_exposures.append(EmployeeExposure(employee_id=emp.id))
+    db.session.add(reading)
+    return reading
+
+
+def _seed():
+    ops = []
+    for code in ('ALPHA', 'BETA'):
+        op = Operation(operation_name=f'Operation {code}', code=code, status='active')
+        db.session.add(op)
+        db.session.flush()
+        user = User(username=f'user_{code.lower()}', email=f'{code.lower()}@test.com', role='admin',
+                    operation_id=op.id)
+        user.set_password('password')
+        db.session.add(user)
+        ops.append(op)
+    alpha = ops[0]
+    noise = Stressor(name='Noise', category='Physical', oel_value=85.0, oel_unit='dB(A)', operation_id=alpha.id)
+    silica = Stressor(name='Silica', category='Chemical', oel_value=0.1, oel_unit='mg/m³', operation_id=alpha.id)
+    alice = Employee(name='Alice', job_title='Driller', department='Mining', heg_number='HEG-01',
+                     operation_id=alpha.id)
+    bob = Employee(name='Bob', job_title='Fitter', department='Plant', operation_id=alpha.id)
+    carol = Employee(name='Carol', job_title='Driller', department='Mining', operation_id=ops[1].id)
+    db.session.add_all([noise, silica, alice, bob, carol])
+    db.session.flush()
+    _reading(noise, 88.0, date(2026, 1, 10), alice, bob)
+    _reading(noise, 80.0, date(2025, 11, 3), alice)
+    _reading(noise, 92.0, date(2026, 2, 14), alice)
+    _reading(silica, 0.04, date(2026, 1, 20), alice)
+    _reading(silica, 0.2, date(2026, 1, 21), bob)
+    db.session.commit()
+
+
+def _login(client, email='alpha@test.com'):
+    client.post('/api/auth/login', json={'email': email, 'password': 'password'})
+
+
+def _employee(name):
+    return Employee.query.filter_by(name=name).first()
+
+
+def _count_queries(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])   # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return statements, result
+
+
+class TestExposureProfile:
+    def test_per_stressor_summary_and_series(self, client):
+        _login(client)
+        alice = _employee('Alice')
+        r = client.get(f'/api/employees/{alice.id}/exposure-profile')
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data['employee'] == {'id': alice.id, 'name': 'Alice', 'jobTitle': 'Driller',
+                                    'department': 'Mining', 'heg': 'HEG-01'}
+        noise, silica = data['stressors']
+        assert (noise['stressor'], noise['category'], noise['unit']) == ('Noise', 'Physical', 'dB(A)')
+        assert noise['samples'] == 3
+        assert noise['max'] == 92.0
+        assert noise['mean'] == pytest.approx((88 + 80 + 92) / 3)
+        assert noise['exceedances'] == 2
+        assert noise['lastMeasured'] == '2026-02-14'
+        assert [p['value'] for p in noise['series']] == [80.0, 88.0, 92.0]      # oldest first
+        assert noise['series'][2]['ratio'] == pytest.approx(92 / 85)
+        assert (silica['samples'], silica['max'], silica['exceedances']) == (1, 0.04, 0)
+
+    def test_only_this_employees_readings(self, client):
+        _login(client)
+        bob = _employee('Bob')
+        data = client.get(f'/api/employees/{bob.id}/exposure-profile').get_json()
+        assert [(s['stressor'], s['samples']) for s in data['stressors']] == [('Noise', 1), ('Silica', 1)]
+
+    def test_no_readings(self, client):
+        _login(client)
+        emp = Employee(name='Dave', job_title='Driller', department='Mining',
+                       operation_id=_employee('Alice').operation_id)
+        db.session.add(emp)
+        db.session.commit()
+        assert client.get(f'/api/employees/{emp.id}/exposure-profile').get_json()['stressors'] == []
+
+    def test_access(self, client):
+        _login(client)
+        assert client.get(f"/api/employees/{_employee('Carol').id}/exposure-profile").status_code == 403
+        assert client.get('/api/employees/9999/exposure-profile').status_code == 404
+
+    def test_single_join_query(self, client):
+        _login(client)
+        alice = _employee('Alice')
+        statements, _ = _count_queries(lambda: client.get(f'/api/employees/{alice.id}/exposure-profile'))
+        profile = [s for s in statements if 'employee_exposure' in s]
+        assert len(profile) == 1
+        assert 'JOIN exposure_reading' in profile[0] and 'JOIN stressor' in profile[0]
+
+
+class TestProfileCache:
+    def _profile_queries(self, client, emp):
+        statements, r = _count_queries(lambda: client.get(f'/api/employees/{emp.id}/exposure-profile'))
+        return len([s for s in statements if 'FROM employee_exposure' in s]), r.get_json()
+
+    def test_keyed_on_employee_version(self, client):
+        _login(client)
+        alice, bob = _employee('Alice'), _employee('Bob')
+        noise = Stressor.query.filter_by(name='Noise').first()
+        assert self._profile_queries(client, alice)[0] == 1
+        assert self._profile_queries(client, alice)[0] == 0              # cached
+
+        # A reading for Bob only leaves Alice's entry alone
+        _reading(noise, 70.0, date(2026, 3, 1), bob)
+        db.session.commit()
+        assert self._profile_queries(client, alice)[0] == 0
+
+        # A reading linked to Alice rebuilds it
+        _reading(noise, 95.0, date(2026, 3, 2), alice)
+        db.session.commit()
+        n, data = self._profile_queries(client, alice)
+        assert n == 1 and data['stressors'][0]['samples'] == 4
+
+        # So does deleting one of her readings
+        db.session.delete(ExposureReading.query.filter_by(measured_value=95.0).first())
+        db.session.commit()
+        n, data = self._profile_queries(client, alice)
+        assert n == 1 and data['stressors'][0]['samples'] == 3
+
+    def test_reading_and_stressor_edits_invalidate(self, client):
+        _login(client)
+        alice = _employee('Alice')
+        self._profile_queries(client, alice)
+        ExposureReading.query.filter_by(measured_value=92.0).first().measured_value = 99.0
+        db.session.commit()
+        assert self._profile_queries(client, alice)[1]['stressors'][0]['max'] == 99.0
+
+        Stressor.query.filter_by(name='Noise').first().name = 'Noise (8h)'
+        db.session.commit()
+        assert self._profile_queries(client, alice)[1]['stressors'][0]['stressor'] == 'Noise (8h)'
+
+    def test_moved_link_invalidates_both_employees(self, client):
+        _login(client)
+        alice, bob = _employee('Alice'), _employee('Bob')
+        before = [self._profile_queries(client, e)[1]['stressors'][0]['samples'] for e in (alice, bob)]
+        reading = ExposureReading.query.filter_by(measured_value=92.0).first()
+        link = EmployeeExposure.query.filter_by(reading_id=reading.id).first()
+        db.session.commit()                     # expire: the old employee_id is not in memory
+        link.employee_id = bob.id
+        db.session.commit()
+        after = [self._profile_queries(client, e)[1]['stressors'][0]['samples'] for e in (alice, bob)]
+        assert after == [before[0] - 1, before[1] + 1]
+
+    def test_bulk_reading_edit_reads_links_once(self, client):
+        readings = ExposureReading.query.all()
+        db.session.commit()
+        for r in readings:
+            r.location = 'Workshop'
+        statements, _ = _count_queries(db.session.flush)
+        assert len([s for s in statements if 'FROM employee_exposure' in s]) == 1
+        db.session.commit()
+
+    def test_scopes_are_bounded(self, app):
+        assert cache.scope('employee', 7) == cache.scope('employee', 7 + cache.SCOPE_BUCKETS)
@@ -0,0 +1,131 @@
+r"""
+Tests for JSON merge-patch autosave on /api/field-sheets/<id>.
+
+Run with:
+    python -m pytest tests/test_field_sheet_patch.py -v
+"""
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Operation
+
+MERGE_PATCH = 'application/merge-patch+json'
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from app.schedules.models import FieldSheet
+
+    op_a = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    op_b = Operation(operation_name='Operation Beta',  code='BETA',  status='active')
+    db.session.add_all([op_a, op_b])
+    db.session.flush()
+
+    user_a = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op_a.id)
+    user_a.set_password('password')
+    user_b = User(username='user_beta', email='beta@test.com', role='admin', operation_id=op_b.id)
+    user_b.set_password('password')
+    db.session.add_all([user_a, user_b])
+
+    db.session.add(FieldSheet(employee_name='Alice', noise_run_time=480, weather_hot=True,
+                              operation_id=op_a.id))
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def _sheet():
+    from app.schedules.models import FieldSheet
+    return FieldSheet.query.filter_by(employee_name='Alice').first()
+
+
+def _patch(client, sid, body):
+    return client.patch(f'/api/field-sheets/{sid}', json=body, headers={'Content-Type': MERGE_PATCH})
+
+
+class TestMergePatch:
+    def test_returns_only_changed_keys(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet().id
+        r = _patch(client, sid, {'job_title': 'Driller', 'employee_name': 'Alice', 'noise_laeq': '88.5'})
+        assert r.status_code == 200
+        assert r.get_json() == {'job_title': 'Driller', 'noise_laeq': 88.5}
+        db.session.expire_all()
+        assert _sheet().job_title == 'Driller'
+
+    def test_unchanged_patch_is_204(self, client):
+        _login(client, 'alpha@test.com')
+        r = _patch(client, _sheet().id, {'employee_name': 'Alice', 'weather_hot': True})
+        assert r.status_code == 204
+        assert r.data == b''
+
+    def test_update_writes_only_dirty_columns(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet().id
+        updates = []
+
+        def capture(conn, cursor, statement, *args):
+            if statement.startswith('UPDATE field_sheet'):
+                updates.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            _patch(client, sid, {'coy_number': 'C-17'})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        assert len(updates) == 1
+        assert updates[0].split(' WHERE ')[0] == 'UPDATE field_sheet SET coy_number=?'
+
+    def test_null_removes_value(self, client):
+        _login(client, 'alpha@test.com')
+        r = _patch(client, _sheet().id, {'noise_run_time': None, 'weather_hot': None})
+        assert r.get_json() == {'noise_run_time': None, 'weather_hot': False}
+
+    def test_status_reported_when_it_changes(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet().id
+        _patch(client, sid, {'sampling_date': '2026-03-02', 'noise_dbadge_serial': 'DB-1'})
+        db.session.expire_all()
+        sheet = _sheet()
+        sheet.scan_filename = 'scan.pdf'
+        db.session.commit()
+        r = _patch(client, sid, {'sampling_date': None})
+        assert r.get_json() == {'sampling_date': None, 'status': 'Draft'}
+
+    def test_rejects_non_object_and_nested_values(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet().id
+        assert _patch(client, sid, ['job_title']).status_code == 400
+        assert _patch(client, sid, {'job_title': {'x': 1}}).status_code == 400
+
+    def test_other_operation_denied(self, client):
+        _login(client, 'beta@test.com')
+        assert _patch(client, _sheet().id, {'job_title': 'x'}).status_code == 403
+
+    def test_put_still_returns_full_sheet(self, client):
+        _login(client, 'alpha@test.com')
+        r = client.put(f'/api/field-sheets/{_sheet().id}', json={'noise_run_time': None, 'job_title': 'Fitter'})
+        body = r.get_json()
+        assert body['job_title'] == 'Fitter'
+        assert body['noise_run_time'] == 480
+        assert 'scan_url' in body
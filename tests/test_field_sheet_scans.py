@@ -0,0 +1,344 @@
+r"""
+Tests for the field sheet scan pipeline (local storage backend, no network).
+
+Run with:
+    python -m pytest tests/test_field_sheet_scans.py -v
+"""
+
+import hashlib
+import io
+import os
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+
+
+@pytest.fixture(scope='function')
+def app(tmp_path):
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    application.config['SCAN_STORAGE'] = 'local'
+    application.config['SCAN_STORAGE_DIR'] = str(tmp_path / 'scans')
+    application.config['SCAN_SPOOL_DIR'] = str(tmp_path / 'spool')
+    application.config['SCAN_UPLOAD_SYNC'] = True
+    application.extensions.pop('scan_storage', None)
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from app.schedules.models import FieldSheet
+
+    op_a = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    op_b = Operation(operation_name='Operation Beta',  code='BETA',  status='active')
+    db.session.add_all([op_a, op_b])
+    db.session.flush()
+
+    user_a = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op_a.id)
+    user_a.set_password('password')
+    user_b = User(username='user_beta', email='beta@test.com', role='admin', operation_id=op_b.id)
+    user_b.set_password('password')
+    db.session.add_all([user_a, user_b])
+
+    db.session.add(FieldSheet(employee_name='Alice', operation_id=op_a.id))
+    db.session.add(FieldSheet(employee_name='Anna',  operation_id=op_a.id))
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def _sheet_id(name='Alice'):
+    from app.schedules.models import FieldSheet
+    return FieldSheet.query.filter_by(employee_name=name).first().id
+
+
+def _stored_files(app):
+    root = os.path.join(app.config['SCAN_STORAGE_DIR'], 'ohms', 'scans')
+    return sorted(f for _, _, files in os.walk(root) for f in files)
+
+
+def _upload(client, sid, data=b'%PDF-1.4 scan', filename='scan.pdf'):
+    return client.post(f'/api/field-sheets/{sid}/scan',
+                       data={'file': (io.BytesIO(data), filename)},
+                       content_type='multipart/form-data')
+
+
+class TestScanUpload:
+    def test_upload_is_accepted_with_status_url(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        r = _upload(client, sid)
+        assert r.status_code == 202
+        body = r.get_json()
+        assert body['scan_upload']['status'] == 'done'
+        assert r.headers['Location'] == body['scan_upload']['status_url']
+
+        status = client.get(body['scan_upload']['status_url']).get_json()
+        assert status['status'] == 'done'
+        assert status['size'] == len(b'%PDF-1.4 scan')
+
+    def test_scan_stored_locally_and_spool_cleared(self, client, app):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        r = client.get(f'/api/field-sheets/{sid}/scan', follow_redirects=True)
+        assert r.status_code == 200
+        assert r.data == b'%PDF-1.4 scan'
+        assert os.listdir(app.config['SCAN_SPOOL_DIR']) == []
+
+    def test_replacing_scan_removes_previous_file(self, client, app):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid, filename='first.pdf')
+        _upload(client, sid, data=b'\x89PNG', filename='second.png')
+        assert _stored_files(app) == [hashlib.sha256(b'\x89PNG').hexdigest() + '.png']
+
+    def test_rejects_disallowed_type(self, client):
+        _login(client, 'alpha@test.com')
+        r = _upload(client, _sheet_id(), filename='scan.exe')
+        assert r.status_code == 400
+
+    def test_other_operation_cannot_upload(self, client):
+        sid = _sheet_id()
+        _login(client, 'beta@test.com')
+        r = _upload(client, sid)
+        assert r.status_code == 403
+
+
+def _tiff_bytes(size=(4000, 3000), pages=1):
+    from PIL import Image
+    buf = io.BytesIO()
+    frames = [Image.new('L', size, color=200 - 40 * i) for i in range(pages)]
+    frames[0].save(buf, 'TIFF', save_all=True, append_images=frames[1:])
+    return buf.getvalue()
+
+
+class TestScanNormalization:
+    def test_tiff_converted_to_webp_and_capped(self, client, app):
+        from PIL import Image
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        body = _upload(client, sid, data=_tiff_bytes(), filename='site.tiff').get_json()
+        assert body['scan_filename'] == 'site.webp'
+
+        r = client.get(f'/api/field-sheets/{sid}/scan', follow_redirects=True)
+        img = Image.open(io.BytesIO(r.data))
+        assert img.format == 'WEBP'
+        assert max(img.size) == app.config['SCAN_MAX_DIMENSION']
+
+    def test_multipage_tiff_becomes_pdf(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        body = _upload(client, sid, data=_tiff_bytes((800, 600), pages=3), filename='site.tif').get_json()
+        assert body['scan_filename'] == 'site.pdf'
+        assert client.get(f'/api/field-sheets/{sid}/scan', follow_redirects=True).data.startswith(b'%PDF')
+
+    def test_previews_exposed_and_served(self, client, app):
+        from PIL import Image
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        body = _upload(client, sid, data=_tiff_bytes(), filename='site.tiff').get_json()
+        version = body['scan_url'].split('?v=')[1]
+        assert body['scan_thumbnail_url'] == f'/api/field-sheets/{sid}/scan/thumb?v={version}'
+        assert body['scan_preview_url'] == f'/api/field-sheets/{sid}/scan/preview?v={version}'
+
+        thumb = Image.open(io.BytesIO(client.get(body['scan_thumbnail_url'], follow_redirects=True).data))
+        assert max(thumb.size) == app.config['SCAN_THUMB_SIZE']
+        preview = Image.open(io.BytesIO(client.get(body['scan_preview_url'], follow_redirects=True).data))
+        assert max(preview.size) == app.config['SCAN_PREVIEW_SIZE']
+
+    def test_undecodable_scan_kept_without_preview(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        body = _upload(client, sid, data=b'not really a png', filename='broken.png').get_json()
+        assert body['scan_filename'] == 'broken.png'
+        assert body['scan_thumbnail_url'] is None
+        assert client.get(f'/api/field-sheets/{sid}/scan/thumb').status_code == 404
+
+
+class TestContentAddressing:
+    def test_identical_bytes_stored_once(self, client, app):
+        _login(client, 'alpha@test.com')
+        a, b = _sheet_id('Alice'), _sheet_id('Anna')
+        _upload(client, a, filename='a.pdf')
+        body = _upload(client, b, filename='b.pdf').get_json()
+        assert body['scan_filename'] == 'b.pdf'
+        assert len(_stored_files(app)) == 1
+        assert client.get(f'/api/field-sheets/{b}/scan', follow_redirects=True).data == b'%PDF-1.4 scan'
+
+    def test_shared_blob_kept_until_last_sheet_deleted(self, client, app):
+        _login(client, 'alpha@test.com')
+        a, b = _sheet_id('Alice'), _sheet_id('Anna')
+        _upload(client, a)
+        _upload(client, b)
+        client.delete(f'/api/field-sheets/{a}')
+        assert len(_stored_files(app)) == 1
+        client.delete(f'/api/field-sheets/{b}')
+        assert _stored_files(app) == []
+
+    def test_session_with_known_hash_links_without_upload(self, client):
+        _login(client, 'alpha@test.com')
+        a, b = _sheet_id('Alice'), _sheet_id('Anna')
+        _upload(client, a)
+        r = client.post(f'/api/field-sheets/{b}/scan/sessions', json={
+            'filename': 'copy.pdf', 'size': 13,
+            'sha256': hashlib.sha256(b'%PDF-1.4 scan').hexdigest(),
+        })
+        assert r.status_code == 200
+        assert r.get_json()['linked'] is True
+        assert r.get_json()['scan_filename'] == 'copy.pdf'
+
+
+class TestResumableUpload:
+    DATA = bytes(range(256)) * 40   # 10 240 bytes
+
+    def _open(self, client, sid, **extra):
+        r = client.post(f'/api/field-sheets/{sid}/scan/sessions',
+                        json={'filename': 'big.pdf', 'size': len(self.DATA), **extra})
+        assert r.status_code == 201
+        return r.get_json()
+
+    def _put(self, client, url, first, last):
+        return client.put(url, data=self.DATA[first:last + 1], headers={
+            'Content-Range': f'bytes {first}-{last}/{len(self.DATA)}',
+            'Content-Type': 'application/octet-stream',
+        })
+
+    def test_chunks_resume_after_interruption(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        url = self._open(client, sid)['upload_url']
+        assert self._put(client, url, 0, 4095).get_json()['offset'] == 4096
+
+        # Client lost track — asks where to resume, then sends the rest.
+        assert client.get(url).get_json()['offset'] == 4096
+        assert self._put(client, url, 8192, 10239).status_code == 409
+        assert self._put(client, url, 4096, 8191).get_json()['offset'] == 8192
+        r = self._put(client, url, 8192, 10239)
+        assert r.status_code == 202
+        assert r.get_json()['scan_upload']['status'] == 'done'
+        assert client.get(f'/api/field-sheets/{sid}/scan', follow_redirects=True).data == self.DATA
+        assert client.get(url).status_code == 404
+
+    def test_retried_chunk_is_idempotent(self, client):
+        _login(client, 'alpha@test.com')
+        url = self._open(client, _sheet_id())['upload_url']
+        self._put(client, url, 0, 4095)
+        assert self._put(client, url, 0, 4095).get_json()['offset'] == 4096
+
+    def test_checksum_mismatch_rejected(self, client):
+        _login(client, 'alpha@test.com')
+        url = self._open(client, _sheet_id(), sha256='0' * 64)['upload_url']
+        assert self._put(client, url, 0, len(self.DATA) - 1).status_code == 422
+
+    def test_idle_sessions_expire_with_their_chunks(self, client, app):
+        from datetime import datetime, timedelta
+        from app.scans.models import ScanUploadSession
+        from app.scans.sessions import expire_sessions
+        _login(client, 'alpha@test.com')
+        url = self._open(client, _sheet_id())['upload_url']
+        self._put(client, url, 0, 4095)
+        path = ScanUploadSession.query.one().path
+        assert expire_sessions(datetime.utcnow() + timedelta(days=2)) == 1
+        assert not os.path.exists(path)
+        assert client.get(url).status_code == 404
+
+
+class TestSignedScanUrls:
+    def _signed(self, client, sid):
+        r = client.get(f'/api/field-sheets/{sid}/scan')
+        assert r.status_code == 302
+        return r.headers['Location']
+
+    def test_download_redirects_to_stable_signed_url(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        assert self._signed(client, sid) == self._signed(client, sid)
+
+    def test_reupload_changes_scan_url_and_bare_redirect_is_not_cached(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        first = _upload(client, sid).get_json()['scan_url']
+        r = client.get(first)
+        assert r.headers['Cache-Control'] == 'private, max-age=%d' % client.application.config['SCAN_URL_TTL']
+        assert client.get(f'/api/field-sheets/{sid}/scan').headers['Cache-Control'] == 'private, no-cache'
+
+        second = _upload(client, sid, data=b'%PDF-1.4 rescan').get_json()['scan_url']
+        assert second != first
+        assert client.get(second, follow_redirects=True).data == b'%PDF-1.4 rescan'
+        stale = client.get(first)                           # old version: still redirects, but not cacheable
+        assert stale.headers['Cache-Control'] == 'private, no-cache'
+        assert client.get(stale.headers['Location']).data == b'%PDF-1.4 rescan'
+
+    def test_signed_url_works_without_session_and_is_immutable(self, client, app):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        url = self._signed(client, sid)
+        anonymous = app.test_client()
+        r = anonymous.get(url)
+        assert r.status_code == 200
+        assert 'immutable' in r.headers['Cache-Control']
+        assert r.headers['ETag'] == '"%s"' % hashlib.sha256(b'%PDF-1.4 scan').hexdigest()
+        assert anonymous.get(url, headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+    def test_range_request(self, client):
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        r = client.get(self._signed(client, sid), headers={'Range': 'bytes=0-3'})
+        assert r.status_code == 206
+        assert r.data == b'%PDF'
+        assert r.headers['Content-Range'] == 'bytes 0-3/13'
+
+    def test_tampered_or_expired_token_rejected(self, client, app, monkeypatch):
+        import time
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        url = self._signed(client, sid)
+        assert client.get(url[:-2] + 'xx').status_code == 403
+        monkeypatch.setattr(time, 'time', lambda: 4e9)
+        assert client.get(url).status_code == 403
+
+    def test_x_accel_redirect_offload(self, client, app):
+        app.config['SCAN_SENDFILE'] = 'x-accel-redirect'
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        r = client.get(self._signed(client, sid))
+        digest = hashlib.sha256(b'%PDF-1.4 scan').hexdigest()
+        assert r.headers['X-Accel-Redirect'] == f'/_scans/ohms/scans/{digest[:2]}/{digest}.pdf'
+        assert r.data == b''
+
+    def test_offload_quotes_uploaded_filename(self, client, app):
+        app.config['SCAN_SENDFILE'] = 'x-accel-redirect'
+        _login(client, 'alpha@test.com')
+        sid = _sheet_id()
+        _upload(client, sid)
+        from app.schedules.models import FieldSheet
+        FieldSheet.query.get(sid).scan_filename = 'Pit "B" – Ñ.pdf'      # as uploaded by the user
+        db.session.commit()
+        r = client.get(self._signed(client, sid))
+        assert r.status_code == 200
+        assert r.headers['Content-Disposition'] == (
+            'inline; filename="Pit \\"B\\"  N.pdf"; filename*=UTF-8\'\'Pit%20%22B%22%20%E2%80%93%20%C3%91.pdf')
+
+    def test_control_characters_dropped_from_filename(self):
+        from app.scans.serving import _clean_name, _content_disposition
+        assert _clean_name('scan\r\nSet-Cookie: x=1.pdf') == 'scanSet-Cookie: x=1.pdf'
+        assert _clean_name('\n') == 'scan'
+        assert _content_disposition('scan.pdf') == {'filename': 'scan.pdf'}
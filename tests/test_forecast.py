@@ -0,0 +1,146 @@
+r"""
+Tests for the sampling workload forecast (/api/sampling-schedules/forecast).
+
+Run with:
+    python -m pytest tests/test_forecast.py -v
+"""
+
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+from app.schedules.forecast import add_months, forecast
+from app.schedules.models import HEG, Stressor, SamplingSchedule, calculate_next_due, _add_months
+
+TODAY = date(2026, 1, 15)
+FREQUENCIES = ['Monthly', 'Quarterly', 'Bi-Annually', 'Annually']
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    ops = []
+    for name, code in [('Operation Alpha', 'ALPHA'), ('Operation Beta', 'BETA')]:
+        op = Operation(operation_name=name, code=code, status='active')
+        db.session.add(op)
+        db.session.flush()
+        ops.append(op)
+        user = User(username=f'user_{code.lower()}', email=f'{code.lower()}@test.com', role='admin',
+                    operation_id=op.id)
+        user.set_password('password')
+        db.session.add(user)
+        stressor = Stressor(name=f'Noise {code}', category='Physical', operation_id=op.id)
+        heg = HEG(heg_number='HEG-01', job_title='Driller', department=f'Mining {code}', operation_id=op.id)
+        db.session.add_all([stressor, heg])
+        db.session.flush()
+        db.session.add(SamplingSchedule(heg_id=heg.id, stressor_id=stressor.id, frequency='Quarterly',
+                                        next_sample_due=date.today() + timedelta(days=10), operation_id=op.id))
+    db.session.commit()
+
+
+def _reference(rows, months, today):
+    """Occurrences by stepping calculate_next_due one schedule at a time."""
+    end = _add_months(today, months)
+    occurrences, overdue = Counter(), 0
+    for frequency, due, last, dept, heg, stressor in rows:
+        due = due or calculate_next_due(last, frequency)
+        if due is None or calculate_next_due(due, frequency) is None:
+            continue
+        if due < today:
+            overdue += 1
+            due = calculate_next_due(today, frequency)
+        while due <= end:
+            occurrences[due.strftime('%Y-%m')] += 1
+            due = calculate_next_due(due, frequency)
+    return occurrences, overdue
+
+
+class TestProjection:
+    def test_vectorised_add_months_matches_scalar(self):
+        days = [date(2024, 1, 31), date(2024, 2, 29), date(2025, 8, 31), date(2026, 12, 15)]
+        for months in (1, 3, 6, 12, 13):
+            got = add_months(np.array(days, dtype='datetime64[D]'), np.full(len(days), months))
+            assert got.astype(object).tolist() == [_add_months(d, months) for d in days]
+
+    def test_matches_calculate_next_due(self):
+        rng = random.Random(3)
+        rows = []
+        for i in range(500):
+            due = TODAY + timedelta(days=rng.randint(-200, 400)) if rng.random() > 0.2 else None
+            last = TODAY - timedelta(days=rng.randint(0, 400)) if rng.random() > 0.2 else None
+            rows.append((rng.choice(FREQUENCIES + ['Weekly']), due, last, 'Plant', f'HEG-{i % 7}', 'Dust'))
+
+        result = forecast(rows, months=24, today=TODAY)
+        expected, overdue = _reference(rows, 24, TODAY)
+        got = dict(zip(result['by_month']['periods'], result['by_month']['total']))
+        assert {k: v for k, v in got.items() if v} == dict(expected)
+        assert result['overdue']['total'] == overdue
+        assert result['occurrences'] == sum(expected.values())
+        assert sum(result['by_week']['total']) == result['occurrences']
+
+    def test_month_end_clamping_is_cumulative(self):
+        rows = [('Monthly', date(2026, 1, 31), None, 'Plant', 'HEG-01', 'Dust')]
+        result = forecast(rows, months=3, today=date(2026, 1, 1))
+        assert result['by_month']['periods'] == ['2026-01', '2026-02', '2026-03', '2026-04']
+        assert result['by_month']['total'] == [1, 1, 1, 0]     # 31 Jan, 28 Feb, 28 Mar (not 31 Mar)
+        assert result['to'] == '2026-04-01'
+
+    def test_breakdowns_by_dimension(self):
+        rows = [
+            ('Quarterly', TODAY + timedelta(days=7), None, 'Plant', 'HEG-01', 'Dust'),
+            ('Quarterly', TODAY + timedelta(days=7), None, 'Mining', 'HEG-02', 'Dust'),
+            ('Annually',  TODAY - timedelta(days=7), None, 'Mining', 'HEG-02', 'Noise'),
+        ]
+        result = forecast(rows, months=6, today=TODAY)
+        weeks = result['by_week']
+        assert weeks['periods'][0] == '2026-01-12'               # Monday of TODAY's week
+        assert weeks['stressor']['Dust'][1] == 2
+        assert weeks['department']['Plant'][1] == 1
+        assert result['overdue'] == {'total': 1, 'department': {'Mining': 1}, 'heg': {'HEG-02': 1},
+                                     'stressor': {'Noise': 1}}
+
+    def test_fast_for_thousands_of_schedules(self):
+        rng = random.Random(5)
+        rows = [(rng.choice(FREQUENCIES), TODAY + timedelta(days=rng.randint(-30, 365)), None,
+                 f'Dept {i % 12}', f'HEG-{i % 300}', f'Stressor {i % 40}') for i in range(10_000)]
+        started = time.perf_counter()
+        result = forecast(rows, months=60, today=TODAY)
+        assert time.perf_counter() - started < 2
+        assert result['occurrences'] > 10_000 * 5
+
+
+class TestForecastEndpoint:
+    def test_scoped_to_operation(self, client):
+        client.post('/api/auth/login', json={'email': 'alpha@test.com', 'password': 'password'})
+        r = client.get('/api/sampling-schedules/forecast?months=6')
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data['schedules'] == 1
+        assert list(data['by_month']['department']) == ['Mining ALPHA']
+        assert len(data['by_month']['periods']) == 7
+
+    def test_months_validated(self, client):
+        client.post('/api/auth/login', json={'email': 'alpha@test.com', 'password': 'password'})
+        assert client.get('/api/sampling-schedules/forecast?months=0').status_code == 400
+        assert client.get('/api/sampling-schedules/forecast?months=500').status_code == 400
@@ -0,0 +1,108 @@
+r"""
+Tests for the aggregated HEG overview (HEG.overview_stats, /api/hegs?include=stats).
+
+Run with:
+    python -m pytest tests/test_heg_overview.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Operation
+from app.schedules.models import HEG, HEGStressor, SamplingSchedule
+from conftest import add_heg, add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _add_operation(code, n_hegs):
+    today = date.today()
+    op = add_operation(code)
+    stressors = [add_stressor(op, f'{code} Stressor {i}') for i in range(3)]
+    db.session.flush()
+    for h in range(n_hegs):
+        heg = add_heg(op, f'{code}-{h}')
+        db.session.flush()
+        for stressor in stressors[:h % 3 + 1]:
+            db.session.add(HEGStressor(heg_id=heg.id, stressor_id=stressor.id))
+        # h overdue, one due, one upcoming, one without a date
+        dues = [today - timedelta(days=5 + i) for i in range(h)] + \
+               [today + timedelta(days=10), today + timedelta(days=90), None]
+        for slot, due in enumerate(dues):
+            db.session.add(SamplingSchedule(heg_id=heg.id, stressor_id=stressors[0].id, occupation=f'Slot {slot}',
+                                            frequency='Quarterly', next_sample_due=due, operation_id=op.id))
+    return op
+
+
+def _seed():
+    _add_operation('ALPHA', 3)
+    _add_operation('BETA', 2)
+    db.session.commit()
+
+
+def _count_queries(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])   # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return len(statements)
+
+
+class TestOverviewStats:
+    def test_matches_per_heg_properties(self, app):
+        stats = HEG.overview_stats()
+        hegs = HEG.query.all()
+        assert set(stats) == {h.id for h in hegs}
+        for h in hegs:
+            assert stats[h.id]['overdue'] == h.overdue_count
+            assert stats[h.id]['stressors'] == len(h.heg_stressors)
+            assert stats[h.id]['schedules'] == len(h.sampling_schedules)
+            assert stats[h.id]['due'] == 1
+
+    def test_single_query_scoped_to_operation(self, app):
+        alpha = Operation.query.filter_by(code='ALPHA').first()
+        result = {}
+        assert _count_queries(lambda: result.update(HEG.overview_stats(alpha.id))) == 1
+        assert {db.session.get(HEG, i).heg_number for i in result} == {'ALPHA-0', 'ALPHA-1', 'ALPHA-2'}
+
+    def test_heg_list_page_does_not_load_per_heg(self, app, client):
+        before = _count_queries(lambda: client.get('/schedules/hegs'))
+        _add_operation('GAMMA', 6)
+        db.session.commit()
+        db.session.expire_all()
+        r = []
+        after = _count_queries(lambda: r.append(client.get('/schedules/hegs')))
+        assert r[0].status_code == 200
+        assert b'GAMMA-5' in r[0].data and b'5 Overdue' in r[0].data
+        assert after == before
+
+
+class TestHegsApi:
+    def test_stats_only_when_requested(self, client):
+        login(client)
+        assert 'stats' not in client.get('/api/hegs').get_json()[0]
+
+        rows = client.get('/api/hegs?include=stats').get_json()
+        assert [r['heg_number'] for r in rows] == ['ALPHA-0', 'ALPHA-1', 'ALPHA-2']
+        assert rows[2]['stats'] == {'stressors': 3, 'schedules': 5, 'overdue': 2, 'due': 1}
@@ -0,0 +1,219 @@
+r"""
+Tests for the vectorised lognormal HEG statistics (app/analytics) and
+/api/analytics/heg-statistics.
+
+Run with:
+    python -m pytest tests/test_heg_statistics.py -v
+"""
+
+import math
+import statistics
+from datetime import date
+
+import numpy as np
+import pytest
+from app import create_app, db
+from app.models import Operation
+from app.employees.models import Employee
+from app.schedules.models import Stressor, ExposureReading, EmployeeExposure, LabResult
+from app.analytics.lognormal import Z95, factorize, group_statistics, heg_statistics, substitute_non_detects, t95
+from app.analytics.samples import Samples, heg_key, lab_samples, reading_samples
+from conftest import add_heg, add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['cache'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+NOISE = [82.0, 88.0, 91.0, 85.0]
+SILICA = [0.05, 0.08, -0.02, 0.12, 0.03]      # -0.02: below the 0.02 detection limit
+
+
+def _add_operation(code):
+    op = add_operation(code)
+    noise = add_stressor(op, 'Noise', 'Physical', oel_value=85.0, oel_unit='dB(A)')
+    silica = add_stressor(op, 'Silica (RCS)', oel_value=0.1, oel_unit='mg/m³')
+    add_stressor(op, 'Manganese', oel_value=0.2, oel_unit='mg/m³')
+    add_heg(op, 'HEG-01', 'Drill Assistant', occupations=['Drilling Assistant'])
+    add_heg(op, 'HEG-02', 'Plant', 'Processing', occupations=['Boilermaker', 'Fitter'])
+    alice = Employee(name='Alice', job_title='Driller', department='Mining', heg_number='HEG-01: Drill Assistant',
+                     operation_id=op.id)
+    bob = Employee(name='Bob', job_title='Driller', department='Mining', heg_number='HEG-01', operation_id=op.id)
+    carol = Employee(name='Carol', job_title='Fitter', department='Processing', heg_number='HEG-02',
+                     operation_id=op.id)
+    nobody = Employee(name='Dave', job_title='Visitor', department='Admin', operation_id=op.id)
+    db.session.add_all([alice, bob, carol, nobody])
+    db.session.flush()
+
+    def reading(stressor, value, *employees):
+        r = ExposureReading(stressor_id=stressor.id, location='Pit', measured_value=value,
+                            oel_value=stressor.oel_value, operation_id=op.id)
+        for emp in employees:
+            r.employee_exposures.append(EmployeeExposure(employee_id=emp.id))
+        db.session.add(r)
+
+    for value in NOISE:
+        reading(noise, value, alice, bob, carol)    # HEG-01 once, HEG-02 once
+    for value in SILICA:
+        reading(silica, value, alice)
+    reading(silica, 0.5, nobody)                    # no HEG
+    for mn, si, occupation, run_minutes in [(0.1, 0.04, 'Boilermaker', 480), (0.2, None, 'Fitter', 450),
+                                            (0.4, 0.06, 'Boilermaker', 200),    # invalid: 42 % of the shift
+                                            (0.3, 0.05, 'Visitor', 480)]:       # occupation not in a HEG
+        db.session.add(LabResult(activity_area='Plant', occupation=occupation, result_mn_twa=mn,
+                                 result_si_twa=si, result_pnoc_twa=None, shift_duration=8,
+                                 sampling_duration=run_minutes, sampling_date=date(2026, 2, 1),
+                                 operation_id=op.id))
+
+
+def _seed():
+    _add_operation('ALPHA')
+    _add_operation('BETA')
+    db.session.commit()
+
+
+def _reference(values):
+    y = [math.log(v) for v in values]
+    mean, sd = statistics.mean(y), statistics.stdev(y)
+    n = len(y)
+    return {
+        'gm':  math.exp(mean),
+        'gsd': math.exp(sd),
+        'p95': math.exp(mean + Z95 * sd),
+        'ucl95': math.exp(mean + sd**2 / 2 + float(t95(n - 1)) * math.sqrt(sd**2 / n + sd**4 / (2 * (n - 1)))),
+    }
+
+
+class TestLognormal:
+    def test_matches_per_group_reference(self):
+        rng = np.random.default_rng(3)
+        sizes = [2, 5, 17, 40, 300]
+        values = [rng.lognormal(-1, 0.8, n) for n in sizes]
+        group = np.concatenate([np.full(n, i) for i, n in enumerate(sizes)])
+        order = rng.permutation(group.size)      # groups need not be contiguous
+        stats = group_statistics(group[order], np.concatenate(values)[order], len(sizes))
+        for i, v in enumerate(values):
+            for name, expected in _reference(v).items():
+                assert stats[name][i] == pytest.approx(expected, rel=1e-9), name
+            assert stats['n'][i] == sizes[i]
+
+    def test_single_sample_has_only_gm(self):
+        stats = group_statistics(np.array([0, 1, 1]), np.array([2.0, 1.0, 4.0]), 2)
+        assert stats['gm'][0] == pytest.approx(2.0)
+        assert np.isnan(stats['gsd'][0]) and np.isnan(stats['ucl95'][0])
+        assert stats['gm'][1] == pytest.approx(2.0)
+
+    def test_non_detects(self):
+        group = np.array([0, 0, 0, 1, 1])
+        value = np.array([0.4, -0.1, 0.0, 0.0, 0.0])
+        assert substitute_non_detects(group, value, 2) == pytest.approx(
+            [0.4, 0.1 / math.sqrt(2), 0.4 / math.sqrt(2), np.nan, np.nan], nan_ok=True)
+        assert substitute_non_detects(group, value, 2, 'half')[1] == pytest.approx(0.05)
+        stats = group_statistics(group, value, 2)
+        assert list(stats['nonDetects']) == [2, 2]
+        assert list(stats['n']) == [3, 0]                 # no LOD known for group 1
+
+    def test_t_quantiles(self):
+        assert t95([1, 10, 30]) == pytest.approx([6.314, 1.812, 1.697])
+        assert t95([40, 60, 120, 10_000]) == pytest.approx([1.684, 1.671, 1.658, 1.645], abs=1e-3)
+        assert np.isnan(t95([0])[0])
+
+    def test_factorize(self):
+        (a, b), group = factorize(np.array([2, 1, 2, 2]), np.array(['x', 'y', 'x', 'z'], dtype=object))
+        assert list(zip(a, b)) == [(1, 'y'), (2, 'x'), (2, 'z')]
+        assert list(group) == [1, 0, 1, 2]
+
+    def test_million_samples(self):
+        n = 1_000_000
+        rng = np.random.default_rng(5)
+        hegs = np.array([f'HEG-{i:02d}' for i in range(50)], dtype=object)
+        samples = Samples(np.arange(n), rng.integers(1, 10, n), hegs[rng.integers(0, 50, n)],
+                          rng.integers(1, 20, n), np.zeros(n, 'datetime64[D]'), rng.lognormal(0, 1, n), 0)
+        rows = heg_statistics(samples)
+        assert len(rows) == 9 * 50 * 19
+        assert sum(r['samples'] for r in rows) == n
+        assert np.mean([math.log(r['gsd']) for r in rows]) == pytest.approx(1.0, abs=0.01)
+
+
+class TestLoaders:
+    def test_heg_key(self):
+        assert heg_key('HEG-01: Drill Assistant') == 'HEG-01'
+        assert heg_key(' HEG-02 ') == 'HEG-02'
+        assert heg_key('') is None and heg_key(None) is None
+
+    def test_readings_per_employee_heg(self, app):
+        op = Operation.query.filter_by(code='ALPHA').first()
+        samples = reading_samples(op.id)
+        pairs = sorted(zip(samples.heg.tolist(), samples.value.tolist()))
+        assert pairs == sorted([('HEG-01', v) for v in NOISE + SILICA] + [('HEG-02', v) for v in NOISE])
+        assert samples.unassigned == 1
+
+    def test_lab_results_per_occupation_heg(self, app):
+        op = Operation.query.filter_by(code='ALPHA').first()
+        samples = lab_samples(op.id)
+        names = {s.id: s.name for s in Stressor.query.filter_by(operation_id=op.id)}
+        got = sorted((h, names[s], v) for h, s, v in zip(samples.heg, samples.stressor_id, samples.value))
+        assert got == [('HEG-02', 'Manganese', 0.1), ('HEG-02', 'Manganese', 0.2), ('HEG-02', 'Silica (RCS)', 0.04)]
+        assert samples.unassigned == 2      # the Visitor's Mn and Si
+
+
+class TestEndpoint:
+    def test_statistics_per_heg_and_stressor(self, client):
+        login(client)
+        r = client.get('/api/analytics/heg-statistics')
+        assert r.status_code == 200
+        data = r.get_json()
+        assert (data['source'], data['nd'], data['samples'], data['unassigned']) == ('readings', 'sqrt2', 13, 1)
+        groups = {(g['heg'], g['stressor']): g for g in data['groups']}
+        assert set(groups) == {('HEG-01', 'Noise'), ('HEG-01', 'Silica (RCS)'), ('HEG-02', 'Noise')}
+        noise = groups[('HEG-01', 'Noise')]
+        for name, expected in _reference(NOISE).items():
+            assert noise[name] == pytest.approx(expected)
+        assert (noise['oel'], noise['unit']) == (85.0, 'dB(A)')
+        silica = groups[('HEG-01', 'Silica (RCS)')]
+        assert (silica['samples'], silica['nonDetects'], silica['n']) == (5, 1, 5)
+        expected = _reference([0.05, 0.08, 0.02 / math.sqrt(2), 0.12, 0.03])
+        assert silica['gm'] == pytest.approx(expected['gm'])
+
+    def test_lab_results_and_nd_option(self, client):
+        login(client)
+        data = client.get('/api/analytics/heg-statistics?source=lab-results&nd=half').get_json()
+        assert sorted((g['heg'], g['stressor'], g['samples']) for g in data['groups']) == \
+            [('HEG-02', 'Manganese', 2), ('HEG-02', 'Silica (RCS)', 1)]
+
+    def test_scoped_to_operation(self, client):
+        login(client)
+        data = client.get('/api/analytics/heg-statistics').get_json()
+        beta = Operation.query.filter_by(code='BETA').first()
+        assert {g['operationId'] for g in data['groups']} != {beta.id}
+        assert len({g['operationId'] for g in data['groups']}) == 1
+
+    def test_bad_options(self, client):
+        login(client)
+        assert client.get('/api/analytics/heg-statistics?source=spreadsheet').status_code == 400
+        assert client.get('/api/analytics/heg-statistics?nd=zero').status_code == 400
+
+    def test_cached_until_readings_change(self, client):
+        login(client)
+        first = client.get('/api/analytics/heg-statistics').get_json()
+        stressor = Stressor.query.filter_by(name='Noise').first()
+        reading = ExposureReading.query.filter_by(stressor_id=stressor.id).first()
+        reading.measured_value = 120.0
+        db.session.commit()
+        second = client.get('/api/analytics/heg-statistics').get_json()
+        assert second != first
@@ -0,0 +1,52 @@
+r"""
+Tests for the JSON providers (ISO dates, optional orjson).
+
+Run with:
+    python -m pytest tests/test_json_provider.py -v
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from app import create_app, json_provider
+from app.json_provider import IsoJSONProvider, OrjsonProvider
+
+PAYLOAD = {'day': date(2026, 3, 2), 'at': datetime(2026, 3, 2, 8, 15, 30), 'dose': Decimal('0.25'), 'n': None}
+EXPECTED = {'day': '2026-03-02', 'at': '2026-03-02T08:15:30', 'dose': '0.25', 'n': None}
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    with application.app_context():
+        yield application
+
+
+@pytest.mark.parametrize('provider', [
+    IsoJSONProvider,
+    pytest.param(OrjsonProvider, marks=pytest.mark.skipif(json_provider.orjson is None, reason='orjson not installed')),
+])
+def test_dates_are_iso_8601(app, provider):
+    app.json = provider(app)
+    with app.test_request_context():
+        resp = app.json.response(PAYLOAD)
+    assert resp.mimetype == 'application/json'
+    assert app.json.loads(resp.get_data()) == EXPECTED
+    assert app.json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    assert json_provider.provider_class('auto') is IsoJSONProvider
+    assert json_provider.provider_class('default') is IsoJSONProvider
+    with pytest.raises(RuntimeError):
+        json_provider.provider_class('orjson')
+
+
+def test_request_bodies_parse(app):
+    app.json = json_provider.provider_class('auto')(app)
+    with app.test_request_context(json={'a': [1, 2]}):
+        from flask import request
+        assert request.get_json() == {'a': [1, 2]}
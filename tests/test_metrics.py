@@ -0,0 +1,109 @@
+r"""
+Tests for the Prometheus /metrics endpoint and instrumentation helpers.
+
+Run with:
+    python -m pytest tests/test_metrics.py -v
+"""
+
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+from app.telemetry import metrics
+
+prometheus_client = pytest.importorskip('prometheus_client')
+REGISTRY = prometheus_client.REGISTRY
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    application.config['METRICS_TOKEN'] = 'scrape-secret'
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    admin = User(username='root', email='root@test.com', role='super_admin')
+    admin.set_password('password')
+    user = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add_all([admin, user])
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def _count(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetricsEndpoint:
+    def test_requires_token_or_super_admin(self, client):
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        _login(client, 'alpha@test.com')
+        assert client.get('/metrics').status_code == 401
+        client.post('/api/auth/logout')
+        _login(client, 'root@test.com')
+        assert client.get('/metrics').status_code == 200
+
+    def test_request_latency_by_endpoint_and_status(self, client):
+        labels = dict(blueprint='api', endpoint='api.list_field_sheets', method='GET', status='401')
+        before = _count('ohms_http_request_duration_seconds_count', **labels)
+        client.get('/api/field-sheets')
+        r = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        assert r.mimetype == 'text/plain'
+        assert _count('ohms_http_request_duration_seconds_count', **labels) == before + 1
+        assert b'ohms_request_queries_bucket' in r.data
+
+
+class TestInstrumentation:
+    def test_email_duration_and_failures(self, monkeypatch):
+        from app import email
+
+        class Refusing:
+            def __init__(self, *a):
+                pass
+
+            def send(self, message):
+                raise RuntimeError('401 Unauthorized')
+
+        monkeypatch.setattr(email, 'SendGridAPIClient', Refusing)
+        sent = _count('ohms_email_send_seconds_count', kind='reset')
+        failed = _count('ohms_email_failures_total', kind='reset')
+        with pytest.raises(RuntimeError):
+            email.send_reset_email('a@test.com', 'a', 'http://x/reset')
+        assert _count('ohms_email_send_seconds_count', kind='reset') == sent + 1
+        assert _count('ohms_email_failures_total', kind='reset') == failed + 1
+
+    def test_alerts_job_timer_records_success_only(self):
+        runs = _count('ohms_alerts_job_duration_seconds_count')
+        with pytest.raises(ValueError):
+            with metrics.alerts_job_timer():
+                raise ValueError
+        with metrics.alerts_job_timer():
+            pass
+        assert _count('ohms_alerts_job_duration_seconds_count') == runs + 2
+        assert _count('ohms_alerts_job_last_success_unixtime') > 0
+
+    def test_scan_upload_timer(self):
+        before = _count('ohms_scan_upload_seconds_count', backend='cloudinary')
+        with metrics.scan_upload_timer('cloudinary'):
+            pass
+        assert _count('ohms_scan_upload_seconds_count', backend='cloudinary') == before + 1
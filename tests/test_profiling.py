@@ -0,0 +1,123 @@
+r"""
+Tests for on-demand request profiling (X-Profile, /api/_debug/profiles).
+
+Run with:
+    python -m pytest tests/test_profiling.py -v
+"""
+
+import os
+import pstats
+
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+
+
+@pytest.fixture(scope='function')
+def app(tmp_path):
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    application.config['PROFILE_DIR'] = str(tmp_path / 'profiles')
+    application.config['PROFILE_MAX_FILES'] = 3
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    admin = User(username='root', email='root@test.com', role='super_admin')
+    admin.set_password('password')
+    user = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add_all([admin, user])
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def _saved(app):
+    path = app.config['PROFILE_DIR']
+    return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+class TestTrigger:
+    def test_untriggered_request_is_not_profiled(self, app, client):
+        _login(client, 'root@test.com')
+        r = client.get('/api/operations')
+        assert 'X-Profile-Id' not in r.headers
+        assert _saved(app) == []
+
+    def test_ignored_for_non_super_admin(self, app, client):
+        _login(client, 'alpha@test.com')
+        r = client.get('/api/field-sheets', headers={'X-Profile': '1'})
+        assert r.status_code == 200
+        assert 'X-Profile-Id' not in r.headers
+        assert _saved(app) == []
+
+    def test_header_saves_html_profile(self, app, client):
+        pytest.importorskip('pyinstrument')
+        _login(client, 'root@test.com')
+        r = client.get('/api/operations', headers={'X-Profile': '1'})
+        name = r.headers['X-Profile-Id']
+        assert name.endswith('.html') and 'api.list_operations-200-' in name
+        assert _saved(app) == [name]
+
+    def test_query_flag_saves_pstats(self, app, client):
+        _login(client, 'root@test.com')
+        r = client.get('/api/operations?_profile=cprofile')
+        name = r.headers['X-Profile-Id']
+        assert name.endswith('.pstats')
+        stats = pstats.Stats(os.path.join(app.config['PROFILE_DIR'], name))
+        assert any(func[2] == 'list_operations' for func in stats.stats)
+
+    def test_directory_is_bounded(self, app, client):
+        _login(client, 'root@test.com')
+        names = [client.get('/api/operations', headers={'X-Profile': 'cprofile'}).headers['X-Profile-Id']
+                 for _ in range(5)]
+        assert set(_saved(app)) <= set(names)
+        assert len(_saved(app)) == 3
+
+
+class TestProfilesEndpoint:
+    def test_super_admin_only(self, client):
+        assert client.get('/api/_debug/profiles').status_code == 401
+        _login(client, 'alpha@test.com')
+        assert client.get('/api/_debug/profiles').status_code == 403
+
+    def test_list_download_delete(self, client):
+        _login(client, 'root@test.com')
+        name = client.get('/api/operations', headers={'X-Profile': 'cprofile'}).headers['X-Profile-Id']
+
+        listing = client.get('/api/_debug/profiles').get_json()
+        assert [p['name'] for p in listing['profiles']] == [name]
+        assert listing['profiles'][0]['kind'] == 'cprofile'
+
+        r = client.get(f'/api/_debug/profiles/{name}')
+        assert r.status_code == 200
+        assert 'attachment' in r.headers['Content-Disposition']
+
+        assert client.delete(f'/api/_debug/profiles/{name}').status_code == 200
+        assert client.get(f'/api/_debug/profiles/{name}').status_code == 404
+        assert client.get('/api/_debug/profiles/config.py').status_code == 404
+
+    def test_delete_needs_no_csrf_token(self, app, client):
+        app.config['WTF_CSRF_ENABLED'] = True
+        assert _login(client, 'root@test.com').status_code == 200
+        name = client.get('/api/operations', headers={'X-Profile': 'cprofile'}).headers['X-Profile-Id']
+        r = client.delete(f'/api/_debug/profiles/{name}')
+        assert r.status_code == 200
+        assert _saved(app) == []
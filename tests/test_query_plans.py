@@ -0,0 +1,234 @@
+r"""
+Query-plan regression tests for hot queries.
+
+Each entry in HOT_QUERIES runs a real endpoint or helper against a synthetic
+20-tenant dataset (benchmarks.generator), captures the SELECTs it issues and
+EXPLAINs them. A test fails when a guarded table is read with a full scan —
+the symptom of a dropped index or an ORM change that stopped filtering on an
+indexed column.
+
+SQLite (EXPLAIN QUERY PLAN) always runs. To check Postgres plans too, point
+QUERY_PLAN_POSTGRES_URL at an empty scratch database:
+
+    QUERY_PLAN_POSTGRES_URL=postgresql://localhost/ohms_plans \
+    python -m pytest tests/test_query_plans.py -v
+
+Postgres legitimately seq-scans tiny tables, so there only tables with at
+least PG_MIN_ROWS rows are guarded.
+"""
+
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.employees.models import Employee
+from app.schedules.models import SamplingSchedule, Stressor
+from benchmarks.generator import generate
+from config import Config
+
+TODAY = date(2026, 3, 2)
+OPERATION = 3          # tenant the queries run as (admin3@bench.test)
+PG_MIN_ROWS = 1000
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope='module', params=['sqlite', 'postgresql'])
+def app(request):
+    if request.param == 'postgresql':
+        url = os.environ.get('QUERY_PLAN_POSTGRES_URL')
+        if not url:
+            pytest.skip('QUERY_PLAN_POSTGRES_URL not set')
+    else:
+        url = 'sqlite:///:memory:'
+
+    original = Config.SQLALCHEMY_DATABASE_URI
+    Config.SQLALCHEMY_DATABASE_URI = url
+    try:
+        application = create_app()
+    finally:
+        Config.SQLALCHEMY_DATABASE_URI = original
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        generate(operations=20, employees=4_000, readings=10_000, field_sheets=4_000, lab_results=4_000,
+                 hegs_per_operation=10, seed=7, today=TODAY)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    c = app.test_client()
+    r = c.post('/api/auth/login', json={'email': f'admin{OPERATION}@bench.test', 'password': 'benchmark'})
+    assert r.status_code == 200
+    return c
+
+
+# ---------------------------------------------------------------------------
+# Plan capture
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def capture_selects():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+def _sqlite_full_scans(statement, parameters, tables):
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    scans = []
+    for row in rows:
+        m = re.match(r'SCAN (\w+)', row[3])
+        if m and m.group(1) in tables:
+            scans.append(row[3])
+    return scans
+
+
+def _pg_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _pg_plan_nodes(child)
+
+
+def _pg_full_scans(statement, parameters, tables):
+    conn = db.session.connection()
+    plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+    scans = []
+    for node in _pg_plan_nodes(plan[0]['Plan']):
+        relation = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and relation in tables:
+            rows = conn.execute(text('SELECT reltuples FROM pg_class WHERE relname = :r'), {'r': relation}).scalar()
+            if rows >= PG_MIN_ROWS:
+                scans.append(f'Seq Scan on {relation} ({int(rows)} rows)')
+    return scans
+
+
+def full_scans(statements, tables):
+    """Full scans of any of `tables` in the plans of the captured statements."""
+    check = _pg_full_scans if db.engine.dialect.name == 'postgresql' else _sqlite_full_scans
+    found = []
+    for statement, parameters in statements:
+        for scan in check(statement, parameters, tables):
+            found.append(f'{scan}\n    in: {" ".join(statement.split())[:300]}')
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Hot queries: (name, run(client), guarded tables)
+# ---------------------------------------------------------------------------
+
+def _get(path):
+    def run(client):
+        r = client.get(path)
+        assert r.status_code == 200, r.get_data(as_text=True)[:200]
+    return run
+
+
+def _exceeding_readings(client):
+    stressor = Stressor.query.filter_by(operation_id=OPERATION).first()
+    _get(f'/api/exposure-readings?exceeds=true&hazardId={stressor.id}')(client)
+
+
+def _exposure_profile(client):
+    employee = Employee.query.filter_by(operation_id=OPERATION).first()
+    _get(f'/api/employees/{employee.id}/exposure-profile')(client)
+
+
+def _alert_windows(client):
+    import alerts_job
+    alerts_job.due_items(OPERATION, TODAY, TODAY + timedelta(days=alerts_job.WARN_DAYS))
+
+
+def _scoped_status(status):
+    def run(client):
+        SamplingSchedule.query.filter_by(operation_id=OPERATION) \
+            .filter(SamplingSchedule.status_filter(status, TODAY)).all()
+    return run
+
+
+def _stored_status(status):
+    def run(client):
+        SamplingSchedule.query.filter_by(operation_id=OPERATION, status=status).all()
+    return run
+
+
+def _status(status):
+    def run(client):
+        SamplingSchedule.query.filter(SamplingSchedule.status_filter(status, TODAY)).all()
+    return run
+
+
+HOT_QUERIES = [
+    # _scoped lists
+    ('employees',            _get('/api/employees'),            {'employee'}),
+    ('departments',          _get('/api/departments'),          {'employee'}),
+    ('stressors',            _get('/api/stressors'),            {'stressor'}),
+    ('hegs',                 _get('/api/hegs'),                 {'heg'}),
+    ('exposure readings',    _get('/api/exposure-readings'),    {'exposure_reading', 'employee_exposure'}),
+    ('medical records',      _get('/api/medical-records'),      {'medical_record'}),
+    ('sampling schedules',   _get('/api/sampling-schedules'),   {'sampling_schedule', 'heg', 'stressor'}),
+    ('field sheets',         _get('/api/field-sheets'),         {'field_sheet'}),
+    ('lab results',          _get('/api/lab-results'),          {'lab_result'}),
+    ('users',                _get('/api/users'),                {'user'}),
+    # DMPR aggregation
+    ('field sheet dmpr',     _get('/api/field-sheets/dmpr-data'), {'field_sheet'}),
+    ('lab result dmpr',      _get('/api/lab-results/dmpr-data'),  {'lab_result'}),
+    # OEL exceedances
+    ('exceeding readings',   _exceeding_readings,               {'exposure_reading', 'employee_exposure'}),
+    ('exceedance counts',    _get('/api/exposure-readings/exceedances'), {'exposure_reading'}),
+    ('exposure profile',     _exposure_profile,                 {'employee_exposure', 'exposure_reading'}),
+    # dashboard aggregates
+    ('dashboard',            _get('/api/dashboard'),
+     {'medical_record', 'sampling_schedule', 'exposure_reading', 'employee', 'heg'}),
+    # HEG statistics
+    ('heg statistics',       _get('/api/analytics/heg-statistics'), {'exposure_reading', 'employee_exposure'}),
+    ('heg statistics lab',   _get('/api/analytics/heg-statistics?source=lab-results'), {'lab_result', 'heg'}),
+    ('en689',                _get('/api/analytics/en689'),      {'lab_result', 'heg'}),
+    # alert windows
+    ('alert windows',        _alert_windows,                    {'medical_record', 'sampling_schedule'}),
+    # schedule status filters
+    ('scoped overdue',       _scoped_status('Overdue'),         {'sampling_schedule'}),
+    ('scoped due',           _scoped_status('Due'),             {'sampling_schedule'}),
+    ('scoped upcoming',      _scoped_status('Upcoming'),        {'sampling_schedule'}),
+    ('overdue',              _status('Overdue'),                {'sampling_schedule'}),
+    ('due',                  _status('Due'),                    {'sampling_schedule'}),
+    ('unknown',              _status('Unknown'),                {'sampling_schedule'}),
+    ('stored status',        _stored_status('Overdue'),         {'sampling_schedule'}),
+]
+
+
+@pytest.mark.parametrize('run,tables', [q[1:] for q in HOT_QUERIES], ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_indexes(client, run, tables):
+    with capture_selects() as statements:
+        run(client)
+    assert statements, 'nothing was captured'
+    scans = full_scans(statements, tables)
+    assert not scans, 'Full table scan:\n  ' + '\n  '.join(scans)
+
+
+def test_detects_full_scan(client):
+    """The checker itself: an unindexed filter is reported."""
+    with capture_selects() as statements:
+        SamplingSchedule.query.filter(SamplingSchedule.remarks == 'x').all()
+    assert full_scans(statements, {'sampling_schedule'})
@@ -0,0 +1,191 @@
+r"""
+Tests for bulk sampling schedule generation from the HEG–stressor matrix.
+
+Run with:
+    python -m pytest tests/test_schedule_generate.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app import create_app, db
+from app.models import Operation
+from app.schedules.models import HEG, HEGStressor, Stressor, SamplingSchedule, calculate_next_due
+from app.schedules.generate import generate_schedules, schedule_frequency
+from conftest import add_heg, add_operation, add_stressor, login
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _add_operation(code):
+    op = add_operation(code)
+    noise = add_stressor(op, f'Noise {code}', 'Physical', default_frequency='6 Monthly')
+    silica = add_stressor(op, f'Silica {code}')
+    drill = add_heg(op, f'{code}-01', risk_level='High', occupations=['Driller', 'Driller Assistant', ' ', 'Driller'])
+    plant = add_heg(op, f'{code}-02', 'Fitter', 'Plant', risk_level='Low', occupations=[])
+    db.session.flush()
+    for heg in (drill, plant):
+        for stressor in (noise, silica):
+            db.session.add(HEGStressor(heg_id=heg.id, stressor_id=stressor.id))
+    return op
+
+
+def _seed():
+    _add_operation('ALPHA')
+    _add_operation('BETA')
+    db.session.commit()
+
+
+def _keys(op_code):
+    op = Operation.query.filter_by(code=op_code).first()
+    return {(s.heg.heg_number, s.stressor.name, s.occupation): s
+            for s in SamplingSchedule.query.filter_by(operation_id=op.id)}
+
+
+class TestGenerateSchedules:
+    def test_one_schedule_per_link_and_occupation(self, app):
+        today = date(2026, 3, 2)
+        summary = generate_schedules(today=today)
+        assert summary == {'created': 12, 'links': 8}
+
+        schedules = _keys('ALPHA')
+        assert set(schedules) == {
+            ('ALPHA-01', 'Noise ALPHA', 'Driller'), ('ALPHA-01', 'Noise ALPHA', 'Driller Assistant'),
+            ('ALPHA-01', 'Silica ALPHA', 'Driller'), ('ALPHA-01', 'Silica ALPHA', 'Driller Assistant'),
+            ('ALPHA-02', 'Noise ALPHA', None), ('ALPHA-02', 'Silica ALPHA', None),
+        }
+        # Stressor default first, then HEG risk level
+        assert schedules[('ALPHA-01', 'Noise ALPHA', 'Driller')].frequency == 'Bi-Annually'
+        assert schedules[('ALPHA-01', 'Silica ALPHA', 'Driller')].frequency == 'Quarterly'
+        assert schedules[('ALPHA-02', 'Silica ALPHA', None)].frequency == 'Annually'
+        # Never sampled: baseline due today
+        for s in schedules.values():
+            assert s.next_sample_due == today
+            assert s.status == 'Due'
+
+    def test_due_from_last_sampled_date(self, app):
+        last = date.today() - timedelta(days=200)
+        generate_schedules(last_sampled=last)
+        for s in _keys('BETA').values():
+            assert s.last_sampled_date == last
+            assert s.next_sample_due == calculate_next_due(last, s.frequency)
+            assert s.status == s.computed_status
+
+    def test_rerun_only_fills_new_links(self, app):
+        generate_schedules()
+        assert generate_schedules() == {'created': 0, 'links': 0}
+
+        beta = Operation.query.filter_by(code='BETA').first()
+        heg = HEG.query.filter_by(heg_number='BETA-02').first()
+        dust = Stressor(name='Dust BETA', category='Chemical', default_frequency='Monthly', operation_id=beta.id)
+        db.session.add(dust)
+        db.session.flush()
+        db.session.add(HEGStressor(heg_id=heg.id, stressor_id=dust.id))
+        db.session.commit()
+
+        assert generate_schedules() == {'created': 1, 'links': 1}
+        assert _keys('BETA')[('BETA-02', 'Dust BETA', None)].frequency == 'Monthly'
+
+    def test_created_counts_inserted_rows_only(self, app, monkeypatch):
+        from app.schedules import generate
+        # Every row is attempted twice, as if a concurrent run inserted it first
+        monkeypatch.setattr(generate, '_occupations', lambda occupations: ['Driller', 'Driller'])
+        assert generate_schedules() == {'created': 8, 'links': 8}
+        assert SamplingSchedule.query.count() == 8
+
+    def test_scoped_to_operation(self, app):
+        alpha = Operation.query.filter_by(code='ALPHA').first()
+        assert generate_schedules(alpha.id)['created'] == 6
+        assert _keys('ALPHA') and not _keys('BETA')
+
+    def test_constant_query_count(self, app):
+        statements = []
+        listener = lambda *args: statements.append(args[2])   # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            generate_schedules()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT INTO SAMPLING_SCHEDULE')]
+        assert len(inserts) == 1
+        assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 1
+
+    def test_frequency_mapping(self):
+        assert schedule_frequency('Annual', 'High') == 'Annually'
+        assert schedule_frequency(' quarterly ', 'Low') == 'Quarterly'
+        assert schedule_frequency(None, 'Moderate') == 'Bi-Annually'
+        assert schedule_frequency('Fortnightly', 'Unrated') == 'Annually'
+
+
+class TestUniqueSchedule:
+    def test_index_rejects_duplicate(self, app):
+        generate_schedules()
+        s = SamplingSchedule.query.filter_by(occupation=None).first()
+        db.session.add(SamplingSchedule(heg_id=s.heg_id, stressor_id=s.stressor_id, frequency='Monthly'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        # A different occupation for the same link is fine
+        db.session.add(SamplingSchedule(heg_id=s.heg_id, stressor_id=s.stressor_id, occupation='Operator',
+                                        frequency='Monthly'))
+        db.session.commit()
+
+    def test_api_create_rejects_duplicate(self, app, client):
+        login(client)
+        heg = HEG.query.filter_by(heg_number='ALPHA-02').first()
+        stressor = Stressor.query.filter_by(name='Noise ALPHA').first()
+        payload = {'hegId': heg.id, 'stressorId': stressor.id, 'frequency': 'Quarterly'}
+        assert client.post('/api/sampling-schedules', json=payload).status_code == 201
+        r = client.post('/api/sampling-schedules', json=payload)
+        assert r.status_code == 400
+        assert 'already exists' in r.get_json()['error']
+
+        other = client.post('/api/sampling-schedules', json={**payload, 'occupation': 'Fitter'}).get_json()
+        r = client.put(f"/api/sampling-schedules/{other['id']}", json={'occupation': None})
+        assert r.status_code == 400
+        assert db.session.get(SamplingSchedule, other['id']).occupation == 'Fitter'
+
+
+class TestEndpoint:
+    def test_generates_for_own_operation(self, app, client):
+        login(client)
+        r = client.post('/api/sampling-schedules/generate', json={'lastSampledDate': '2026-01-31'})
+        assert r.status_code == 200
+        assert r.get_json() == {'created': 6, 'links': 4}
+        assert not _keys('BETA')
+        assert {s.next_sample_due for s in _keys('ALPHA').values()} == {
+            date(2026, 4, 30), date(2026, 7, 31), date(2027, 1, 31)}
+
+    def test_rejects_bad_date(self, client):
+        login(client)
+        r = client.post('/api/sampling-schedules/generate', json={'lastSampledDate': '31/01/2026'})
+        assert r.status_code == 400
+
+    def test_requireslogin(self, client):
+        r = client.post('/api/sampling-schedules/generate', json={})
+        assert r.status_code in (302, 401)
+
+    def test_cli(self, app):
+        result = app.test_cli_runner().invoke(args=['schedules', 'generate', '--last-sampled', '2026-01-31'])
+        assert result.exit_code == 0, result.output
+        assert '12 schedule(s) created for 8 link(s)' in result.output
+        result = app.test_cli_runner().invoke(args=['schedules', 'generate'])
+        assert '0 schedule(s) created' in result.output
@@ -0,0 +1,88 @@
+r"""
+Tests for the set-based sampling schedule status refresh.
+
+Run with:
+    python -m pytest tests/test_schedule_status.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from app import create_app, db
+from app.models import Operation
+from app.schedules.models import HEG, Stressor, SamplingSchedule
+from app.schedules.status import refresh_statuses
+
+TODAY = date(2026, 3, 2)
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+def _seed():
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    stressor = Stressor(name='Noise', category='Physical', operation_id=op.id)
+    heg = HEG(heg_number='HEG-01', job_title='Driller', department='Mining', operation_id=op.id)
+    db.session.add_all([stressor, heg])
+    db.session.flush()
+    # (stored status, next due) — stored values as they were when last saved
+    for slot, (status, due) in enumerate([
+        ('Upcoming', TODAY - timedelta(days=3)),     # → Overdue
+        ('Due',      TODAY - timedelta(days=1)),     # → Overdue
+        ('Upcoming', TODAY + timedelta(days=30)),    # → Due
+        ('Upcoming', TODAY + timedelta(days=31)),    # unchanged
+        ('Overdue',  TODAY - timedelta(days=90)),    # unchanged
+        ('Due',      TODAY),                         # unchanged
+        ('Upcoming', None),                          # → Unknown
+    ]):
+        db.session.add(SamplingSchedule(heg_id=heg.id, stressor_id=stressor.id, occupation=f'Slot {slot}',
+                                        frequency='Quarterly', next_sample_due=due, status=status,
+                                        operation_id=op.id))
+    db.session.commit()
+
+
+class TestRefreshStatuses:
+    def test_changes_only_stale_rows(self, app):
+        summary = refresh_statuses(TODAY)
+        assert summary['changed'] == 4
+        assert summary['transitions'] == {
+            'Due → Overdue': 1,
+            'Upcoming → Due': 1,
+            'Upcoming → Overdue': 1,
+            'Upcoming → Unknown': 1,
+        }
+
+    def test_matches_computed_status(self, app, monkeypatch):
+        refresh_statuses(TODAY)
+        db.session.expire_all()
+
+        class FrozenDate(date):
+            @classmethod
+            def today(cls):
+                return TODAY
+        monkeypatch.setattr('app.schedules.models.date', FrozenDate)
+        for s in SamplingSchedule.query.all():
+            assert s.status == s.computed_status
+
+    def test_second_run_is_a_no_op(self, app):
+        refresh_statuses(TODAY)
+        assert refresh_statuses(TODAY) == {'changed': 0, 'transitions': {}}
+
+    def test_cli(self, app):
+        result = app.test_cli_runner().invoke(args=['schedules', 'refresh-status', '--today', TODAY.isoformat()])
+        assert result.exit_code == 0, result.output
+        assert 'Upcoming → Overdue: 1' in result.output
+        assert '4 schedule(s) changed status' in result.output
+        assert SamplingSchedule.query.filter_by(status='Overdue').count() == 3
@@ -0,0 +1,116 @@
+r"""
+Tests for the slow-query ring buffer (/api/_debug/slow-queries).
+
+Run with:
+    python -m pytest tests/test_slow_queries.py -v
+"""
+
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+from app.employees.models import Employee
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    application.config['SLOW_QUERY_MS'] = 0      # record everything
+    with application.app_context():
+        db.create_all()
+        _seed()
+        application.extensions['slow_queries'].clear()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    admin = User(username='root', email='root@test.com', role='super_admin')
+    admin.set_password('password')
+    user = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add_all([admin, user])
+    db.session.add(Employee(name='Alice Secret', job_title='Driller', department='Mining', operation_id=op.id))
+    db.session.commit()
+
+
+def _login(client, email, password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+class TestSlowQueryLog:
+    def test_super_admin_only(self, client):
+        assert client.get('/api/_debug/slow-queries').status_code == 401
+        _login(client, 'alpha@test.com')
+        assert client.get('/api/_debug/slow-queries').status_code == 403
+
+    def test_records_sql_route_and_call_site(self, client):
+        _login(client, 'root@test.com')
+        client.get('/api/employees')
+        data = client.get('/api/_debug/slow-queries').get_json()
+
+        entry = next(q for q in data['queries'] if q['endpoint'] == 'api.list_employees'
+                     and 'FROM employee' in q['sql'])
+        assert entry['method'] == 'GET'
+        assert entry['path'] == '/api/employees'
+        assert entry['caller'].startswith('app/api/routes.py:')
+        assert entry['caller'].endswith('in list_employees')
+        assert entry['duration_ms'] >= 0
+
+    def test_parameters_are_shapes_not_values(self, client):
+        _login(client, 'root@test.com')
+        Employee.query.filter_by(name='Alice Secret').all()
+        data = client.get('/api/_debug/slow-queries').get_json()
+        entry = next(q for q in data['queries'] if 'employee.name = ?' in q['sql'])
+        assert entry['params'] == ['str']
+        assert 'Alice Secret' not in str(data)
+        assert entry['endpoint'] is None     # ran outside a request
+
+    def test_threshold(self, app, client):
+        app.config['SLOW_QUERY_MS'] = 10_000
+        _login(client, 'root@test.com')
+        client.get('/api/employees')
+        assert client.get('/api/_debug/slow-queries').get_json()['queries'] == []
+
+    def test_buffer_is_bounded_and_clearable(self, app, client):
+        _login(client, 'root@test.com')
+        capacity = app.extensions['slow_queries'].entries.maxlen
+        for _ in range(capacity):
+            Employee.query.all()
+        data = client.get('/api/_debug/slow-queries').get_json()
+        assert len(data['queries']) == capacity
+        assert data['recorded'] > capacity
+
+        assert client.delete('/api/_debug/slow-queries').status_code == 200
+        app.config['SLOW_QUERY_MS'] = 10_000
+        assert client.get('/api/_debug/slow-queries').get_json()['recorded'] == 0
+
+    def test_delete_needs_no_csrf_token(self, app, client):
+        app.config['WTF_CSRF_ENABLED'] = True
+        assert _login(client, 'root@test.com').status_code == 200
+        r = client.delete('/api/_debug/slow-queries')
+        assert r.status_code == 200
+        assert r.get_json() == {'cleared': True}
+
+    def test_failed_statement_leaves_nothing_on_the_connection(self, app):
+        from app.telemetry import queries
+        with app.test_request_context('/api/employees'), db.engine.connect() as conn:
+            queries._start()
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    conn.exec_driver_sql('SELECT * FROM no_such_table')
+            conn.exec_driver_sql('SELECT 1')
+            assert not {'query_started', 'slow_query_started'} & set(conn.info)
+            assert queries.current().count == 1
+        entries, _ = app.extensions['slow_queries'].snapshot()
+        assert entries[0]['sql'] == 'SELECT 1'                      # newest first
@@ -0,0 +1,116 @@
+r"""
+Tests for request telemetry (query counting, Server-Timing, query budgets).
+
+Run with:
+    python -m pytest tests/test_telemetry.py -v
+"""
+
+import logging
+import re
+
+import pytest
+from app import create_app, db
+from app.models import User, Operation
+from app.telemetry.queries import QueryBudgetExceeded
+
+
+@pytest.fixture(scope='function')
+def app():
+    application = create_app()
+    application.config['TESTING'] = True
+    application.config['WTF_CSRF_ENABLED'] = False
+    with application.app_context():
+        db.create_all()
+        _seed()
+        yield application
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from app.schedules.models import HEG, Stressor, SamplingSchedule, ExposureReading, EmployeeExposure
+    from app.employees.models import Employee
+
+    op = Operation(operation_name='Operation Alpha', code='ALPHA', status='active')
+    db.session.add(op)
+    db.session.flush()
+    user = User(username='user_alpha', email='alpha@test.com', role='admin', operation_id=op.id)
+    user.set_password('password')
+    db.session.add(user)
+
+    stressors = [Stressor(name=f'Stressor {i}', category='Chemical', operation_id=op.id) for i in range(4)]
+    hegs = [HEG(heg_number=f'HEG-{i}', job_title='Driller', department='Mining', operation_id=op.id)
+            for i in range(4)]
+    emp = Employee(name='Alice', job_title='Driller', department='Mining', operation_id=op.id)
+    db.session.add_all(stressors + hegs + [emp])
+    db.session.flush()
+    for i in range(16):
+        db.session.add(SamplingSchedule(heg_id=hegs[i % 4].id, stressor_id=stressors[i // 4].id,
+                                        frequency='Quarterly', operation_id=op.id))
+        reading = ExposureReading(stressor_id=stressors[i % 4].id, location='Pit', measured_value=1.0,
+                                  operation_id=op.id)
+        reading.employee_exposures.append(EmployeeExposure(employee_id=emp.id))
+        db.session.add(reading)
+    db.session.commit()
+
+
+def _login(client, email='alpha@test.com', password='password'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+# Requests share the fixture's app context, so the logged-in user is already in
+# the identity map: counts below are the endpoint's own statements only.
+
+def _timing(resp):
+    return {m[0]: (float(m[1]), m[2]) for m in
+            re.findall(r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', resp.headers['Server-Timing'])}
+
+
+class TestServerTiming:
+    def test_header_reports_db_serialize_total(self, client):
+        _login(client)
+        timing = _timing(client.get('/api/field-sheets'))
+        assert set(timing) == {'db', 'serialize', 'total'}
+        assert timing['db'][1] == '1 queries'
+        assert timing['total'][0] >= timing['db'][0]
+
+    def test_can_be_disabled(self):
+        from flask import Flask
+        from app.telemetry import server_timing
+        bare = Flask(__name__)
+        bare.config['SERVER_TIMING'] = False
+        server_timing.init_app(bare)
+        bare.route('/')(lambda: 'ok')
+        assert 'Server-Timing' not in bare.test_client().get('/').headers
+
+
+class TestQueryBudgets:
+    @pytest.mark.parametrize('path', ['/api/sampling-schedules', '/api/exposure-readings'])
+    def test_list_endpoints_stay_within_budget(self, client, path):
+        _login(client)
+        r = client.get(path)
+        assert r.status_code == 200
+        assert len(r.get_json()) == 16
+        expected = '1 queries' if path.endswith('schedules') else '2 queries'   # + selectin load
+        assert _timing(r)['db'][1] == expected
+
+    def test_overrun_raises_under_testing(self, app, client):
+        _login(client)
+        app.config['QUERY_BUDGETS'] = {'api.list_sampling_schedules': 0}
+        with pytest.raises(QueryBudgetExceeded, match='ran 1 queries'):
+            client.get('/api/sampling-schedules')
+
+    def test_overrun_logged_in_log_mode(self, app, client, caplog):
+        _login(client)
+        app.config['QUERY_BUDGET_MODE'] = 'log'
+        app.config['QUERY_BUDGETS'] = {}
+        app.config['QUERY_BUDGET_DEFAULT'] = 1
+        with caplog.at_level(logging.WARNING):
+            assert client.get('/api/exposure-readings').status_code == 200
+        assert 'api.list_exposure_readings ran 2 queries (budget 1)' in caplog.text
+        assert '1× SELECT employee_exposure' in caplog.text